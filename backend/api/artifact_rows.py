@@ -0,0 +1,267 @@
+"""Artifact data for exports, read straight from ``.values()`` rows.
+
+Exports need the same values as ``ArtifactSerializer`` but not its field
+machinery, which costs far more per row than the query. Rows come from
+``QuerySet.values()``, so no model instances are built. :func:`artifact_data`
+turns a row into the serializer's dict: same keys, same date and datetime
+strings, and JSON columns as stored.
+
+:func:`flatten_artifact` gives the ``key, value`` list of the single-artifact
+csv/xlsx exports. The column order and the source of every column are
+computed once per form type and detail/measurement key set
+(:class:`FlattenPlan`). Each artifact then only fills in its values; only
+rows with nested objects in their JSON columns use the generic recursive
+flattening.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from django.utils import timezone
+
+from core.models import Artifact
+
+# Every column an export reads; main code columns come through the join.
+ARTIFACT_FIELDS: Tuple[str, ...] = (
+    "id",
+    "main_code_id",
+    "main_code__code",
+    "main_code__finding_place",
+    "artifact_no",
+    "artifact_date",
+    "form_type",
+    "production_material",
+    "period",
+    "finding_shape",
+    "level",
+    "excavation_inv_no",
+    "museum_inv_no",
+    "piece_date",
+    "notes",
+    "source_and_reference",
+    "is_active",
+    "is_inventory",
+    "details",
+    "measurements",
+    "images",
+    "drawings",
+    "created_at",
+    "updated_at",
+)
+
+# Media columns can hold data URLs and are not part of the tabular exports.
+TABULAR_FIELDS: Tuple[str, ...] = tuple(f for f in ARTIFACT_FIELDS if f not in ("images", "drawings"))
+
+ROW_CHUNK_SIZE = 2000
+
+Row = Dict[str, Any]
+
+
+def artifact_rows(qs, fields: Sequence[str] = ARTIFACT_FIELDS, chunk_size: int = ROW_CHUNK_SIZE) -> Iterator[Row]:
+    """``fields`` of every artifact in ``qs``, read through a server-side cursor."""
+    return qs.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def instance_row(artifact: Artifact) -> Row:
+    """The :func:`artifact_rows` row of an already loaded artifact."""
+    mc = artifact.main_code
+    row = {f: getattr(artifact, f) for f in ARTIFACT_FIELDS if "__" not in f}
+    row["main_code__code"] = mc.code
+    row["main_code__finding_place"] = mc.finding_place
+    return row
+
+
+def iso_date(value):
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def iso_datetime(value, tz=None):
+    """``DateTimeField.to_representation``: current time zone, ``Z`` for UTC.
+
+    Batch callers look ``tz`` up once; finding the current time zone costs
+    more than the conversion.
+    """
+    if not isinstance(value, datetime.datetime):
+        return value
+    if timezone.is_aware(value):
+        value = value.astimezone(tz or timezone.get_current_timezone())
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def full_artifact_no(code: str, artifact_no: int) -> str:
+    return f"{code}{artifact_no:04d}"
+
+
+def artifact_data(row: Row, tz=None) -> Dict[str, Any]:
+    """``ArtifactSerializer(artifact).data`` as a plain dict, from a row.
+
+    Media keys are only present when the row has them.
+    """
+    tz = tz or timezone.get_current_timezone()
+    data = {
+        "id": row["id"],
+        "main_code": row["main_code_id"],
+        "main_code_code": row["main_code__code"],
+        "main_code_finding_place": row["main_code__finding_place"],
+        "artifact_no": row["artifact_no"],
+        "full_artifact_no": full_artifact_no(row["main_code__code"], row["artifact_no"]),
+        "artifact_date": iso_date(row["artifact_date"]),
+        "form_type": row["form_type"],
+        "production_material": row["production_material"],
+        "period": row["period"],
+        "finding_shape": row["finding_shape"],
+        "level": row["level"],
+        "excavation_inv_no": row["excavation_inv_no"],
+        "museum_inv_no": row["museum_inv_no"],
+        "piece_date": row["piece_date"],
+        "notes": row["notes"],
+        "source_and_reference": row["source_and_reference"],
+        "is_active": row["is_active"],
+        "is_inventory": row["is_inventory"],
+        "details": row["details"],
+        "measurements": row["measurements"],
+    }
+    if "images" in row:
+        data["images"] = row["images"]
+        data["drawings"] = row["drawings"]
+    data["created_at"] = iso_datetime(row["created_at"], tz)
+    data["updated_at"] = iso_datetime(row["updated_at"], tz)
+    return data
+
+
+def artifacts_data(qs, fields: Sequence[str] = ARTIFACT_FIELDS, chunk_size: int = ROW_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    tz = timezone.get_current_timezone()
+    for row in artifact_rows(qs, fields, chunk_size):
+        yield artifact_data(row, tz)
+
+
+# -- key/value flattening -----------------------------------------------------
+
+# Leading columns of the key/value exports: (column, artifact_data key).
+FLAT_BASE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("full_artifact_no", "full_artifact_no"),
+    ("main_code", "main_code_code"),
+    ("main_code_finding_place", "main_code_finding_place"),
+    ("artifact_no", "artifact_no"),
+    ("artifact_date", "artifact_date"),
+    ("form_type", "form_type"),
+    ("production_material", "production_material"),
+    ("period", "period"),
+    ("piece_date", "piece_date"),
+    ("notes", "notes"),
+    ("source_and_reference", "source_and_reference"),
+    ("is_active", "is_active"),
+    ("is_inventory", "is_inventory"),
+)
+
+FLAT_BASE_KEYS = tuple(key for _, key in FLAT_BASE_COLUMNS)
+
+# Top-level keys written after the base columns (lists as JSON).
+FLAT_PLAIN_KEYS = ("images", "drawings", "created_at", "updated_at")
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        # keep as JSON to preserve structure
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def flatten_into(prefix: str, obj: Any, out: Dict[str, str]) -> None:
+    """Generic flattening: nested dict keys joined with dots, lists as JSON."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            flatten_into(f"{prefix}{k}.", v, out)
+        return
+    out[prefix[:-1]] = _cell(obj)
+
+
+class FlattenPlan:
+    """Column order and value source of one shape of artifact.
+
+    A shape is the form type plus the key sets of ``details`` and
+    ``measurements`` (flat objects only). ``sources`` holds, per column after
+    the base ones, the section (``details``, ``measurements`` or None for a
+    top-level key) and the key to read.
+    """
+
+    __slots__ = ("columns", "sources")
+
+    def __init__(self, detail_keys: Tuple[str, ...], measurement_keys: Tuple[str, ...]):
+        rest: Dict[str, Tuple[Any, str]] = {k: (None, k) for k in FLAT_PLAIN_KEYS}
+        rest.update({f"details.{k}": ("details", k) for k in detail_keys})
+        rest.update({f"measurements.{k}": ("measurements", k) for k in measurement_keys})
+        ordered = sorted(rest)
+        self.columns = tuple(c for c, _ in FLAT_BASE_COLUMNS) + tuple(ordered)
+        self.sources = tuple(rest[c] for c in ordered)
+
+    def apply(self, data: Dict[str, Any], sections: Dict[str, Any]) -> List[Tuple[str, str]]:
+        values = [data.get(key) for key in FLAT_BASE_KEYS]
+        values += [sections[key] if section is None else sections[section][key] for section, key in self.sources]
+        return [(c, v if type(v) is str else _cell(v)) for c, v in zip(self.columns, values)]
+
+
+_plans: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], FlattenPlan] = {}
+MAX_PLANS = 1024
+
+
+def _flat_keys(obj: Any):
+    """Keys of ``obj`` if the plan can read it (a dict without dict values), else None."""
+    if not isinstance(obj, dict):
+        return None
+    for v in obj.values():
+        if isinstance(v, dict):
+            return None
+    return tuple(obj)
+
+
+def plan_for(form_type: str, details: Any, measurements: Any):
+    """The cached :class:`FlattenPlan` of a shape, or None if it needs the generic path."""
+    detail_keys = _flat_keys(details)
+    measurement_keys = _flat_keys(measurements)
+    if detail_keys is None or measurement_keys is None:
+        return None
+    shape = (form_type or "", detail_keys, measurement_keys)
+    plan = _plans.get(shape)
+    if plan is None:
+        if len(_plans) >= MAX_PLANS:
+            _plans.clear()
+        plan = _plans[shape] = FlattenPlan(detail_keys, measurement_keys)
+    return plan
+
+
+def flatten_artifact(data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """``(column, text)`` pairs: base columns, then the rest alphabetically.
+
+    ``data`` is :func:`artifact_data` output. Empty ``details`` or
+    ``measurements`` add no columns; lists are written as JSON.
+    """
+    sections = {
+        "details": data.get("details") or {},
+        "measurements": data.get("measurements") or {},
+        "images": data.get("images") or [],
+        "drawings": data.get("drawings") or [],
+        "created_at": data.get("created_at"),
+        "updated_at": data.get("updated_at"),
+    }
+    plan = None
+    if isinstance(sections["images"], list) and isinstance(sections["drawings"], list):
+        plan = plan_for(data.get("form_type"), sections["details"], sections["measurements"])
+    if plan is not None:
+        return plan.apply(data, sections)
+
+    flat: Dict[str, str] = {}
+    for key, value in sections.items():
+        flatten_into(f"{key}.", value, flat)
+    return [(c, _cell(data.get(key))) for c, key in FLAT_BASE_COLUMNS] + sorted(flat.items())
+
+
+def flatten_artifacts(items: Iterable[Dict[str, Any]]) -> Iterator[List[Tuple[str, str]]]:
+    """:func:`flatten_artifact` over many artifacts; plans are shared across them."""
+    for data in items:
+        yield flatten_artifact(data)
@@ -0,0 +1,402 @@
+"""Async views for the read-heavy artifact endpoints (ASGI deployments).
+
+With ``SERVER_MODE=asgi`` (``arkeoloji/asgi.py`` sets it, ``gunicorn.conf.py``
+then starts uvicorn workers) these views answer ``GET`` on the artifact list,
+detail, ``check-unique``, ``bulk-export`` and ``export`` routes. A request
+waiting on the database, a render or a slow client is parked on the event
+loop instead of holding a worker, so one process holds hundreds of them.
+
+- Queries go through Django's async ORM (``aaggregate``, ``afirst``,
+  ``aiterator`` ...); Django runs them in a per-request thread.
+- Output is the DRF view's: the viewset still builds the queryset and the
+  serializer, and ETags and list-cache entries are shared between the modes.
+- Serializing and rendering response bodies, single-artifact renders and
+  bulk xlsx files run in a bounded thread pool (``ASYNC_RENDER_THREADS``);
+  PDFs go on from there to the render process pool. Requests beyond the
+  pool size wait on the event loop.
+- Everything else (writes, the browsable API, cursor pagination) is passed
+  to the DRF view unchanged.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.urls import URLPattern
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.models import Artifact
+from . import render_pool
+from .conditional import (
+    detail_etag,
+    latest,
+    list_etag,
+    make_etag,
+    normalized_query,
+    not_modified,
+    set_validators,
+    unpack_validators,
+    validator_aggregates,
+)
+from .exports import (
+    BULK_EXPORT_FORMATS,
+    BULK_EXPORT_TYPES,
+    FILE_CHUNK_SIZE,
+    LINE_ENCODERS,
+    abulk_export_stream,
+    attachment_response,
+    iter_export_rows,
+    remove_quietly,
+    write_xlsx,
+)
+from .metrics import atimed_chunks
+from .pagination import StandardResultsSetPagination
+from .render_cache import get_render_cache, render_key
+from .response_cache import count_lookup, get_cache, list_cache_key
+from .viewsets import (
+    ARTIFACT_EXPORT_FORMATS,
+    ArtifactViewSet,
+    ExportUnavailable,
+    _export_format,
+    render_artifact_export,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.ASYNC_RENDER_THREADS), thread_name_prefix="arkeoloji-render"
+        )
+    return _executor
+
+
+def _with_connections(func: Callable[..., Any], *args: Any) -> Any:
+    # Pool threads get no request signals; treat each call like a request.
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """``func(*args)`` on the render thread pool; the event loop keeps serving."""
+    call = functools.partial(contextvars.copy_context().run, _with_connections, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+
+def _negotiate(request) -> Optional[Request]:
+    """DRF request with the renderer DRF would pick; None for HTML or a 406."""
+    drf_request = Request(request)
+    renderers = [r() for r in api_settings.DEFAULT_RENDERER_CLASSES]
+    try:
+        renderer, media_type = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS().select_renderer(
+            drf_request, renderers
+        )
+    except NotAcceptable:
+        return None
+    if renderer.media_type == "text/html":
+        return None
+    drf_request.accepted_renderer = renderer
+    drf_request.accepted_media_type = media_type
+    return drf_request
+
+
+async def _respond(request: Request, data: Any, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    """What DRF's ``Response`` would render for ``data``; rendered on the thread pool."""
+    renderer = request.accepted_renderer
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f"{content_type}; charset={renderer.charset}"
+    body = await run_blocking(renderer.render, data, request.accepted_media_type, {"request": request})
+    resp = HttpResponse(body, status=status_code, content_type=content_type)
+    patch_vary_headers(resp, ("Accept",))
+    return resp
+
+
+async def _not_found(request: Request) -> HttpResponse:
+    # Same text as DRF's get_object() 404.
+    return await _respond(
+        request, {"detail": f"No {Artifact._meta.object_name} matches the given query."}, status.HTTP_404_NOT_FOUND
+    )
+
+
+def _viewset(request: Request, action: str, **kwargs: Any) -> ArtifactViewSet:
+    # Used for its queryset, serializer and cache-key rules, never dispatched.
+    return ArtifactViewSet(request=request, action=action, args=(), kwargs=kwargs, format_kwarg=None)
+
+
+def _serialized(view: ArtifactViewSet, instance: Any, many: bool) -> Any:
+    return view.get_serializer(instance, many=many).data
+
+
+async def _list_validators(view: ArtifactViewSet, qs):
+    agg = await qs.order_by().aaggregate(**validator_aggregates(view.validator_fields))
+    return unpack_validators(agg, view.validator_fields)
+
+
+async def artifact_list(request: Request, **kwargs: Any) -> Optional[HttpResponse]:
+    paginator = StandardResultsSetPagination()
+    if paginator.use_keyset(request):
+        return None
+
+    view = _viewset(request, "list")
+    cache_key = None
+    if settings.API_CACHE_BACKEND != "off":
+        cache_key = await sync_to_async(list_cache_key)(
+            request, view.list_cache_tags(request), view.representation_key(request)
+        )
+        entry = await get_cache().aget(cache_key)
+        await sync_to_async(count_lookup)(hit=entry is not None)
+        if entry is not None:
+            etag, data = entry
+            resp = not_modified(request, etag) or set_validators(await _respond(request, data), etag)
+            resp["X-Cache"] = "HIT"
+            return resp
+
+    qs = await sync_to_async(view.get_queryset)()
+    count, last_modified = await _list_validators(view, qs)
+    etag = list_etag(view.representation_key(request), count, last_modified)
+    resp = not_modified(request, etag)
+    if resp is None:
+        data, status_code = await _list_page(request, view, paginator, qs, count)
+        resp = await _respond(request, data, status_code)
+        if status_code == status.HTTP_200_OK:
+            set_validators(resp, etag)
+            if cache_key is not None:
+                await get_cache().aset(cache_key, (etag, data))
+    if cache_key is not None:
+        resp["X-Cache"] = "MISS"
+    return resp
+
+
+async def _list_page(request, view, paginator, qs, count: int):
+    """``PageNumberPagination`` page, using the count the ETag query already got."""
+    page_size = paginator.get_page_size(request)
+    page_number = request.query_params.get(paginator.page_query_param) or 1
+    num_pages = max(1, math.ceil(count / page_size))
+    try:
+        number = num_pages if page_number in paginator.last_page_strings else int(page_number)
+    except (TypeError, ValueError):
+        number = 0
+    if not 1 <= number <= num_pages:
+        message = paginator.invalid_page_message.format(page_number=page_number, message="")
+        return {"detail": message}, status.HTTP_404_NOT_FOUND
+
+    offset = (number - 1) * page_size
+    rows = [obj async for obj in qs[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    previous = None
+    if number == 2:
+        previous = remove_query_param(url, paginator.page_query_param)
+    elif number > 2:
+        previous = replace_query_param(url, paginator.page_query_param, number - 1)
+    data = {
+        "count": count,
+        "next": replace_query_param(url, paginator.page_query_param, number + 1) if number < num_pages else None,
+        "previous": previous,
+        "results": await run_blocking(_serialized, view, rows, True),
+    }
+    return data, status.HTTP_200_OK
+
+
+async def artifact_detail(request: Request, pk=None, **kwargs: Any) -> HttpResponse:
+    view = _viewset(request, "retrieve", pk=pk)
+    qs = await sync_to_async(view.get_queryset)()
+    try:
+        row = await qs.filter(pk=pk).order_by().values_list(*view.validator_fields).afirst()
+    except (TypeError, ValueError, DjangoValidationError):
+        row = None
+    if row is None:
+        return await _not_found(request)
+
+    last_modified = latest(row)
+    etag = detail_etag(view.representation_key(request), row)
+    resp = not_modified(request, etag, last_modified)
+    if resp is not None:
+        return resp
+    try:
+        artifact = await qs.aget(pk=pk)
+    except Artifact.DoesNotExist:
+        return await _not_found(request)
+    data = await run_blocking(_serialized, view, artifact, False)
+    return set_validators(await _respond(request, data), etag, last_modified)
+
+
+async def check_unique(request: Request, **kwargs: Any) -> HttpResponse:
+    main_code = request.query_params.get("main_code")
+    artifact_no = request.query_params.get("artifact_no")
+    exclude_id = request.query_params.get("exclude_id")
+
+    if not main_code or not artifact_no:
+        return await _respond(request, {"detail": "main_code ve artifact_no gerekli.", "exists": False}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        no_int = int(artifact_no)
+    except ValueError:
+        return await _respond(request, {"detail": "artifact_no sayı olmalıdır.", "exists": False}, status.HTTP_400_BAD_REQUEST)
+
+    qs = Artifact.objects.filter(main_code_id=main_code, artifact_no=no_int)
+    if exclude_id:
+        qs = qs.exclude(pk=exclude_id)
+
+    return await _respond(request, {"exists": await qs.aexists()})
+
+
+async def _xlsx_chunks(qs) -> AsyncIterator[bytes]:
+    path = await run_blocking(lambda: write_xlsx(iter_export_rows(qs)))
+    try:
+        # Local disk reads are short; waiting on the client is what must not block.
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        remove_quietly(path)
+
+
+async def bulk_export(request: Request, **kwargs: Any) -> HttpResponse:
+    fmt = _export_format(request)
+    if fmt not in BULK_EXPORT_FORMATS:
+        return await _respond(request, {"detail": "format desteklenmiyor. csv | ndjson | xlsx"}, status.HTTP_400_BAD_REQUEST)
+
+    if fmt == "xlsx":
+        try:
+            import openpyxl  # noqa: F401
+        except Exception:
+            return await _respond(request, {"detail": "openpyxl yüklü değil."}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    view = _viewset(request, "bulk_export")
+    qs = await sync_to_async(view.get_queryset)()
+    count, last_modified = await _list_validators(view, qs)
+    stamp = last_modified.isoformat() if last_modified else ""
+    etag = make_etag("bulk-export", normalized_query(request.query_params), count, stamp)
+    resp = not_modified(request, etag)
+    if resp is not None:
+        return resp
+
+    if fmt in LINE_ENCODERS:
+        chunks, content_type = abulk_export_stream(qs, fmt)
+    else:
+        chunks, content_type = atimed_chunks(_xlsx_chunks(qs), "bulk", fmt), BULK_EXPORT_TYPES[fmt][0]
+    filename = f"buluntular-{timezone.localtime():%Y%m%d-%H%M}.{fmt}"
+    return set_validators(attachment_response(chunks, content_type, filename), etag)
+
+
+def _read_and_close(fh) -> bytes:
+    with fh:
+        return fh.read()
+
+
+async def artifact_export(request: Request, pk=None, **kwargs: Any) -> HttpResponse:
+    view = _viewset(request, "export", pk=pk)
+    qs = await sync_to_async(view.get_queryset)()
+    try:
+        artifact = await qs.aget(pk=pk)
+    except (Artifact.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+        return await _not_found(request)
+
+    fmt = _export_format(request)
+    if fmt not in ARTIFACT_EXPORT_FORMATS:
+        return await _respond(request, {"detail": "format desteklenmiyor. csv | xlsx | pdf"}, status.HTTP_400_BAD_REQUEST)
+    content_type, ext = ARTIFACT_EXPORT_FORMATS[fmt]
+
+    key = render_key(artifact, fmt)
+    etag = f'"{key}"'
+    last_modified = latest([artifact.updated_at, artifact.main_code.updated_at])
+    resp = not_modified(request, etag, last_modified)
+    if resp is not None:
+        return resp
+
+    cache = get_render_cache()
+    fh = await run_blocking(cache.get, artifact.pk, key, ext)
+    if fh is None:
+        try:
+            data = await run_blocking(render_artifact_export, artifact, fmt, request.build_absolute_uri("/"), True)
+        except ExportUnavailable as exc:
+            return await _respond(request, {"detail": str(exc)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except render_pool.RenderTimeout:
+            # Too slow for a request; let the export worker finish it.
+            job = await sync_to_async(view._queue_artifact_export)(request, artifact, fmt)
+            return await _respond(request, job.data, job.status_code)
+        await run_blocking(cache.put, artifact.pk, key, ext, data)
+    else:
+        data = await run_blocking(_read_and_close, fh)
+
+    filename_base = artifact.full_artifact_no or f"artifact-{artifact.pk}"
+    resp = HttpResponse(data, content_type=content_type)
+    resp["Content-Disposition"] = content_disposition_header(fmt != "html", f"{filename_base}.{ext}")
+    return set_validators(resp, etag, last_modified)
+
+
+HANDLERS = {
+    "artifact-list": artifact_list,
+    "artifact-detail": artifact_detail,
+    "artifact-check-unique": check_unique,
+    "artifact-bulk-export": bulk_export,
+    "artifact-export": artifact_export,
+}
+
+
+def _allow_header(fallback) -> str:
+    """The ``Allow`` value DRF sends on the route ``fallback`` serves."""
+    view = fallback.cls(**fallback.initkwargs)
+    # Bound like ViewSetMixin.as_view() does, so allowed_methods sees the route's actions.
+    for method, action in fallback.actions.items():
+        setattr(view, method, getattr(view, action))
+    if "get" in fallback.actions and "head" not in fallback.actions:
+        view.head = view.get
+    return ", ".join(view.allowed_methods)
+
+
+def _async_route(handler, fallback):
+    allow = _allow_header(fallback)
+
+    async def view(request, *args, **kwargs):
+        if request.method == "GET":
+            drf_request = _negotiate(request)
+            if drf_request is not None:
+                resp = await handler(drf_request, *args, **kwargs)
+                if resp is not None:
+                    resp["Allow"] = allow
+                    return resp
+        return await sync_to_async(fallback)(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+def wrap_routes(patterns: List[URLPattern]) -> List[URLPattern]:
+    """Router ``patterns`` with the :data:`HANDLERS` routes served async.
+
+    Patterns, names and order are kept, so reversing and metrics labels do
+    not change; ``.json``-style suffix routes stay on DRF.
+    """
+    wrapped = []
+    for p in patterns:
+        handler = HANDLERS.get(p.name)
+        if handler is not None and "format" not in p.pattern.regex.groupindex:
+            p = URLPattern(p.pattern, _async_route(handler, p.callback), p.default_args, p.name)
+        wrapped.append(p)
+    return wrapped
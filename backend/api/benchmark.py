@@ -0,0 +1,369 @@
+"""API benchmark suite (``manage.py benchmark_api``).
+
+Each scenario requests one endpoint through Django's test client, in process,
+against the configured database (fill it with ``manage.py seed_synthetic``).
+Scenarios cover list pages, search, filters, uniqueness checks and every
+single-artifact and bulk export format.
+
+Per scenario the suite records:
+
+- latency percentiles over ``iterations`` timed requests, after ``warmup``
+  untimed ones;
+- SQL query count and Python heap peak (``tracemalloc``) from one separate
+  instrumented request, so the instrumentation does not skew the timings;
+- response status and size.
+
+The list response cache and the export render cache are switched off
+(``EXPORT_CACHE_MAX_BYTES=0``: no render is read or stored) so every
+request, warmup included, does the full work. Request parameters (ids, search words)
+come from a generator seeded with the scenario name, so runs against the
+same dataset send the same requests.
+
+Results are JSON. :func:`compare` checks them against a saved baseline and
+reports latency or memory growth past ``threshold`` and any extra queries.
+
+:func:`compare_renderers` (``manage.py benchmark_renderers``) measures the
+response formats alone: encode and decode time and payload size of full
+artifact pages for each installed renderer.
+"""
+from __future__ import annotations
+
+import datetime
+import gzip
+import io
+import json
+import platform
+import random
+import time
+import tracemalloc
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Artifact, MainCode
+from . import renderers
+from .exports import BULK_EXPORT_FORMATS
+from .serializers import ArtifactSerializer
+from .synthetic import PERIODS, PLACES, WORDS
+from .viewsets import ARTIFACT_EXPORT_FORMATS, CHECK_UNIQUE_MAX_PAIRS
+
+RESULTS_VERSION = 1
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_WARMUP = 2
+DEFAULT_THRESHOLD = 0.25
+
+# Differences below these are noise, whatever the ratio.
+MIN_LATENCY_DELTA_MS = 2.0
+MIN_MEMORY_DELTA_KB = 256
+
+SAMPLE_SIZE = 64
+
+Request = Dict[str, Any]  # {"path": ..., "data": ... (POST JSON body), "headers": {...}}
+
+
+@dataclass
+class Dataset:
+    """Ids sampled once, so scenarios pick from existing rows."""
+
+    artifact_ids: List[int]
+    artifact_keys: List[tuple]  # (main_code_id, artifact_no)
+    main_code_ids: List[int]
+    main_codes: int
+    artifacts: int
+
+    @classmethod
+    def load(cls, sample: int = SAMPLE_SIZE) -> "Dataset":
+        rng = random.Random(0)
+        artifacts = Artifact.objects.count()
+        main_codes = MainCode.objects.count()
+        if not artifacts:
+            raise ValueError("Veritabanında buluntu yok; önce seed_synthetic çalıştırın.")
+        bounds = Artifact.objects.order_by("pk").values_list("pk", flat=True)
+        low, high = bounds.first(), bounds.last()
+        rows = set()
+        for _ in range(sample):
+            row = (
+                Artifact.objects.filter(pk__gte=rng.randint(low, high))
+                .order_by("pk")
+                .values_list("pk", "main_code_id", "artifact_no")
+                .first()
+            )
+            rows.add(row)
+        rows = sorted(rows)
+        return cls(
+            artifact_ids=[r[0] for r in rows],
+            artifact_keys=[(r[1], r[2]) for r in rows],
+            main_code_ids=sorted({r[1] for r in rows}),
+            main_codes=main_codes,
+            artifacts=artifacts,
+        )
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Dataset], Request]
+    method: str = "get"
+
+
+def _get(path: str, **headers: str) -> Callable[[random.Random, Dataset], Request]:
+    return lambda rng, ds: {"path": path, "headers": headers}
+
+
+def _check_unique_batch(rng: random.Random, ds: Dataset) -> Request:
+    pairs = []
+    for i in range(CHECK_UNIQUE_MAX_PAIRS // 2):
+        mc, no = rng.choice(ds.artifact_keys)
+        pairs.append({"main_code": mc, "artifact_no": no if i % 2 else no + rng.randint(1, 10_000)})
+    return {"path": "/api/artifacts/check-unique-batch/", "data": {"pairs": pairs}}
+
+
+def scenarios() -> List[Scenario]:
+    items = [
+        Scenario("list.artifacts", _get("/api/artifacts/")),
+        Scenario("list.artifacts.deep_page", _get("/api/artifacts/?page=200")),
+        Scenario("list.artifacts.cursor", _get("/api/artifacts/?paginate=cursor")),
+        Scenario(
+            "list.artifacts.json_fields",
+            _get("/api/artifacts/?fields=id,full_artifact_no,details,measurements&page_size=200"),
+        ),
+        Scenario(
+            "list.artifacts.full.json",
+            _get("/api/artifacts/?omit=images,drawings&page_size=500", Accept="application/json"),
+        ),
+        Scenario(
+            "list.artifacts.full.msgpack",
+            _get("/api/artifacts/?omit=images,drawings&page_size=500", Accept="application/msgpack"),
+        ),
+        Scenario("list.main_codes", _get("/api/main-codes/")),
+        Scenario("detail.artifact", lambda rng, ds: {"path": f"/api/artifacts/{rng.choice(ds.artifact_ids)}/"}),
+        Scenario("search.artifacts", lambda rng, ds: {"path": f"/api/artifacts/?q={rng.choice(WORDS)}"}),
+        Scenario("search.main_codes", lambda rng, ds: {"path": f"/api/main-codes/?q={rng.choice(PLACES)}"}),
+        Scenario(
+            "search.suggest",
+            lambda rng, ds: {"path": f"/api/artifacts/suggest/?field=period&q={rng.choice(PERIODS)[:2]}"},
+        ),
+        Scenario("filter.form_period", lambda rng, ds: {"path": f"/api/artifacts/?form_type=SERAMIK&period={rng.choice(PERIODS)}"}),
+        Scenario("filter.date_range", _get("/api/artifacts/?date_from=2018-01-01&date_to=2018-12-31")),
+        Scenario("filter.json_range", _get("/api/artifacts/?details.diameter__gte=20&form_type=SIKKE")),
+        Scenario("filter.main_code", lambda rng, ds: {"path": f"/api/artifacts/?main_code={rng.choice(ds.main_code_ids)}"}),
+        Scenario("filter.facets", _get("/api/artifacts/facets/?form_type=SIKKE")),
+        Scenario(
+            "check_unique",
+            lambda rng, ds: {
+                "path": "/api/artifacts/check-unique/?main_code=%s&artifact_no=%s" % rng.choice(ds.artifact_keys)
+            },
+        ),
+        Scenario("check_unique.batch", _check_unique_batch, method="post"),
+    ]
+    for fmt in ARTIFACT_EXPORT_FORMATS:
+        items.append(Scenario(
+            f"export.{fmt}",
+            lambda rng, ds, fmt=fmt: {"path": f"/api/artifacts/{rng.choice(ds.artifact_ids)}/export/?export={fmt}"},
+        ))
+    for fmt in BULK_EXPORT_FORMATS:
+        items.append(Scenario(
+            f"bulk_export.{fmt}",
+            _get(f"/api/artifacts/bulk-export/?export={fmt}&form_type=MEZAR&period=Roma"),
+        ))
+    return items
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linear-interpolated percentile (``p`` in 0..100)."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _send(client: Client, scenario: Scenario, request: Request):
+    if scenario.method == "post":
+        resp = client.post(request["path"], json.dumps(request["data"]), content_type="application/json")
+    else:
+        resp = client.get(request["path"], headers=request.get("headers"))
+    if resp.streaming:
+        size = sum(len(chunk) for chunk in resp.streaming_content)
+    else:
+        size = len(resp.content)
+    resp.close()
+    return resp.status_code, size
+
+
+@dataclass
+class Runner:
+    iterations: int = DEFAULT_ITERATIONS
+    warmup: int = DEFAULT_WARMUP
+    host: str = "localhost"
+    client: Client = field(init=False)
+
+    def __post_init__(self):
+        self.client = Client(HTTP_HOST=self.host)
+
+    def run(self, scenario: Scenario, ds: Dataset) -> Dict[str, Any]:
+        rng = random.Random(zlib.crc32(scenario.name.encode("utf-8")))
+        for _ in range(self.warmup):
+            _send(self.client, scenario, scenario.build(rng, ds))
+
+        timings: List[float] = []
+        sizes: List[int] = []
+        statuses = set()
+        for _ in range(self.iterations):
+            request = scenario.build(rng, ds)
+            started = time.perf_counter()
+            status, size = _send(self.client, scenario, request)
+            timings.append((time.perf_counter() - started) * 1000)
+            sizes.append(size)
+            statuses.add(status)
+
+        request = scenario.build(rng, ds)
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                status, _ = _send(self.client, scenario, request)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        statuses.add(status)
+
+        return {
+            "status": sorted(statuses),
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p90_ms": round(percentile(timings, 90), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": len(ctx),
+            "sql_ms": round(sum(float(q["time"]) for q in ctx.captured_queries) * 1000, 2),
+            "peak_kb": round(peak / 1024),
+            "bytes": int(percentile(sizes, 50)),
+        }
+
+
+def run_suite(
+    iterations: int = DEFAULT_ITERATIONS,
+    warmup: int = DEFAULT_WARMUP,
+    only: Optional[List[str]] = None,
+    host: str = "localhost",
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Runs the scenarios whose name starts with one of ``only`` (all by default)."""
+    ds = Dataset.load()
+    runner = Runner(iterations=iterations, warmup=warmup, host=host)
+    results: Dict[str, Any] = {}
+    with override_settings(API_CACHE_BACKEND="off", EXPORT_CACHE_MAX_BYTES=0):
+        for scenario in scenarios():
+            if only and not any(scenario.name.startswith(prefix) for prefix in only):
+                continue
+            results[scenario.name] = runner.run(scenario, ds)
+            if progress:
+                progress(scenario.name, results[scenario.name])
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "machine": platform.machine(),
+        },
+        "dataset": {"main_codes": ds.main_codes, "artifacts": ds.artifacts},
+        "iterations": iterations,
+        "scenarios": results,
+    }
+
+
+def _codecs() -> List[tuple]:
+    """``(name, renderer, parser)`` for the stdlib JSON path and each installed fast format."""
+    items = [("json", JSONRenderer(), JSONParser())]
+    if renderers.orjson is not None:
+        items.append(("orjson", renderers.ORJSONRenderer(), renderers.ORJSONParser()))
+    if renderers.msgpack is not None:
+        items.append(("msgpack", renderers.MessagePackRenderer(), renderers.MessagePackParser()))
+    return items
+
+
+def _best_ms(func: Callable[[], Any], iterations: int) -> float:
+    best = float("inf")
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def compare_renderers(page_size: int = 500, pages: int = 4, iterations: int = 10) -> Dict[str, Any]:
+    """Encode/decode time and size of full artifact list pages per format.
+
+    Pages are the newest ``pages * page_size`` artifacts with every field of
+    ``ArtifactSerializer`` (details, measurements, media references), built
+    once; only rendering and parsing are timed (best of ``iterations``).
+    """
+    rows = list(Artifact.objects.select_related("main_code").order_by("-created_at")[: page_size * pages])
+    if not rows:
+        raise ValueError("Veritabanında buluntu yok; önce seed_synthetic çalıştırın.")
+    data = [
+        {"count": len(rows), "next": None, "previous": None,
+         "results": ArtifactSerializer(rows[i:i + page_size], many=True).data}
+        for i in range(0, len(rows), page_size)
+    ]
+
+    results: Dict[str, Any] = {}
+    for name, renderer, parser in _codecs():
+        encoded = [renderer.render(page) for page in data]
+        encode_ms = sum(_best_ms(lambda p=page: renderer.render(p), iterations) for page in data)
+        decode_ms = sum(_best_ms(lambda b=body: parser.parse(io.BytesIO(b)), iterations) for body in encoded)
+        size = sum(len(body) for body in encoded)
+        results[name] = {
+            "media_type": renderer.media_type,
+            "encode_ms_per_page": round(encode_ms / len(data), 3),
+            "decode_ms_per_page": round(decode_ms / len(data), 3),
+            "bytes_per_page": size // len(data),
+            "gzip_bytes_per_page": sum(len(gzip.compress(body, 6)) for body in encoded) // len(data),
+        }
+
+    base = results["json"]
+    for r in results.values():
+        r["encode_speedup"] = round(base["encode_ms_per_page"] / r["encode_ms_per_page"], 2)
+        r["size_ratio"] = round(r["bytes_per_page"] / base["bytes_per_page"], 3)
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "page_size": page_size,
+        "pages": len(data),
+        "renderers": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as readable lines."""
+    problems: List[str] = []
+    if results.get("dataset") != baseline.get("dataset"):
+        problems.append(f"veri kümesi farklı: {results.get('dataset')} != {baseline.get('dataset')}")
+
+    for name, current in results["scenarios"].items():
+        if any(s >= 400 for s in current["status"]):
+            problems.append(f"{name}: HTTP {current['status']}")
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p90_ms"):
+            limit = before[key] * (1 + threshold)
+            if current[key] > limit and current[key] - before[key] > MIN_LATENCY_DELTA_MS:
+                problems.append(f"{name}: {key} {before[key]} -> {current[key]}")
+        if current["queries"] > before["queries"]:
+            problems.append(f"{name}: queries {before['queries']} -> {current['queries']}")
+        limit = before["peak_kb"] * (1 + threshold)
+        if current["peak_kb"] > limit and current["peak_kb"] - before["peak_kb"] > MIN_MEMORY_DELTA_KB:
+            problems.append(f"{name}: peak_kb {before['peak_kb']} -> {current['peak_kb']}")
+    return problems
@@ -0,0 +1,205 @@
+"""Multi-artifact catalog PDF (every find of a main code or of a filtered list).
+
+The document is built in one ReportLab pass from a lazy story. Artifacts are
+read in chunks through a server-side cursor as ``.values()`` rows
+(:mod:`api.artifact_rows`), without model instances or serializers.
+Each entry's flowables are created only when the layout engine gets near
+them, so memory holds a short look-ahead window instead of the whole catalog.
+Styles and table templates come from :mod:`api.pdf_render` and are built once.
+
+Page numbers are recorded as entries are laid out. They feed the PDF outline
+(bookmarks), the table of contents at the end of the document, and the
+progress callback.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from .artifact_rows import artifacts_data
+from .pdf_render import RenderUnavailable, artifact_flowables, reportlab_styles, text_cell
+
+CATALOG_CHUNK_SIZE = 500
+
+# Flowables generated ahead of the layout position (keep-with-next groups
+# need to see a little of what follows).
+LOOKAHEAD = 64
+
+ProgressCallback = Callable[[int, int, int], None]  # (done, total, page)
+
+
+class LazyStory(list):
+    """A flowable list that is filled from an iterator on demand.
+
+    ReportLab's build loop only touches the head of the list (``len``,
+    ``[0]``, ``del [0]``, inserting split parts at the front), so keeping
+    ``LOOKAHEAD`` items buffered is enough.
+    """
+
+    def __init__(self, source: Iterator[Any], lookahead: int = LOOKAHEAD):
+        super().__init__()
+        self._source = source
+        self._lookahead = lookahead
+        self._done = False
+
+    def _fill(self, n: int) -> None:
+        while not self._done and list.__len__(self) < n:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._done = True
+
+    def __len__(self) -> int:
+        self._fill(self._lookahead)
+        return list.__len__(self)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._fill(index + 1)
+        elif isinstance(index, slice) and index.stop is not None and index.stop >= 0:
+            self._fill(index.stop)
+        return list.__getitem__(self, index)
+
+
+def _catalog_doc_classes():
+    from reportlab.platypus import BaseDocTemplate, Flowable
+
+    class EntryMarker(Flowable):
+        """Zero-size flowable placed before each entry; records its page."""
+
+        def __init__(self, key: str, label: str, summary: str):
+            super().__init__()
+            self.key = key
+            self.label = label
+            self.summary = summary
+
+        def wrap(self, aw, ah):
+            return 0, 0
+
+        def draw(self):
+            self.canv.bookmarkPage(self.key)
+            self.canv.addOutlineEntry(self.label, self.key, level=0)
+
+    class TocTable(Flowable):
+        """Table of contents built when it is laid out, after every entry."""
+
+        def __init__(self, entries: List[Tuple[str, str, str, int]], build: Callable):
+            super().__init__()
+            self.entries = entries
+            self.build = build
+            self._table = None
+
+        def _get(self):
+            if self._table is None:
+                self._table = self.build(self.entries)
+            return self._table
+
+        def wrap(self, aw, ah):
+            return self._get().wrap(aw, ah)
+
+        def split(self, aw, ah):
+            return self._get().split(aw, ah)
+
+        def drawOn(self, canvas, x, y, _sW=0):
+            return self._get().drawOn(canvas, x, y, _sW)
+
+    class CatalogDoc(BaseDocTemplate):
+        def __init__(self, *args, on_entry: Optional[Callable] = None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.on_entry = on_entry
+
+        def afterFlowable(self, flowable):
+            if isinstance(flowable, EntryMarker) and self.on_entry:
+                self.on_entry(flowable, self.page)
+
+    return EntryMarker, TocTable, CatalogDoc
+
+
+def render_catalog(
+    qs,
+    out,
+    title: str,
+    subtitle: str = "",
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """Writes the catalog PDF of ``qs`` to ``out`` (path or binary file).
+
+    Returns the number of artifacts rendered.
+    """
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.platypus import CondPageBreak, Frame, PageBreak, PageTemplate, Paragraph, Spacer, Table
+    except Exception:
+        raise RenderUnavailable("reportlab yüklü değil.")
+
+    EntryMarker, TocTable, CatalogDoc = _catalog_doc_classes()
+    st = reportlab_styles()
+    total = qs.count()
+    toc: List[Tuple[str, str, str, int]] = []
+
+    def on_entry(marker, page: int) -> None:
+        toc.append((marker.key, marker.label, marker.summary, page))
+        if progress:
+            progress(len(toc), total, page)
+
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        canvas.setFillColor(colors.HexColor("#475569"))
+        canvas.drawString(18 * mm, 10 * mm, title)
+        canvas.drawRightString(A4[0] - 18 * mm, 10 * mm, f"Sayfa {doc.page}")
+        canvas.restoreState()
+
+    def toc_table(entries):
+        header = [Paragraph(f"<b>{h}</b>", st["normal"]) for h in ("Buluntu No", "Özet", "Sayfa")]
+        rows = [header]
+        for key, label, summary, page in entries:
+            rows.append([
+                Paragraph(f'<a href="#{key}">{escape(label)}</a>', st["normal"]),
+                text_cell(summary, st["normal"], 125 * mm),
+                str(page),
+            ])
+        t = Table(rows, colWidths=[40 * mm, 125 * mm, 20 * mm], repeatRows=1)
+        t.setStyle(st["table"])
+        return t
+
+    def story() -> Iterator[Any]:
+        yield Paragraph(escape(title), st["title"])
+        if subtitle:
+            yield Paragraph(escape(subtitle), st["subtitle"])
+        yield Paragraph(f"Toplam buluntu: <b>{total}</b>", st["subtitle"])
+
+        for data in artifacts_data(qs, chunk_size=CATALOG_CHUNK_SIZE):
+            label = data["full_artifact_no"]
+            summary = " · ".join(
+                str(v) for v in (data["form_type"], data["production_material"], data["period"]) if v
+            )
+            yield CondPageBreak(60 * mm)
+            yield EntryMarker(f"a{data['id']}", label, summary)
+            yield Paragraph(escape(label), st["title"])
+            yield from artifact_flowables(data)
+            yield Spacer(1, 12)
+
+        yield PageBreak()
+        yield Paragraph("İçindekiler", st["title"])
+        yield TocTable(toc, toc_table)
+
+    doc = CatalogDoc(
+        out,
+        pagesize=A4,
+        leftMargin=18 * mm,
+        rightMargin=18 * mm,
+        topMargin=16 * mm,
+        bottomMargin=16 * mm,
+        title=title,
+        on_entry=on_entry,
+    )
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="body")
+    doc.addPageTemplates([PageTemplate(id="catalog", frames=[frame], onPage=footer)])
+    doc.build(LazyStory(story()))
+    return len(toc)
@@ -0,0 +1,186 @@
+"""Conditional GET (``ETag`` / ``Last-Modified``) for the model viewsets.
+
+Validators are computed from row timestamps with one small query, before
+anything is serialized:
+
+- detail: the row's ``updated_at`` (and its main code's, for artifacts);
+- list: ``max(updated_at)`` and ``count`` of the filtered queryset, plus a
+  hash of the normalized query string (filters, ordering, page,
+  ``?fields=``). The count is handed to the paginator, so a page costs one
+  aggregate instead of two counts;
+- cursor (keyset) list pages: the page is fetched first (it never counts
+  the table), and the ETag hashes its ids and their timestamps, so edits,
+  inserts and deletes inside the page change it.
+
+A matching ``If-None-Match`` (or, on detail views, ``If-Modified-Since``)
+is answered with 304. Lists only carry an ETag: a delete does not move
+``max(updated_at)``, only the count in the ETag notices it.
+
+Writes that bypass ``Model.save()`` (``QuerySet.update()``) must set
+``updated_at`` themselves for clients to see them.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+from typing import Any, Iterable, Optional
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# Bump when serializer output changes, so cached representations go stale.
+RESPONSE_VERSION = 2
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def normalized_query(qp) -> str:
+    """Query string with sorted keys/values, so equal filters hash equally."""
+    if hasattr(qp, "lists"):
+        items = [(k, v) for k, values in qp.lists() for v in values]
+    else:
+        items = list(qp.items())
+    return urlencode(sorted(items))
+
+
+def make_etag(*parts: Any) -> str:
+    raw = "|".join(str(p) for p in (RESPONSE_VERSION, *parts))
+    return '"%s"' % hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def representation_key(model, renderer_format: str, query_params) -> str:
+    # Same rows can render differently per renderer and query string.
+    return "%s|%s|%s" % (model._meta.label_lower, renderer_format or "", normalized_query(query_params))
+
+
+def validator_aggregates(fields) -> dict:
+    """``aggregate()`` kwargs for a list's count and latest ``fields`` values."""
+    return {"_count": Count("pk"), **{f"_m{i}": Max(f) for i, f in enumerate(fields)}}
+
+
+def unpack_validators(agg: dict, fields):
+    """``(count, last_modified)`` from the result of :func:`validator_aggregates`."""
+    return agg["_count"], latest(agg[f"_m{i}"] for i in range(len(fields)))
+
+
+def list_etag(key: str, count: int, last_modified: Optional[datetime.datetime]) -> str:
+    return make_etag("list", key, count, last_modified.isoformat() if last_modified else "")
+
+
+def page_etag(key: str, rows, has_next: bool, has_previous: bool) -> str:
+    """ETag of a cursor page from its ``(pk, *timestamps)`` rows."""
+    parts = ",".join("/".join(v.isoformat() if hasattr(v, "isoformat") else str(v) for v in row) for row in rows)
+    return make_etag("page", key, has_next, has_previous, parts)
+
+
+def detail_etag(key: str, row) -> str:
+    return make_etag("detail", key, *(v.isoformat() if v else "" for v in row))
+
+
+def latest(values: Iterable[Optional[datetime.datetime]]) -> Optional[datetime.datetime]:
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def not_modified(request, etag: str, last_modified: Optional[datetime.datetime] = None):
+    """304 response when the request's validators match, else None."""
+    ts = int(last_modified.timestamp()) if last_modified else None
+    resp = get_conditional_response(request, etag=etag, last_modified=ts)
+    if resp is not None:
+        set_validators(resp, etag, last_modified)
+    return resp
+
+
+def set_validators(resp, etag: str, last_modified: Optional[datetime.datetime] = None):
+    resp["ETag"] = etag
+    if last_modified:
+        resp["Last-Modified"] = http_date(last_modified.timestamp())
+    resp["Cache-Control"] = CACHE_CONTROL
+    return resp
+
+
+class ConditionalGetMixin:
+    """``list``/``retrieve`` that answer revalidations without serializing.
+
+    ``validator_fields`` are the timestamps a row's representation depends
+    on (its own ``updated_at``, joined rows' ``updated_at``).
+    """
+
+    validator_fields = ("updated_at",)
+
+    def representation_key(self, request) -> str:
+        renderer = getattr(request, "accepted_renderer", None)
+        return representation_key(self.queryset.model, getattr(renderer, "format", ""), request.query_params)
+
+    def list_validators(self, queryset):
+        agg = queryset.order_by().aggregate(**validator_aggregates(self.validator_fields))
+        return unpack_validators(agg, self.validator_fields)
+
+    def uses_keyset(self, request) -> bool:
+        use_keyset = getattr(self.paginator, "use_keyset", None)
+        return bool(use_keyset and use_keyset(request))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.uses_keyset(request):
+            return self.keyset_list(request, queryset)
+        count, last_modified = self.list_validators(queryset)
+        etag = list_etag(self.representation_key(request), count, last_modified)
+        resp = not_modified(request, etag)
+        if resp is not None:
+            return resp
+        if hasattr(self.paginator, "known_count"):
+            self.paginator.known_count = count
+        resp = super().list(request, *args, **kwargs)
+        if resp.status_code == 200:
+            set_validators(resp, etag)
+        return resp
+
+    def keyset_list(self, request, queryset):
+        page = self.paginate_queryset(queryset)
+        rows = dict(
+            (row[0], row[1:])
+            for row in queryset.model._default_manager.filter(pk__in=[obj.pk for obj in page])
+            .order_by()
+            .values_list("pk", *self.validator_fields)
+        )
+        etag = page_etag(
+            self.representation_key(request),
+            [(obj.pk, *rows.get(obj.pk, ())) for obj in page],
+            self.paginator.get_next_link() is not None,
+            self.paginator.get_previous_link() is not None,
+        )
+        resp = not_modified(request, etag)
+        if resp is not None:
+            return resp
+        resp = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return set_validators(resp, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = (
+                queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .order_by()
+                .values_list(*self.validator_fields)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            # Let the regular path produce the 404.
+            return super().retrieve(request, *args, **kwargs)
+
+        last_modified = latest(row)
+        etag = detail_etag(self.representation_key(request), row)
+        resp = not_modified(request, etag, last_modified)
+        if resp is not None:
+            return resp
+        resp = super().retrieve(request, *args, **kwargs)
+        if resp.status_code == 200:
+            set_validators(resp, etag, last_modified)
+        return resp
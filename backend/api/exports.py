@@ -0,0 +1,256 @@
+"""Collection-level artifact exports streamed row by row.
+
+The single-artifact export in ``ArtifactViewSet.export`` renders one record
+into memory; the helpers here walk a (filtered) queryset with a server-side
+cursor and hand the client a file as it is being produced, so memory stays
+flat regardless of how many rows match. The ``a``-prefixed variants do the
+same for the ASGI views (:mod:`api.async_views`).
+"""
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import os
+import tempfile
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .artifact_rows import TABULAR_FIELDS, Row, artifact_rows, full_artifact_no, iso_date, iso_datetime
+from .metrics import atimed_chunks, timed_chunks
+
+# Rows fetched per round trip from the server-side cursor.
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows encoded per hand-off to the event loop in the async export stream.
+ASYNC_BLOCK_ROWS = 500
+
+# File chunk size used when streaming a finished temp file (xlsx).
+FILE_CHUNK_SIZE = 64 * 1024
+
+BULK_EXPORT_COLUMNS: List[str] = [
+    "id",
+    "full_artifact_no",
+    "main_code",
+    "main_code_finding_place",
+    "artifact_no",
+    "artifact_date",
+    "form_type",
+    "production_material",
+    "period",
+    "finding_shape",
+    "level",
+    "excavation_inv_no",
+    "museum_inv_no",
+    "piece_date",
+    "notes",
+    "source_and_reference",
+    "is_active",
+    "is_inventory",
+    "details",
+    "measurements",
+    "created_at",
+    "updated_at",
+]
+
+BULK_EXPORT_FORMATS = ("csv", "ndjson", "xlsx")
+
+
+def artifact_export_row(row: Row, tz=None) -> Dict[str, Any]:
+    """Plain dict for one :func:`artifact_rows` row; JSON columns are kept as python objects."""
+    tz = tz or timezone.get_current_timezone()
+    return {
+        "id": row["id"],
+        "full_artifact_no": full_artifact_no(row["main_code__code"], row["artifact_no"]),
+        "main_code": row["main_code__code"],
+        "main_code_finding_place": row["main_code__finding_place"],
+        "artifact_no": row["artifact_no"],
+        "artifact_date": iso_date(row["artifact_date"]),
+        "form_type": row["form_type"],
+        "production_material": row["production_material"],
+        "period": row["period"],
+        "finding_shape": row["finding_shape"],
+        "level": row["level"],
+        "excavation_inv_no": row["excavation_inv_no"],
+        "museum_inv_no": row["museum_inv_no"],
+        "piece_date": row["piece_date"],
+        "notes": row["notes"],
+        "source_and_reference": row["source_and_reference"],
+        "is_active": row["is_active"],
+        "is_inventory": row["is_inventory"],
+        "details": row["details"] or {},
+        "measurements": row["measurements"] or {},
+        "created_at": iso_datetime(row["created_at"], tz),
+        "updated_at": iso_datetime(row["updated_at"], tz),
+    }
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False) if value else ""
+    return str(value)
+
+
+def iter_export_rows(qs) -> Iterator[Dict[str, Any]]:
+    # .values() rows: no model instances, and the media columns are never fetched
+    tz = timezone.get_current_timezone()
+    for row in artifact_rows(qs, TABULAR_FIELDS, EXPORT_CHUNK_SIZE):
+        yield artifact_export_row(row, tz)
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value instead of storing it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+LineEncoder = Tuple[bytes, Callable[[Dict[str, Any]], bytes]]  # (header, row -> line)
+
+
+def csv_encoder() -> LineEncoder:
+    writer = csv.writer(_Echo())
+    # excel-friendly BOM, like the single artifact export
+    header = "\ufeff".encode("utf-8") + writer.writerow(BULK_EXPORT_COLUMNS).encode("utf-8")
+    return header, lambda row: writer.writerow([_cell(row.get(c)) for c in BULK_EXPORT_COLUMNS]).encode("utf-8")
+
+
+def ndjson_encoder() -> LineEncoder:
+    return b"", lambda row: (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def stream_lines(rows: Iterable[Dict[str, Any]], encoder: LineEncoder) -> Iterator[bytes]:
+    header, line = encoder
+    if header:
+        yield header
+    for row in rows:
+        yield line(row)
+
+
+async def astream_lines(qs, encoder: LineEncoder) -> AsyncIterator[bytes]:
+    """:func:`stream_lines` over ``qs`` for the async views.
+
+    Like ``QuerySet.aiterator()``, the server-side cursor is read in the
+    request's sync thread; rows are also built and encoded there,
+    ``ASYNC_BLOCK_ROWS`` at a time, so the event loop only hands finished
+    blocks to the client and a stalled client stops the cursor.
+    """
+    header, line = encoder
+    rows = iter_export_rows(qs)
+
+    def next_block() -> bytes:
+        return b"".join(line(row) for row in itertools.islice(rows, ASYNC_BLOCK_ROWS))
+
+    try:
+        if header:
+            yield header
+        while True:
+            block = await sync_to_async(next_block)()
+            if not block:
+                break
+            yield block
+    finally:
+        # closes the cursor on its own connection, also after a disconnect
+        await sync_to_async(rows.close)()
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    return stream_lines(rows, csv_encoder())
+
+
+def stream_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    return stream_lines(rows, ndjson_encoder())
+
+
+def write_xlsx(rows: Iterable[Dict[str, Any]]) -> str:
+    """Path of a temp ``.xlsx`` holding ``rows``; the caller removes it.
+
+    openpyxl's write-only mode flushes rows to disk as they come, so memory
+    stays flat.
+    """
+    from openpyxl import Workbook
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Artifacts")
+        ws.append(BULK_EXPORT_COLUMNS)
+        for row in rows:
+            ws.append([_cell(row.get(c)) for c in BULK_EXPORT_COLUMNS])
+        wb.save(path)
+    except BaseException:
+        remove_quietly(path)
+        raise
+    return path
+
+
+def remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_xlsx(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Workbook spooled to a temp file, then streamed in chunks.
+
+    The zip container can only be finalized once every row is written, so the
+    first byte arrives after the last row is read.
+    """
+    path = write_xlsx(rows)
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        remove_quietly(path)
+
+
+BULK_EXPORT_TYPES = {
+    "csv": ("text/csv; charset=utf-8", stream_csv),
+    "ndjson": ("application/x-ndjson; charset=utf-8", stream_ndjson),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", stream_xlsx),
+}
+
+
+def bulk_export_stream(qs, fmt: str) -> Tuple[Iterator[bytes], str]:
+    """``(byte chunks, content type)`` of ``qs`` exported as ``fmt``."""
+    if fmt not in BULK_EXPORT_TYPES:
+        raise ValueError(fmt)
+    content_type, stream = BULK_EXPORT_TYPES[fmt]
+    return timed_chunks(stream(iter_export_rows(qs)), "bulk", fmt), content_type
+
+
+# Formats written line by line; the async path streams these from the async ORM.
+LINE_ENCODERS = {"csv": csv_encoder, "ndjson": ndjson_encoder}
+
+
+def abulk_export_stream(qs, fmt: str) -> Tuple[AsyncIterator[bytes], str]:
+    """Async :func:`bulk_export_stream` for the line formats (csv | ndjson)."""
+    if fmt not in LINE_ENCODERS:
+        raise ValueError(fmt)
+    content_type = BULK_EXPORT_TYPES[fmt][0]
+    chunks = astream_lines(qs, LINE_ENCODERS[fmt]())
+    return atimed_chunks(chunks, "bulk", fmt), content_type
+
+
+def attachment_response(chunks, content_type: str, filename: str) -> StreamingHttpResponse:
+    """Streamed download of ``chunks`` (a sync or async iterable)."""
+    resp = StreamingHttpResponse(chunks, content_type=content_type)
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def bulk_export_response(qs, fmt: str, filename_base: str) -> StreamingHttpResponse:
+    """Streaming response for ``fmt`` (csv | ndjson | xlsx) over ``qs``."""
+    chunks, content_type = bulk_export_stream(qs, fmt)
+    return attachment_response(chunks, content_type, f"{filename_base}.{fmt}")
@@ -0,0 +1,221 @@
+"""Query-parameter filters for the artifact and main-code lists.
+
+They take any mapping with ``.get`` (request query params, or the params
+stored on a background export job), so the list endpoints, the bulk export
+and the export worker all filter the same way.
+"""
+from __future__ import annotations
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from django.db.models import Q
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual
+
+from core.models import json_number
+from .search import code_contains, folded_contains, search_artifacts, search_main_codes
+
+
+# Query params that narrow the artifact list (everything but ordering/paging).
+ARTIFACT_FILTER_PARAMS = (
+    "main_code",
+    "form_type",
+    "main_code_code",
+    "finding_place",
+    "artifact_no",
+    "production_material",
+    "period",
+    "date_from",
+    "date_to",
+    "q",
+)
+
+
+# ?details.<key>[__<op>]=<value> / ?measurements.<key>[__<op>]=<value>
+JSON_FILTER_FIELDS = ("details", "measurements")
+JSON_FILTER_LOOKUPS = ("exact", "in", "icontains", "gt", "gte", "lt", "lte", "exists")
+JSON_RANGE_LOOKUPS = {
+    "gt": GreaterThan,
+    "gte": GreaterThanOrEqual,
+    "lt": LessThan,
+    "lte": LessThanOrEqual,
+}
+_JSON_KEY_RE = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+
+def parse_json_param(name: str) -> Optional[Tuple[str, List[str], str]]:
+    """``"measurements.height__gte"`` -> ``("measurements", ["height"], "gte")``."""
+    field, dot, rest = name.partition(".")
+    if not dot or field not in JSON_FILTER_FIELDS:
+        return None
+    key, sep, lookup = rest.rpartition("__")
+    if not sep or lookup not in JSON_FILTER_LOOKUPS:
+        key, lookup = rest, "exact"
+    if not _JSON_KEY_RE.match(key):
+        return None
+    return field, key.split("."), lookup
+
+
+def _json_scalar(value: str) -> List[Any]:
+    """Stored forms of a query value: the string, and the number if it is one."""
+    forms: List[Any] = [value]
+    try:
+        number = Decimal(value.replace(",", "."))
+    except InvalidOperation:
+        return forms
+    if number.is_finite():
+        forms.append(int(number) if number == number.to_integral_value() else float(number))
+    return forms
+
+
+def _nested(path: List[str], value: Any) -> Dict[str, Any]:
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def json_filter(field: str, path: List[str], lookup: str, value: str) -> Optional[Q]:
+    """Q object for one JSON filter; None when ``value`` does not fit the lookup.
+
+    Equality uses containment (``@>``, GIN ``jsonb_path_ops`` index); ranges
+    compare ``core_json_number(...)``, which the keys in
+    ``INDEXED_JSON_NUMBERS`` have expression indexes for.
+    """
+    if lookup in ("exact", "in"):
+        # "|" separates __in values: "," is the decimal mark in "12,5"
+        values = value.split("|") if lookup == "in" else [value]
+        q = Q()
+        for v in values:
+            for form in _json_scalar(v.strip()):
+                q |= Q(**{f"{field}__contains": _nested(path, form)})
+        return q
+    if lookup == "exists":
+        has = Q(**{"__".join([field, *path[:-1], "has_key"]): path[-1]})
+        return ~has if value.lower() in ("0", "false", "no") else has
+    if lookup == "icontains":
+        return Q(**{"__".join([field, *path, "icontains"]): value})
+    try:
+        number = Decimal(value.replace(",", "."))
+    except InvalidOperation:
+        return None
+    if not number.is_finite():
+        return None
+    return Q(JSON_RANGE_LOOKUPS[lookup](json_number(field, *path), number))
+
+
+def json_filter_params(qp: Mapping[str, Any]) -> List[Tuple[str, List[str], str, str]]:
+    params = []
+    for name in qp.keys():
+        parsed = parse_json_param(name)
+        value = (qp.get(name) or "").strip()
+        if parsed and value:
+            params.append((*parsed, value))
+    return params
+
+
+def filter_json_fields(qs, qp: Mapping[str, Any]):
+    for field, path, lookup, value in json_filter_params(qp):
+        q = json_filter(field, path, lookup, value)
+        if q is not None:
+            qs = qs.filter(q)
+    return qs
+
+
+def has_artifact_filters(qp: Mapping[str, Any]) -> bool:
+    if any((qp.get(name) or "").strip() for name in ARTIFACT_FILTER_PARAMS):
+        return True
+    return bool(json_filter_params(qp))
+
+
+def filter_main_codes(qs, qp: Mapping[str, Any]):
+    code = qp.get("code")
+    if code:
+        qs = qs.filter(code_contains("code", code))
+
+    finding_place = qp.get("finding_place")
+    if finding_place:
+        qs = qs.filter(folded_contains("finding_place", finding_place))
+
+    # General q (full-text, ranked)
+    q = (qp.get("q") or "").strip()
+    if q:
+        qs = search_main_codes(qs, q)
+
+    ordering = qp.get("ordering")
+    allowed = {"created_at", "-created_at", "code", "-code"}
+    if ordering in allowed:
+        qs = qs.order_by(ordering)
+    elif q and "search_rank" in qs.query.annotations:
+        qs = qs.order_by("-search_rank", "-created_at")
+    return qs
+
+
+def filter_artifacts(qs, qp: Mapping[str, Any]):
+    # Exact filters
+    main_code = qp.get("main_code")
+    if main_code:
+        qs = qs.filter(main_code_id=main_code)
+
+    form_type = qp.get("form_type")
+    if form_type:
+        qs = qs.filter(form_type=form_type)
+
+    # Text-ish filters
+    main_code_code = qp.get("main_code_code")
+    if main_code_code:
+        qs = qs.filter(code_contains("main_code__code", main_code_code))
+
+    finding_place = qp.get("finding_place")
+    if finding_place:
+        qs = qs.filter(folded_contains("main_code__finding_place", finding_place))
+
+    artifact_no = qp.get("artifact_no")
+    if artifact_no:
+        try:
+            qs = qs.filter(artifact_no=int(artifact_no))
+        except ValueError:
+            pass
+
+    production_material = qp.get("production_material")
+    if production_material:
+        qs = qs.filter(folded_contains("production_material", production_material))
+
+    period = qp.get("period")
+    if period:
+        qs = qs.filter(folded_contains("period", period))
+
+    # Date range
+    date_from = qp.get("date_from")
+    if date_from:
+        qs = qs.filter(artifact_date__gte=date_from)
+
+    date_to = qp.get("date_to")
+    if date_to:
+        qs = qs.filter(artifact_date__lte=date_to)
+
+    # Form-specific JSON keys (?details.diameter__gte=20)
+    qs = filter_json_fields(qs, qp)
+
+    # General q (full-text, ranked)
+    q = (qp.get("q") or "").strip()
+    if q:
+        qs = search_artifacts(qs, q)
+
+    # Ordering (whitelist)
+    ordering = qp.get("ordering")
+    allowed = {
+        "created_at",
+        "-created_at",
+        "artifact_date",
+        "-artifact_date",
+        "artifact_no",
+        "-artifact_no",
+        "main_code__code",
+        "-main_code__code",
+    }
+    if ordering in allowed:
+        qs = qs.order_by(ordering)
+    elif q and "search_rank" in qs.query.annotations:
+        qs = qs.order_by("-search_rank", "-created_at")
+    return qs
@@ -0,0 +1,353 @@
+"""Batch artifact import from an uploaded CSV or XLSX file.
+
+Rows are parsed one by one while the file is streamed, but every database
+check is done for the whole batch at once: main-code strings are resolved in
+one query, ``(main_code, artifact_no)`` uniqueness is checked against one set
+query, and valid rows are inserted with ``bulk_create`` in chunks inside a
+single transaction. Any row error rejects the whole file. Rows with an empty
+``artifact_no`` are numbered from their main code's ``ArtifactNumberSequence``
+right before the insert.
+
+Column names follow the bulk export (``main_code``, ``artifact_no`` ...), so an
+exported file can be edited and imported again. ``details`` /
+``measurements`` may be given as a JSON object column or as
+``details.<key>`` / ``measurements.<key>`` columns.
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import IntegrityError, transaction
+
+from core.facets import record_created
+from core.models import ARTIFACT_NO_MAX, Artifact, ArtifactNumberSequence, MainCode
+from .response_cache import ARTIFACTS_TAG, artifacts_tag, bump_tags
+
+IMPORT_BATCH_SIZE = 1000
+
+# Only the first errors are returned; a broken 50k-row file should not produce
+# a 50k-entry response.
+MAX_REPORTED_ERRORS = 500
+
+TEXT_FIELDS = (
+    "production_material",
+    "period",
+    "finding_shape",
+    "level",
+    "excavation_inv_no",
+    "museum_inv_no",
+    "piece_date",
+    "notes",
+    "source_and_reference",
+)
+JSON_FIELDS = ("details", "measurements")
+
+FORM_TYPE_VALUES = {key for key, _ in Artifact.FORM_TYPES}
+
+_TRUE = {"1", "true", "evet", "e", "yes", "y", "x"}
+_FALSE = {"0", "false", "hayır", "hayir", "h", "no", "n"}
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y")
+
+
+class ImportFileError(ValueError):
+    """The upload can not be read as a table at all."""
+
+
+# -- reading ------------------------------------------------------------------
+
+
+def _norm_header(h: Any) -> str:
+    return str(h or "").strip().lower()
+
+
+def _iter_csv(upload) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if not header:
+            raise ImportFileError("Dosya boş.")
+        keys = [_norm_header(h) for h in header]
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            yield dict(zip(keys, values))
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV dosyası UTF-8 olmalıdır.")
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(upload) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except Exception:
+        raise ImportFileError("openpyxl yüklü değil.")
+
+    try:
+        wb = load_workbook(upload.file, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError("XLSX dosyası okunamadı.")
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise ImportFileError("Dosya boş.")
+        keys = [_norm_header(h) for h in header]
+        for values in rows:
+            if all(v is None or str(v).strip() == "" for v in values):
+                continue
+            yield dict(zip(keys, values))
+    finally:
+        wb.close()
+
+
+def iter_upload_rows(upload) -> Iterator[Dict[str, Any]]:
+    """Yields one ``{column: value}`` dict per non-empty row."""
+    name = (getattr(upload, "name", "") or "").lower()
+    if name.endswith(".xlsx"):
+        return _iter_xlsx(upload)
+    if name.endswith(".csv") or name.endswith(".txt"):
+        return _iter_csv(upload)
+    raise ImportFileError("Desteklenmeyen dosya türü. csv | xlsx")
+
+
+# -- row parsing --------------------------------------------------------------
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
+def _parse_date(value: Any) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("Geçersiz tarih (YYYY-AA-GG veya GG.AA.YYYY).")
+
+
+def _parse_int(value: Any) -> int:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    try:
+        n = int(str(value).strip())
+    except ValueError:
+        raise ValueError("Sayı olmalıdır.")
+    if n < 1:
+        raise ValueError("Pozitif bir sayı olmalıdır.")
+    if n > ARTIFACT_NO_MAX:
+        raise ValueError(f"En fazla {ARTIFACT_NO_MAX} olabilir.")
+    return n
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError("Evet/Hayır değeri bekleniyor.")
+
+
+def _max_length(field: str) -> Optional[int]:
+    return Artifact._meta.get_field(field).max_length
+
+
+_MAX_LENGTHS = {f: _max_length(f) for f in TEXT_FIELDS}
+
+
+def parse_row(raw: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """Converts a raw spreadsheet row into model field values.
+
+    Returns ``(values, errors)``; ``values["main_code"]`` is still the code
+    string, resolved to an id for the whole batch later on.
+    """
+    values: Dict[str, Any] = {}
+    errors: Dict[str, List[str]] = {}
+
+    def err(field: str, msg: str) -> None:
+        errors.setdefault(field, []).append(msg)
+
+    code = raw.get("main_code")
+    if _blank(code):
+        err("main_code", "Bu alan zorunlu.")
+    else:
+        values["main_code"] = str(code).strip().upper()
+
+    no = raw.get("artifact_no")
+    if _blank(no):
+        values["artifact_no"] = None  # numbered at insert time
+    else:
+        try:
+            values["artifact_no"] = _parse_int(no)
+        except ValueError as exc:
+            err("artifact_no", str(exc))
+
+    date = raw.get("artifact_date")
+    if _blank(date):
+        err("artifact_date", "Bu alan zorunlu.")
+    else:
+        try:
+            values["artifact_date"] = _parse_date(date)
+        except ValueError as exc:
+            err("artifact_date", str(exc))
+
+    form_type = raw.get("form_type")
+    if _blank(form_type):
+        values["form_type"] = "GENEL"
+    else:
+        form_type = str(form_type).strip().upper()
+        if form_type in FORM_TYPE_VALUES:
+            values["form_type"] = form_type
+        else:
+            err("form_type", f"Geçersiz form tipi. {' | '.join(sorted(FORM_TYPE_VALUES))}")
+
+    for field in TEXT_FIELDS:
+        value = raw.get(field)
+        if _blank(value):
+            continue
+        text = str(value).strip()
+        limit = _MAX_LENGTHS[field]
+        if limit and len(text) > limit:
+            err(field, f"En fazla {limit} karakter olabilir.")
+            continue
+        values[field] = text
+
+    for field, default in (("is_active", True), ("is_inventory", False)):
+        value = raw.get(field)
+        if _blank(value):
+            values[field] = default
+            continue
+        try:
+            values[field] = _parse_bool(value)
+        except ValueError as exc:
+            err(field, str(exc))
+
+    for field in JSON_FIELDS:
+        obj: Dict[str, Any] = {}
+        value = raw.get(field)
+        if not _blank(value):
+            try:
+                parsed = value if isinstance(value, dict) else json.loads(str(value))
+            except ValueError:
+                err(field, "Geçerli bir JSON nesnesi olmalıdır.")
+                parsed = {}
+            if not isinstance(parsed, dict):
+                err(field, "Geçerli bir JSON nesnesi olmalıdır.")
+                parsed = {}
+            obj.update(parsed)
+
+        prefix = f"{field}."
+        for key, v in raw.items():
+            if key.startswith(prefix) and not _blank(v):
+                obj[key[len(prefix):]] = v if not isinstance(v, str) else v.strip()
+        values[field] = obj
+
+    return values, errors
+
+
+# -- import -------------------------------------------------------------------
+
+
+def import_artifacts(rows: Iterable[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+    """Validates and inserts ``rows``; see the module docstring.
+
+    Returns ``{"created": n, "rows": total, "errors": [...], "dry_run": bool}``.
+    Nothing is written when any row has errors.
+    """
+    parsed: List[Tuple[int, Dict[str, Any]]] = []
+    errors: List[Dict[str, Any]] = []
+    error_count = 0
+
+    def add_error(row_no: int, row_errors: Dict[str, List[str]]) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "errors": row_errors})
+
+    # Row numbers are spreadsheet rows: header is row 1.
+    total = 0
+    for row_no, raw in enumerate(rows, start=2):
+        total += 1
+        values, row_errors = parse_row(raw)
+        if row_errors:
+            add_error(row_no, row_errors)
+        else:
+            parsed.append((row_no, values))
+
+    codes = {values["main_code"] for _, values in parsed}
+    code_ids: Dict[str, int] = dict(MainCode.objects.filter(code__in=codes).values_list("code", "id"))
+
+    # Every taken number of the involved main codes, in one index-only scan.
+    taken: Set[Tuple[int, int]] = set(
+        Artifact.objects.filter(main_code_id__in=code_ids.values()).values_list("main_code_id", "artifact_no")
+    )
+
+    objs: List[Artifact] = []
+    for row_no, values in parsed:
+        code = values.pop("main_code")
+        main_code_id = code_ids.get(code)
+        if main_code_id is None:
+            add_error(row_no, {"main_code": [f"Anakod bulunamadı: {code}"]})
+            continue
+        key = (main_code_id, values["artifact_no"])
+        if values["artifact_no"] is None:
+            objs.append(Artifact(main_code_id=main_code_id, **values))
+            continue
+        if key in taken:
+            add_error(row_no, {"artifact_no": [f"{code}{values['artifact_no']:04d} zaten mevcut."]})
+            continue
+        taken.add(key)
+        objs.append(Artifact(main_code_id=main_code_id, **values))
+
+    errors.sort(key=lambda e: e["row"])
+    result: Dict[str, Any] = {
+        "rows": total,
+        "created": 0,
+        "error_count": error_count,
+        "errors": errors,
+        "dry_run": dry_run,
+    }
+    if error_count or dry_run:
+        return result
+
+    try:
+        with transaction.atomic():
+            missing: Dict[int, int] = {}
+            explicit: Dict[int, int] = {}
+            for obj in objs:
+                mc = obj.main_code_id
+                if obj.artifact_no is None:
+                    missing[mc] = missing.get(mc, 0) + 1
+                else:
+                    explicit[mc] = max(obj.artifact_no, explicit.get(mc, 0))
+            allocated = ArtifactNumberSequence.allocate(missing, observed=explicit)
+            for obj in objs:
+                if obj.artifact_no is None:
+                    obj.artifact_no = allocated[obj.main_code_id].pop(0)
+            Artifact.objects.bulk_create(objs, batch_size=IMPORT_BATCH_SIZE)
+            record_created(objs)
+            # bulk_create sends no post_save signals
+            bump_tags(ARTIFACTS_TAG, *{artifacts_tag(obj.main_code_id) for obj in objs})
+    except IntegrityError:
+        # Someone inserted one of these numbers after the set check above.
+        result["error_count"] = 1
+        result["errors"] = [{"row": None, "errors": {"artifact_no": ["Eşzamanlı kayıt çakışması, tekrar deneyin."]}}]
+        return result
+
+    result["created"] = len(objs)
+    return result
@@ -0,0 +1,323 @@
+"""Background export jobs.
+
+Heavy exports (PDF/XLSX of one artifact, bulk exports and catalog PDFs of a
+filtered list) are stored as :class:`core.models.ExportJob` rows and rendered by the
+``run_export_worker`` management command, so gunicorn workers only enqueue
+and serve finished files.
+
+The job row is the source of truth; the queue backend only decides how a
+worker hears about new work (``EXPORT_QUEUE_BACKEND``):
+
+- ``redis``: job ids are pushed to a Redis list and workers block on it.
+  Workers still sweep the table when idle, so a failed push only delays a job.
+- ``db``: workers poll the table; needs nothing besides PostgreSQL.
+- ``inline``: the job runs in the enqueuing process (tests, offline work).
+
+Workers claim a job with a conditional update (queued -> running), so each job
+runs once even if its id is delivered twice.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import Artifact, ExportJob
+from .catalog import render_catalog
+from .exports import bulk_export_stream, remove_quietly
+from .filters import filter_artifacts
+from .metrics import observe_export
+from .render_cache import get_render_cache, render_key
+
+logger = logging.getLogger(__name__)
+
+EXPORT_QUEUE_KEY = "arkeoloji:export-jobs"
+
+# Seconds a Redis worker blocks before sweeping the table / a db worker sleeps.
+POLL_INTERVAL = 5
+
+
+def get_queue_backend() -> str:
+    if settings.EXPORT_QUEUE_BACKEND:
+        return settings.EXPORT_QUEUE_BACKEND
+    return "redis" if settings.REDIS_URL else "db"
+
+
+def _redis():
+    import redis  # optional; only needed for the redis backend
+
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def enqueue(job: ExportJob) -> ExportJob:
+    """Hands a saved, queued job to the configured backend."""
+    backend = get_queue_backend()
+    if backend == "inline":
+        claimed = claim(job.pk)
+        if claimed is not None:
+            run_job(claimed)
+        job.refresh_from_db()
+        return job
+    if backend == "redis":
+        try:
+            _redis().lpush(EXPORT_QUEUE_KEY, str(job.pk))
+        except Exception:
+            logger.warning("export job %s not pushed to redis; left for the table sweep", job.pk, exc_info=True)
+    return job
+
+
+def claim(job_id=None) -> Optional[ExportJob]:
+    """Marks a queued job as running and returns it; None if there is none.
+
+    Without ``job_id`` the oldest queued job is taken, skipping rows another
+    worker is claiming at the same moment.
+    """
+    now = timezone.now()
+    if job_id is not None:
+        updated = ExportJob.objects.filter(pk=job_id, status=ExportJob.QUEUED).update(
+            status=ExportJob.RUNNING, started_at=now
+        )
+        return ExportJob.objects.get(pk=job_id) if updated else None
+
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ExportJob.QUEUED)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ExportJob.RUNNING
+        job.started_at = now
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+# -- rendering ----------------------------------------------------------------
+
+
+def result_path(job: ExportJob, ext: str) -> Path:
+    return Path(settings.EXPORT_JOB_ROOT) / f"{job.pk}.{ext}"
+
+
+def _write_atomic(path: Path, chunks: Iterable[bytes]) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".job-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return size
+
+
+def _render_artifact(job: ExportJob) -> None:
+    # Imported here: the viewsets module imports this one.
+    from .viewsets import ARTIFACT_EXPORT_FORMATS, render_artifact_export
+
+    artifact = Artifact.objects.select_related("main_code").get(pk=job.params["artifact_id"])
+    content_type, ext = ARTIFACT_EXPORT_FORMATS[job.format]
+
+    # Share renders with the synchronous export endpoint.
+    cache = get_render_cache()
+    key = render_key(artifact, job.format)
+    cached = cache.get(artifact.pk, key, ext)
+    if cached is not None:
+        with cached:
+            data = cached.read()
+    else:
+        data = render_artifact_export(artifact, job.format, job.params.get("base_url") or "")
+        cache.put(artifact.pk, key, ext, data)
+
+    path = result_path(job, ext)
+    job.size = _write_atomic(path, [data])
+    job.result_path = str(path)
+    job.result_name = f"{artifact.full_artifact_no}.{ext}"
+    job.content_type = content_type
+
+
+def _render_bulk(job: ExportJob) -> None:
+    qs = Artifact.objects.select_related("main_code").order_by("-created_at")
+    qs = filter_artifacts(qs, job.params)
+    chunks, content_type = bulk_export_stream(qs, job.format)
+
+    path = result_path(job, job.format)
+    job.size = _write_atomic(path, chunks)
+    job.result_path = str(path)
+    job.result_name = f"buluntular-{timezone.localtime(job.created_at):%Y%m%d-%H%M}.{job.format}"
+    job.content_type = content_type
+
+
+def _render_catalog(job: ExportJob) -> None:
+    qs = Artifact.objects.order_by("main_code__code", "artifact_no")
+    qs = filter_artifacts(qs, job.params)
+
+    last = {"percent": -1, "at": 0.0}
+
+    def progress(done: int, total: int, page: int) -> None:
+        percent = int(done * 100 / total) if total else 100
+        now = time.monotonic()
+        if percent != last["percent"] and now - last["at"] >= 1:
+            ExportJob.objects.filter(pk=job.pk).update(progress=percent)
+            last.update(percent=percent, at=now)
+
+    path = result_path(job, "pdf")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".job-")
+    os.close(fd)
+    try:
+        with observe_export("catalog", "pdf"):
+            render_catalog(
+                qs,
+                tmp_path,
+                title=job.params.get("title") or "Buluntu Kataloğu",
+                subtitle=job.params.get("subtitle") or "",
+                progress=progress,
+            )
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+    job.size = path.stat().st_size
+    job.result_path = str(path)
+    job.result_name = f"katalog-{timezone.localtime(job.created_at):%Y%m%d-%H%M}.pdf"
+    job.content_type = "application/pdf"
+
+
+RENDERERS = {
+    ExportJob.KIND_ARTIFACT: _render_artifact,
+    ExportJob.KIND_BULK: _render_bulk,
+    ExportJob.KIND_CATALOG: _render_catalog,
+}
+
+
+RESULT_FIELDS = (
+    "status", "progress", "error", "result_path", "result_name", "content_type", "size", "finished_at",
+)
+
+
+def run_job(job: ExportJob) -> ExportJob:
+    """Renders a claimed job and records the outcome on its row.
+
+    The row is only written while it is still ``running``: a job that
+    :func:`cleanup_jobs` failed for taking too long, or that was deleted
+    meanwhile, keeps its state and the late result file is removed.
+    """
+    try:
+        RENDERERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("export job %s failed", job.pk)
+        job.status = ExportJob.FAILED
+        job.error = str(exc)[:2000] or exc.__class__.__name__
+    else:
+        job.status = ExportJob.DONE
+        job.progress = 100
+    job.finished_at = timezone.now()
+    updated = ExportJob.objects.filter(pk=job.pk, status=ExportJob.RUNNING).update(
+        **{f: getattr(job, f) for f in RESULT_FIELDS}
+    )
+    if not updated:
+        logger.warning("export job %s is no longer running; result dropped", job.pk)
+        if job.result_path:
+            remove_quietly(job.result_path)
+        job = ExportJob.objects.filter(pk=job.pk).first() or job
+    return job
+
+
+# -- housekeeping -------------------------------------------------------------
+
+
+def cleanup_jobs() -> None:
+    """Deletes expired jobs with their files; fails jobs stuck in ``running``."""
+    now = timezone.now()
+    expired = ExportJob.objects.filter(
+        finished_at__lt=now - datetime.timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+    )
+    for path in expired.exclude(result_path="").values_list("result_path", flat=True):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    expired.delete()
+
+    ExportJob.objects.filter(
+        status=ExportJob.RUNNING,
+        started_at__lt=now - datetime.timedelta(seconds=settings.EXPORT_JOB_TIMEOUT),
+    ).update(status=ExportJob.FAILED, error="Zaman aşımı.", finished_at=now)
+
+
+def _claim_queued(item) -> Optional[ExportJob]:
+    """Claims the job named by a Redis queue item; None for a malformed item."""
+    try:
+        return claim(item[1].decode("ascii"))
+    except (UnicodeDecodeError, ValidationError):
+        logger.warning("malformed export queue item %r dropped", item[1])
+        return None
+
+
+def run_worker(once: bool = False) -> None:
+    """Worker loop used by ``manage.py run_export_worker``.
+
+    The database connection is recycled around every job like a request's;
+    a lost connection is logged and retried after ``POLL_INTERVAL`` instead
+    of ending the worker.
+    """
+    backend = get_queue_backend()
+    client = _redis() if backend == "redis" else None
+    last_cleanup = 0.0
+
+    while True:
+        close_old_connections()
+        try:
+            if time.monotonic() - last_cleanup > 600:
+                cleanup_jobs()
+                last_cleanup = time.monotonic()
+
+            job = None
+            if client is not None:
+                try:
+                    item = client.brpop(EXPORT_QUEUE_KEY, timeout=POLL_INTERVAL)
+                except Exception:
+                    logger.warning("redis unavailable; polling the job table", exc_info=True)
+                    item = None
+                    time.sleep(POLL_INTERVAL)
+                if item is not None:
+                    job = _claim_queued(item)
+            if job is None:
+                job = claim()
+
+            if job is not None:
+                logger.info("export job %s (%s %s) started", job.pk, job.kind, job.format)
+                close_old_connections()
+                run_job(job)
+                close_old_connections()
+                logger.info("export job %s %s", job.pk, job.status)
+        except (OperationalError, InterfaceError):
+            if once:
+                raise
+            logger.warning("database unavailable; retrying in %ss", POLL_INTERVAL, exc_info=True)
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        if job is not None:
+            continue
+        if once:
+            return
+        if client is None:
+            time.sleep(POLL_INTERVAL)
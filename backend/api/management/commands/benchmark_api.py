@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import DEFAULT_ITERATIONS, DEFAULT_THRESHOLD, DEFAULT_WARMUP, compare, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks list/search/filter/check-unique/export endpoints; writes JSON results and "
+        "fails when they regress past --threshold against --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+        parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+        parser.add_argument("--only", action="append", help="Scenario name prefix (repeatable), e.g. export.")
+        parser.add_argument("--output", help="Write results JSON here.")
+        parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+        parser.add_argument("--update-baseline", action="store_true", help="Write results to --baseline.")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed growth (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        hosts = [h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")]
+
+        def progress(name, r):
+            self.stdout.write(
+                f"{name:<30} p50={r['p50_ms']:>9.2f}ms p90={r['p90_ms']:>9.2f}ms p99={r['p99_ms']:>9.2f}ms "
+                f"queries={r['queries']:>3} peak={r['peak_kb']:>7}KB bytes={r['bytes']} status={r['status']}"
+            )
+
+        try:
+            results = run_suite(
+                iterations=max(1, options["iterations"]),
+                warmup=max(0, options["warmup"]),
+                only=options["only"],
+                host=hosts[0] if hosts else "localhost",
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        text = json.dumps(results, indent=2, ensure_ascii=False)
+        if options["output"]:
+            Path(options["output"]).write_text(text, encoding="utf-8")
+
+        baseline_path = options["baseline"]
+        if not baseline_path:
+            return
+        path = Path(baseline_path)
+        if options["update_baseline"]:
+            path.write_text(text, encoding="utf-8")
+            self.stdout.write(f"baseline written: {path}")
+            return
+        if not path.exists():
+            raise CommandError(f"Baseline yok: {path} (--update-baseline ile oluşturun).")
+
+        problems = compare(results, json.loads(path.read_text(encoding="utf-8")), options["threshold"])
+        if problems:
+            raise CommandError("Performans gerilemesi:\n" + "\n".join(problems))
+        self.stdout.write("no regressions")
@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import compare_renderers
+
+
+class Command(BaseCommand):
+    help = "Compares encode/decode time and payload size of JSON, orjson and MessagePack on full artifact pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--pages", type=int, default=4)
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument("--output", help="Write results JSON here.")
+
+    def handle(self, *args, **options):
+        try:
+            results = compare_renderers(
+                page_size=max(1, options["page_size"]),
+                pages=max(1, options["pages"]),
+                iterations=max(1, options["iterations"]),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for name, r in results["renderers"].items():
+            self.stdout.write(
+                f"{name:<8} encode={r['encode_ms_per_page']:>8.2f}ms (x{r['encode_speedup']:<5}) "
+                f"decode={r['decode_ms_per_page']:>8.2f}ms bytes={r['bytes_per_page']:>9} "
+                f"(x{r['size_ratio']:<5}) gzip={r['gzip_bytes_per_page']:>8}"
+            )
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
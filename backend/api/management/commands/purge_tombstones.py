@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Deletes changes-feed tombstones older than SYNC_TOMBSTONE_DAYS."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{purge_tombstones()} tombstones deleted")
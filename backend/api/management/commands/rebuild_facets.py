@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.facets import rebuild_facet_counts
+from core.models import Artifact, ArtifactFacetCount
+
+
+class Command(BaseCommand):
+    help = "Recomputes the artifact facet summary table (dashboard counts)."
+
+    def handle(self, *args, **options):
+        rows = rebuild_facet_counts(Artifact, ArtifactFacetCount)
+        self.stdout.write(f"{rows} facet rows written")
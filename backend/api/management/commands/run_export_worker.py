@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.jobs import get_queue_backend, run_worker
+from api.metrics import start_worker_server
+
+
+class Command(BaseCommand):
+    help = "Processes queued export jobs (PDF/XLSX/CSV renders and bulk exports)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument(
+            "--metrics-port", type=int, default=settings.WORKER_METRICS_PORT,
+            help="Serve Prometheus metrics on this port (0: off).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"export worker started ({get_queue_backend()} queue)")
+        if not options["once"] and start_worker_server(options["metrics_port"]):
+            self.stdout.write(f"metrics on :{options['metrics_port']}")
+        run_worker(once=options["once"])
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.synthetic import SEED_BATCH_SIZE, seed
+
+
+class Command(BaseCommand):
+    help = "Creates synthetic main codes and artifacts for benchmarks (same --seed, same data)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--main-codes", type=int, default=2000)
+        parser.add_argument("--artifacts", type=int, default=200_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        created = seed(
+            options["main_codes"],
+            options["artifacts"],
+            seed_value=options["seed"],
+            batch_size=options["batch_size"],
+            progress=self.stdout.write,
+        )
+        self.stdout.write(f"{created['main_codes']} main codes, {created['artifacts']} artifacts created")
@@ -0,0 +1,336 @@
+"""Request, SQL, serializer and export metrics in Prometheus text format.
+
+:class:`MetricsMiddleware` times every request per route (the URL pattern
+name, e.g. ``artifact-list``, so ids never become labels). It counts the SQL
+statements of the request, and their time, through a database
+``execute_wrapper``, and it records the response size; for streamed bodies
+(bulk exports) both are recorded once the body has been sent, so the SQL
+run while streaming is included. The wrapper is
+installed on every connection and finds the request's counters through a
+context variable, so queries run by Django's async ORM in worker threads are
+counted too; the middleware works in sync (WSGI) and async (ASGI) stacks. The query-count
+histogram per route is what makes N+1 patterns visible. Serializer ``.data``
+builds (:class:`api.serializers.TimedListSerializer`) and export renders per
+format are timed where they happen.
+
+gunicorn runs several worker processes and each one only sees its own
+requests. With ``PROMETHEUS_MULTIPROC_DIR`` set (``gunicorn.conf.py`` does
+that), prometheus-client keeps the values in per-process files in that
+directory, and ``/api/metrics/`` sums them over all workers, dead ones
+included. Without it, the endpoint shows the serving process only, which is
+what ``runserver`` needs.
+
+The export worker (``manage.py run_export_worker``) is a separate process
+outside gunicorn, where catalog and bulk job renders are timed; it serves its
+own metrics on ``WORKER_METRICS_PORT`` (default 9101), a second scrape target.
+
+Set ``METRICS_ENABLED=0`` to turn everything off.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import os
+import time
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+except ImportError:  # metrics are optional in dev setups
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+RENDER_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 60, 180, 600)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def enabled() -> bool:
+    return prometheus_client is not None and settings.METRICS_ENABLED
+
+
+if prometheus_client is not None:
+    REQUEST_SECONDS = Histogram(
+        "arkeoloji_http_request_duration_seconds",
+        "Request latency until the response is returned (streamed bodies excluded).",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        "arkeoloji_http_requests_in_progress",
+        "Requests being handled.",
+        multiprocess_mode="livesum",
+    )
+    RESPONSE_BYTES = Histogram(
+        "arkeoloji_http_response_size_bytes",
+        "Response body size (streamed bodies counted when fully sent).",
+        ["route"],
+        buckets=SIZE_BUCKETS,
+    )
+    REQUEST_QUERIES = Histogram(
+        "arkeoloji_db_queries_per_request",
+        "SQL statements executed per request.",
+        ["route"],
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+    REQUEST_SQL_SECONDS = Histogram(
+        "arkeoloji_db_time_per_request_seconds",
+        "Time spent in SQL per request.",
+        ["route"],
+        buckets=LATENCY_BUCKETS,
+    )
+    QUERIES_TOTAL = Counter(
+        "arkeoloji_db_queries",
+        "SQL statements executed, by route.",
+        ["route"],
+    )
+    SERIALIZER_SECONDS = Histogram(
+        "arkeoloji_serializer_duration_seconds",
+        "Time building serializer .data.",
+        ["serializer", "many"],
+        buckets=LATENCY_BUCKETS,
+    )
+    EXPORT_SECONDS = Histogram(
+        "arkeoloji_export_render_duration_seconds",
+        "Export render time by kind (artifact, bulk, catalog) and format.",
+        ["kind", "format", "outcome"],
+        buckets=RENDER_BUCKETS,
+    )
+
+
+class QueryStats:
+    """``execute_wrapper`` that counts and times the statements it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+_request_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "arkeoloji_query_stats", default=None
+)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # Connections are per thread; sync_to_async threads get their own.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def route_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name or match.route or UNMATCHED_ROUTE
+
+
+def _observe_queries(route: str, stats: QueryStats) -> None:
+    REQUEST_QUERIES.labels(route).observe(stats.count)
+    REQUEST_SQL_SECONDS.labels(route).observe(stats.seconds)
+    if stats.count:
+        QUERIES_TOTAL.labels(route).inc(stats.count)
+
+
+def _count_streamed(chunks: Iterable[bytes], route: str, stats: QueryStats) -> Iterator[bytes]:
+    # Streamed exports run their SQL while the body is produced, after the
+    # view returned; the request's counters are active around each chunk.
+    size = 0
+    it = iter(chunks)
+    try:
+        while True:
+            token = _request_stats.set(stats)
+            try:
+                chunk = next(it)
+            except StopIteration:
+                break
+            finally:
+                _request_stats.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            token = _request_stats.set(stats)
+            try:
+                close()
+            finally:
+                _request_stats.reset(token)
+        RESPONSE_BYTES.labels(route).observe(size)
+        _observe_queries(route, stats)
+
+
+async def _acount_streamed(chunks: AsyncIterable[bytes], route: str, stats: QueryStats) -> AsyncIterator[bytes]:
+    size = 0
+    it = chunks.__aiter__()
+    try:
+        while True:
+            token = _request_stats.set(stats)
+            try:
+                chunk = await it.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _request_stats.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        aclose = getattr(it, "aclose", None)
+        if aclose is not None:
+            token = _request_stats.set(stats)
+            try:
+                await aclose()
+            finally:
+                _request_stats.reset(token)
+        RESPONSE_BYTES.labels(route).observe(size)
+        _observe_queries(route, stats)
+
+
+class MetricsMiddleware:
+    """Records latency, SQL and size metrics for every request; goes first."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(_install_wrapper, dispatch_uid="arkeoloji-metrics")
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token, started = self._start()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self._finish(request, response, stats, token, started)
+        return self._count_size(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token, started = self._start()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._finish(request, response, stats, token, started)
+        return self._count_size(request, response, stats)
+
+    def _start(self):
+        # Connections this thread opened before the signal was connected.
+        for conn in connections.all(initialized_only=True):
+            _install_wrapper(None, conn)
+        stats = QueryStats()
+        REQUESTS_IN_PROGRESS.inc()
+        return stats, _request_stats.set(stats), time.perf_counter()
+
+    def _finish(self, request, response, stats, token, started):
+        _request_stats.reset(token)
+        REQUESTS_IN_PROGRESS.dec()
+        status = str(response.status_code) if response is not None else "500"
+        route = route_name(request)
+        REQUEST_SECONDS.labels(request.method, route, status).observe(time.perf_counter() - started)
+        if response is None or not response.streaming:
+            _observe_queries(route, stats)
+
+    def _count_size(self, request, response, stats):
+        # Streamed bodies: size and SQL are recorded once the body is consumed.
+        route = route_name(request)
+        if not response.streaming:
+            RESPONSE_BYTES.labels(route).observe(len(response.content))
+        elif response.is_async:
+            response.streaming_content = _acount_streamed(response.streaming_content, route, stats)
+        else:
+            response.streaming_content = _count_streamed(response.streaming_content, route, stats)
+        return response
+
+
+@contextlib.contextmanager
+def observe_serializer(name: str, many: bool):
+    if not enabled():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SERIALIZER_SECONDS.labels(name, "true" if many else "false").observe(time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def observe_export(kind: str, fmt: str):
+    if not enabled():
+        yield
+        return
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXPORT_SECONDS.labels(kind, fmt, outcome).observe(time.perf_counter() - started)
+
+
+def timed_chunks(chunks: Iterable[bytes], kind: str, fmt: str) -> Iterator[bytes]:
+    """Times a streamed export from its first chunk to the last one."""
+    with observe_export(kind, fmt):
+        yield from chunks
+
+
+async def atimed_chunks(chunks: AsyncIterable[bytes], kind: str, fmt: str) -> AsyncIterator[bytes]:
+    """:func:`timed_chunks` for async streams."""
+    with observe_export(kind, fmt):
+        async for chunk in chunks:
+            yield chunk
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def render_latest() -> bytes:
+    """Current values in Prometheus text format, summed over worker processes."""
+    return prometheus_client.generate_latest(_registry())
+
+
+def start_worker_server(port: int) -> bool:
+    """Serves this process's metrics on ``port`` (export worker); False if off."""
+    if not enabled() or not port:
+        return False
+    prometheus_client.start_http_server(port, registry=_registry())
+    return True
+
+
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST if prometheus_client is not None else "text/plain"
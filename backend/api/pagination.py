@@ -1,9 +1,238 @@
-from rest_framework.pagination import PageNumberPagination
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from typing import Any, List, Optional, Tuple
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor (keyset) pagination over the queryset's own ordering.
+
+    The ordering set by the viewset (``-created_at``, ``artifact_no``, ranked
+    search ...) is extended with ``pk`` as a tie-breaker, and the cursor
+    carries the sort values of the boundary row. Each page is a range
+    condition on those values instead of an ``OFFSET``, and no ``COUNT(*)``
+    is run, so a deep page costs the same as the first one.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    invalid_cursor_message = "Geçersiz cursor."
+
+    display_page_controls = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        direction, values = self.decode_cursor(request)
+        reverse = direction == "p"
+
+        if reverse:
+            queryset = queryset.order_by(*[self.order_expr(f, not desc) for f, desc in self.keys])
+        else:
+            queryset = queryset.order_by(*[self.order_expr(f, desc) for f, desc in self.keys])
+
+        if values is not None:
+            queryset = queryset.filter(self.after_filter(values, reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Coming from a cursor means there is a page on the other side.
+        if reverse:
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    # -- ordering -----------------------------------------------------------
+
+    @staticmethod
+    def get_keys(queryset) -> List[Tuple[str, bool]]:
+        keys: List[Tuple[str, bool]] = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering or ():
+            if not isinstance(item, str) or item == "?":
+                continue
+            desc = item.startswith("-")
+            name = item.lstrip("-")
+            if name in ("pk", "id"):
+                continue
+            keys.append((name, desc))
+        # pk tie-breaker follows the direction of the last key
+        keys.append(("pk", keys[-1][1] if keys else True))
+        return keys
+
+    @staticmethod
+    def order_expr(field: str, desc: bool) -> str:
+        return f"-{field}" if desc else field
+
+    def after_filter(self, values: List[Any], reverse: bool) -> Q:
+        """Rows strictly after ``values`` in (possibly reversed) key order.
+
+        The leading key also gets an inclusive bound so PostgreSQL can turn the
+        condition into an index range scan.
+        """
+        cond = Q()
+        equal = Q()
+        for (field, desc), value in zip(self.keys, values):
+            op = "lt" if desc != reverse else "gt"
+            cond |= equal & Q(**{f"{field}__{op}": value})
+            equal &= Q(**{field: value})
+
+        first_field, first_desc = self.keys[0]
+        first_op = "lte" if first_desc != reverse else "gte"
+        return Q(**{f"{first_field}__{first_op}": values[0]}) & cond
+
+    @staticmethod
+    def key_value(obj, field: str) -> Any:
+        for part in field.split("__"):
+            obj = getattr(obj, part)
+        return obj
+
+    # -- cursor encoding ----------------------------------------------------
+
+    @staticmethod
+    def encode_value(value: Any) -> Any:
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        return value
+
+    def encode_cursor(self, direction: str, obj) -> str:
+        payload = {
+            "d": direction,
+            "v": [self.encode_value(self.key_value(obj, f)) for f, _ in self.keys],
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        token = base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request) -> Tuple[str, Optional[List[Any]]]:
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return "n", None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw.decode("utf-8"))
+            direction = payload["d"]
+            values = payload["v"]
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if direction not in ("n", "p") or not isinstance(values, list) or len(values) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+        return direction, values
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor("n", self.page[-1])
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return None
+        return self.encode_cursor("p", self.page[0])
 
 
 class StandardResultsSetPagination(PageNumberPagination):
-    """Default pagination with optional ?page_size= query param."""
+    """Default pagination with optional ?page_size= query param.
+
+    Passing ``?cursor=`` (empty for the first page) or ``?paginate=cursor``
+    switches the request to :class:`KeysetPagination`.
+    """
 
     page_size = 50
     page_size_query_param = "page_size"
     max_page_size = 500
+
+    keyset_class = KeysetPagination
+
+    # Row count the caller already has (the list ETag query); saves the
+    # paginator's own COUNT. Reset after each use.
+    known_count: Optional[int] = None
+
+    def django_paginator_class(self, queryset, page_size):
+        paginator = DjangoPaginator(queryset, page_size)
+        if self.known_count is not None:
+            paginator.count = self.known_count  # overrides the cached_property
+            self.known_count = None
+        return paginator
+
+    def use_keyset(self, request) -> bool:
+        qp = request.query_params
+        return self.keyset_class.cursor_query_param in qp or qp.get("paginate") == "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            self.display_page_controls = False
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
@@ -0,0 +1,273 @@
+"""PDF renderers for artifact exports.
+
+This module does not import Django: it is loaded by the render pool processes
+(:mod:`api.render_pool`) and works on plain, picklable data — the HTML string
+for WeasyPrint, the serialized artifact dict for ReportLab. Stylesheets are
+built once per process and :func:`warm` pre-loads the libraries and fonts, so
+only the first render of a process pays for them.
+"""
+from __future__ import annotations
+
+import functools
+import io
+from typing import Any, Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+
+class RenderUnavailable(Exception):
+    """The renderer library is not installed."""
+
+
+@functools.lru_cache(maxsize=None)
+def reportlab_styles() -> Dict[str, Any]:
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    normal = ParagraphStyle("body", parent=styles["BodyText"], fontName="Helvetica", fontSize=9, leading=12)
+    return {
+        "normal": normal,
+        "key": ParagraphStyle(
+            "key",
+            parent=normal,
+            fontName="Helvetica-Bold",
+            textColor=colors.HexColor("#0f172a"),
+        ),
+        "section": ParagraphStyle(
+            "h",
+            parent=styles["Heading3"],
+            fontName="Helvetica-Bold",
+            fontSize=12,
+            textColor=colors.HexColor("#0f172a"),
+            spaceAfter=8,
+            spaceBefore=10,
+        ),
+        "title": ParagraphStyle(
+            "title",
+            parent=styles["Title"],
+            fontName="Helvetica-Bold",
+            fontSize=16,
+            textColor=colors.HexColor("#0f172a"),
+            spaceAfter=10,
+        ),
+        "subtitle": ParagraphStyle(
+            "sub",
+            parent=styles["BodyText"],
+            fontName="Helvetica",
+            fontSize=9,
+            textColor=colors.HexColor("#475569"),
+            spaceAfter=12,
+        ),
+        "table": TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                # plain string cells (see text_cell); match the key/value paragraph styles
+                ("FONT", (0, 0), (0, -1), "Helvetica-Bold", 9, 12),
+                ("FONT", (1, 0), (-1, -1), "Helvetica", 9, 12),
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#0f172a")),
+                ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e2e8f0")),
+                ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#e2e8f0")),
+                ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#fbfdff")]),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        ),
+    }
+
+
+def _humanize_key(k: str) -> str:
+    return str(k).replace(".", " / ").replace("_", " ").strip().title()
+
+
+# Key / value column widths (mm) and the cell padding from the table style.
+_KEY_WIDTH_MM = 55
+_VALUE_WIDTH_MM = 130
+_CELL_PADDING = 12
+
+
+def text_cell(text: str, style, width: float):
+    """Plain string when ``text`` fits on one line, else a wrapping Paragraph.
+
+    String cells skip Paragraph parsing and line breaking, which dominate
+    the cost of large documents.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import Paragraph
+
+    if "\n" not in text and stringWidth(text, style.fontName, style.fontSize) <= width - _CELL_PADDING:
+        return text
+    return Paragraph(escape(text).replace("\n", "<br/>"), style)
+
+
+def table_for_rows(rows: List[Tuple[str, Any]]):
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Table
+
+    st = reportlab_styles()
+    data = []
+    for k, v in rows:
+        v = "" if v is None else str(v)
+        v = v.replace("\r\n", "\n").replace("\r", "\n")
+        data.append([text_cell(str(k), st["key"], _KEY_WIDTH_MM * mm), text_cell(v, st["normal"], _VALUE_WIDTH_MM * mm)])
+
+    t = Table(data, colWidths=[_KEY_WIDTH_MM * mm, _VALUE_WIDTH_MM * mm])
+    t.setStyle(st["table"])
+    return t
+
+
+def section_title(text: str):
+    from reportlab.platypus import Paragraph
+
+    return Paragraph(text, reportlab_styles()["section"])
+
+
+def artifact_flowables(s: Dict[str, Any]) -> List[Any]:
+    """Section tables of one serialized artifact, from "Genel Bilgiler" on.
+
+    Shared by the single-artifact PDF and the catalog (:mod:`api.catalog`).
+    """
+    from reportlab.platypus import Spacer
+
+    details = s.get("details") or {}
+    measurements = s.get("measurements") or {}
+    images = s.get("images") or []
+    drawings = s.get("drawings") or []
+
+    def yesno(v):
+        return "Evet" if v else "Hayır"
+
+    general_rows = [
+        ("Buluntu No (Tam)", s.get("full_artifact_no") or ""),
+        ("Anakod", s.get("main_code_code") or ""),
+        ("Buluntu Yeri", s.get("main_code_finding_place") or ""),
+        ("Buluntu No", str(s.get("artifact_no") or "")),
+        ("Buluntu Tarihi", s.get("artifact_date") or ""),
+        ("Form", s.get("form_type") or ""),
+        ("Yapım Malzemesi", s.get("production_material") or ""),
+        ("Dönem", s.get("period") or ""),
+        ("Eser Tarihi", s.get("piece_date") or ""),
+        ("Envanterlik", yesno(s.get("is_inventory"))),
+        ("Aktif", yesno(s.get("is_active"))),
+    ]
+
+    notes = s.get("notes") or ""
+    ref = s.get("source_and_reference") or ""
+
+    story = []
+    story.append(section_title("Genel Bilgiler"))
+    story.append(table_for_rows(general_rows))
+
+    if ref.strip():
+        story.append(Spacer(1, 8))
+        story.append(section_title("Kaynak / Referans"))
+        story.append(table_for_rows([("Metin", ref)]))
+
+    if notes.strip():
+        story.append(Spacer(1, 8))
+        story.append(section_title("Notlar / Açıklama"))
+        story.append(table_for_rows([("Metin", notes)]))
+
+    if isinstance(details, dict) and details:
+        story.append(Spacer(1, 10))
+        story.append(section_title("Form Detayları"))
+        rows = [(_humanize_key(k), v) for k, v in sorted(details.items(), key=lambda x: str(x[0]))]
+        story.append(table_for_rows(rows))
+
+    if isinstance(measurements, dict) and measurements:
+        story.append(Spacer(1, 10))
+        story.append(section_title("Ölçü ve Renk Bilgileri"))
+        rows = [(_humanize_key(k), v) for k, v in sorted(measurements.items(), key=lambda x: str(x[0]))]
+        story.append(table_for_rows(rows))
+
+    if images or drawings:
+        story.append(Spacer(1, 10))
+        story.append(section_title("Medya"))
+        media_rows = [
+            ("Fotoğraf Sayısı", str(len(images))),
+            ("Çizim Sayısı", str(len(drawings))),
+        ]
+        if images:
+            media_rows.append(("Fotoğraflar", "\n".join(map(str, images[:20])) + ("" if len(images) <= 20 else f"\n(+{len(images)-20} adet)")))
+        if drawings:
+            media_rows.append(("Çizimler", "\n".join(map(str, drawings[:20])) + ("" if len(drawings) <= 20 else f"\n(+{len(drawings)-20} adet)")))
+        story.append(table_for_rows(media_rows))
+
+    return story
+
+
+def render_reportlab(s: Dict[str, Any], filename_base: str) -> bytes:
+    """ReportLab PDF of a serialized artifact (``ArtifactSerializer`` data)."""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, SimpleDocTemplate
+    except Exception:
+        raise RenderUnavailable("reportlab yüklü değil.")
+
+    st = reportlab_styles()
+    story = [
+        Paragraph("Buluntu Detay Export", st["title"]),
+        Paragraph(f"Buluntu: <b>{s.get('full_artifact_no') or ''}</b>", st["subtitle"]),
+    ]
+    story.extend(artifact_flowables(s))
+
+    bio = io.BytesIO()
+    doc = SimpleDocTemplate(
+        bio,
+        pagesize=A4,
+        leftMargin=18 * mm,
+        rightMargin=18 * mm,
+        topMargin=16 * mm,
+        bottomMargin=16 * mm,
+        title=f"Buluntu {filename_base}",
+    )
+    doc.build(story)
+    return bio.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def _weasyprint():
+    """``(HTML, FontConfiguration instance)``, imported once per process."""
+    from weasyprint import HTML  # lazy import to avoid startup crash
+    from weasyprint.text.fonts import FontConfiguration
+
+    return HTML, FontConfiguration()
+
+
+def render_html(html: str, base_url: str) -> bytes:
+    """HTML→PDF with WeasyPrint."""
+    try:
+        HTML, fonts = _weasyprint()
+    except (ImportError, OSError):
+        # OSError: the package is there but its system libraries (pango) are not
+        raise RenderUnavailable("weasyprint yüklü değil.")
+    return HTML(string=html, base_url=base_url).write_pdf(font_config=fonts)
+
+
+def render_pdf(html: str, base_url: str, s: Dict[str, Any], filename_base: str) -> bytes:
+    """WeasyPrint when possible, else the ReportLab layout (``pdf_reportlab``)."""
+    try:
+        return render_html(html, base_url)
+    except (RenderUnavailable, OSError):
+        # WeasyPrint or its system libraries are not available. Nothing
+        # broader: the render pool's RenderTimeout must reach the caller
+        # instead of starting a ReportLab render with no deadline.
+        return render_reportlab(s, filename_base)
+
+
+_WARM_HTML = "<html><body><p>Buluntu ÇĞİÖŞÜ çğıöşü</p></body></html>"
+
+
+def warm() -> None:
+    """Imports the renderers and loads fonts/styles; render pool initializer."""
+    try:
+        render_reportlab({"full_artifact_no": "warm"}, "warm")
+    except Exception:
+        pass
+    try:
+        render_html(_WARM_HTML, "")
+    except Exception:
+        pass
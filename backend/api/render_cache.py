@@ -0,0 +1,177 @@
+"""Size-bounded on-disk cache for single-artifact export renders.
+
+A render is stored under ``EXPORT_CACHE_ROOT/<artifact id>/<key>.<ext>``. The
+key hashes everything the output depends on: artifact id and ``updated_at``,
+the main code's ``updated_at`` (the export shows its finding place), the
+format and :data:`TEMPLATE_VERSION`. An edited row therefore never hits a
+stale file; the save/delete signals in :mod:`api.signals` also drop the old
+files right away so they do not wait for eviction.
+
+Reads touch the file's mtime and return an open file, so a concurrent
+invalidation or eviction (which unlinks files) can not pull it away from a
+response being sent. Each process keeps a running estimate of the cache size
+(one directory walk at start, then its own writes and deletions); only when
+the estimate passes ``EXPORT_CACHE_MAX_BYTES``, or after it has written an
+eighth of that since the last walk (other workers write too), is the tree
+walked and the least recently used files evicted. The file just written is
+never evicted; renders larger than the whole budget are not cached.
+``EXPORT_CACHE_MAX_MB=0`` turns the cache off: nothing is read or stored.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+# Bump when the HTML template, the PDF story or the CSV/XLSX layout changes.
+TEMPLATE_VERSION = 2
+
+
+def render_key(artifact, fmt: str) -> str:
+    main_code_updated = artifact.main_code.updated_at if artifact.main_code_id else None
+    raw = "|".join(
+        str(part)
+        for part in (
+            artifact.pk,
+            artifact.updated_at.isoformat() if artifact.updated_at else "",
+            main_code_updated.isoformat() if main_code_updated else "",
+            fmt,
+            TEMPLATE_VERSION,
+        )
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class _SizeEstimate:
+    """Per-process running size of one cache root."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total: Optional[int] = None  # unknown until the first walk
+        self.written = 0  # bytes written since the last walk
+
+
+_estimates: Dict[str, _SizeEstimate] = {}
+_estimates_lock = threading.Lock()
+
+
+def _estimate_for(root: Path) -> _SizeEstimate:
+    with _estimates_lock:
+        return _estimates.setdefault(str(root), _SizeEstimate())
+
+
+def _dir_size(path: Path) -> int:
+    size = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    size += entry.stat().st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return size
+
+
+class RenderCache:
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size = _estimate_for(self.root)
+
+    def path(self, artifact_id: int, key: str, ext: str) -> Path:
+        return self.root / str(artifact_id) / f"{key}.{ext}"
+
+    def get(self, artifact_id: int, key: str, ext: str) -> Optional[BinaryIO]:
+        """The cached render opened for reading (the caller closes it), or None."""
+        if self.max_bytes <= 0:
+            return None
+        path = self.path(artifact_id, key, ext)
+        try:
+            fh = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted meanwhile; the open file is still readable
+        return fh
+
+    def put(self, artifact_id: int, key: str, ext: str, data: bytes) -> None:
+        if self.max_bytes <= 0 or len(data) > self.max_bytes:
+            return
+        path = self.path(artifact_id, key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".render-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+
+        est = self._size
+        with est.lock:
+            est.written += len(data)
+            if est.total is not None:
+                est.total += len(data)
+            due = est.total is None or est.total > self.max_bytes or est.written > self.max_bytes // 8
+        if due:
+            self.evict(keep=str(path))
+
+    def invalidate(self, artifact_ids: Iterable[int]) -> None:
+        removed = 0
+        for artifact_id in artifact_ids:
+            folder = self.root / str(artifact_id)
+            if not folder.exists():
+                continue
+            removed += _dir_size(folder)
+            shutil.rmtree(folder, ignore_errors=True)
+        if removed:
+            est = self._size
+            with est.lock:
+                if est.total is not None:
+                    est.total = max(0, est.total - removed)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Drops least recently used files (never ``keep``) until the cache fits ``max_bytes``."""
+        entries: List[tuple] = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                total += st.st_size
+                if full != keep:
+                    entries.append((st.st_mtime, st.st_size, full))
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, full in entries:
+                try:
+                    os.remove(full)
+                except OSError:
+                    continue
+                total -= size
+                try:
+                    os.rmdir(os.path.dirname(full))  # only succeeds once empty
+                except OSError:
+                    pass
+                if total <= self.max_bytes:
+                    break
+        est = self._size
+        with est.lock:
+            est.total = total
+            est.written = 0
+
+
+def get_render_cache() -> RenderCache:
+    return RenderCache(settings.EXPORT_CACHE_ROOT, settings.EXPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,106 @@
+"""Pool of long-lived processes for PDF export renders.
+
+Each gunicorn worker lazily starts a small ``ProcessPoolExecutor``
+(``PDF_RENDER_WORKERS`` processes). Its processes run
+:func:`api.pdf_render.warm` once at start, so renders skip import, font and
+stylesheet setup. Jobs go over the executor's local queue. A render that
+runs past ``PDF_RENDER_TIMEOUT`` is interrupted inside the pool process, and
+the caller stops waiting at the same deadline. The view then hands the
+export to the background job queue instead of holding the request.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from django.conf import settings
+
+from . import pdf_render
+
+
+class RenderTimeout(Exception):
+    """The render did not finish within ``PDF_RENDER_TIMEOUT``."""
+
+
+def _on_alarm(signum, frame):
+    raise RenderTimeout()
+
+
+def _run(timeout: float, func_name: str, *args: Any) -> bytes:
+    """Runs in a pool process: one render under a SIGALRM deadline."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return getattr(pdf_render, func_name)(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+
+
+def _mp_context():
+    # The pool processes do not touch Django, so they start from a clean
+    # interpreter instead of forking the request worker (and its DB sockets).
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """The process' pool; None when disabled (``PDF_RENDER_WORKERS=0``)."""
+    global _pool, _pool_pid
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return None
+    with _lock:
+        # A pool inherited through fork belongs to the parent.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=_mp_context(),
+                initializer=pdf_render.warm,
+            )
+            _pool_pid = os.getpid()
+            # Start (and warm) every process now rather than on demand.
+            for _ in range(settings.PDF_RENDER_WORKERS):
+                _pool.submit(os.getpid)
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def render(func_name: str, *args: Any) -> bytes:
+    """Calls ``pdf_render.<func_name>(*args)`` in the pool (inline if disabled).
+
+    Raises :class:`RenderTimeout` when the result is not ready in time.
+    """
+    timeout = settings.PDF_RENDER_TIMEOUT
+    pool = get_pool()
+    if pool is None:
+        return getattr(pdf_render, func_name)(*args)
+
+    future = pool.submit(_run, timeout, func_name, *args)
+    try:
+        # A little slack over the in-process alarm so the pool's own
+        # RenderTimeout wins when the job started right away.
+        return future.result(timeout=timeout + 1)
+    except FutureTimeout:
+        future.cancel()  # still queued behind other renders
+        raise RenderTimeout()
+    except BrokenProcessPool:
+        # A pool process died (OOM kill ...); start a fresh pool next time.
+        _reset_pool(pool)
+        return getattr(pdf_render, func_name)(*args)
@@ -0,0 +1,141 @@
+"""Faster JSON (orjson) and MessagePack renderers and parsers.
+
+Both packages are optional; ``settings.REST_FRAMEWORK`` only lists these
+classes when they are installed. The renderer is picked from ``Accept``
+(``application/json`` or ``application/msgpack``) and the parser from
+``Content-Type``, as usual in DRF.
+
+Values mean the same in every format. Anything that is not a plain JSON type
+goes through DRF's own ``JSONEncoder.default``:
+
+- datetimes are ISO 8601 strings, with ``Z`` for UTC;
+- dates and times are ISO strings;
+- Decimals are numbers (serializers already send them as strings);
+- UUIDs and lazy translations are strings.
+
+MessagePack gets the same treatment, so a tablet client decodes the same
+values it would get from JSON, only smaller. The one visible difference is
+float spelling: orjson writes ``1e-5`` where the stdlib writes ``1e-05``.
+Both parse to the same value.
+"""
+from __future__ import annotations
+
+import io
+from typing import Any
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to DRF's JSONRenderer
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: no MessagePack format
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+# orjson reads integers past 64 bits as floats; the stdlib keeps them exact.
+# Digits map to NUL (never raw in valid JSON) so a 19-digit run is a plain
+# substring search; a regex scan costs more than the orjson parse itself.
+_DIGITS_TO_NUL = bytes.maketrans(b"0123456789", b"\0" * 10)
+_LONG_DIGIT_RUN = b"\0" * 19
+
+
+def _has_long_digits(raw: bytes) -> bool:
+    return _LONG_DIGIT_RUN in raw.translate(_DIGITS_TO_NUL)
+
+
+def _default(obj: Any) -> Any:
+    return _encoder.default(obj)
+
+
+if orjson is not None:
+    # Datetimes go through _default so they are spelled exactly like
+    # JSONRenderer does; int dict keys become strings as with json.dumps.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with the same output, encoded by orjson.
+
+    Indented output (``Accept: application/json; indent=4``, the browsable
+    API) and values orjson rejects (integers beyond 64 bits) use the stdlib
+    path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Kept escaped so the output stays a JavaScript subset, as in JSONRenderer.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """``JSONParser`` decoding UTF-8 bodies with orjson.
+
+    Other charsets, bodies that may hold integers beyond 64 bits and bodies
+    orjson refuses go to the stdlib parser, which also gives the usual error
+    text.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        raw = stream.read() if stream is not None else b""
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("_", "-") in ("utf-8", "utf8") and not _has_long_digits(raw):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(raw), media_type, parser_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # datetime=False sends datetimes to _default, like the JSON renderers.
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        raw = stream.read() if stream is not None else b""
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError("MessagePack parse error - %s" % (str(exc) or type(exc).__name__))
+
+
+class LegacyMessagePackRenderer(MessagePackRenderer):
+    """Same format under the older ``application/x-msgpack`` name."""
+
+    media_type = "application/x-msgpack"
+
+
+class LegacyMessagePackParser(MessagePackParser):
+    media_type = "application/x-msgpack"
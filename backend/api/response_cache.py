@@ -0,0 +1,149 @@
+"""Shared cache for artifact / main-code list responses.
+
+Entries live in the ``api`` cache alias (``API_CACHE_BACKEND``: Redis, file
+or local memory) and hold the serialized page plus its ETag, keyed by the
+list's representation key (model, renderer, normalized query string) and the
+current versions of the *tags* the list depends on:
+
+- ``main-codes``: every main-code list;
+- ``artifacts``: artifact lists not scoped to one main code;
+- ``artifacts:mc:<id>``: ``?main_code=<id>`` artifact lists.
+
+The save/delete signals in :mod:`api.signals` bump the tags a row touches,
+which orphans exactly the entries built from older data; they then expire
+with ``API_CACHE_TIMEOUT``. A hit is answered without touching the database,
+including the 304 for a matching ``If-None-Match``.
+
+Hit/miss counters are kept in the same cache (``/api/cache-stats/``).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import time
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import RESPONSE_VERSION, not_modified, set_validators
+
+CACHE_ALIAS = "api"
+
+MAIN_CODES_TAG = "main-codes"
+ARTIFACTS_TAG = "artifacts"
+
+STATS_KEYS = ("stats:hits", "stats:misses")
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def artifacts_tag(main_code_id) -> str:
+    return f"{ARTIFACTS_TAG}:mc:{main_code_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    cache = get_cache()
+    keys = {_tag_key(t): t for t in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        version = found.get(key)
+        if version is None:
+            # A lost tag starts from a fresh value, never from an old one.
+            version = time.time_ns()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def _bump(tags: List[str]) -> None:
+    cache = get_cache()
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.set(_tag_key(tag), time.time_ns(), timeout=None)
+
+
+def bump_tags(*tags: str) -> None:
+    """Invalidates every entry built under the current version of ``tags``.
+
+    Runs after the surrounding transaction commits; bumping earlier would let
+    a concurrent request cache pre-commit data under the new version.
+    """
+    transaction.on_commit(functools.partial(_bump, list(dict.fromkeys(tags))))
+
+
+def list_cache_key(request, tags: Iterable[str], representation_key: str) -> str:
+    versions = tag_versions(tags)
+    # The host is part of the pagination links stored in the entry.
+    parts = [str(RESPONSE_VERSION), request.get_host(), representation_key]
+    parts += [f"{t}={v}" for t, v in sorted(versions.items())]
+    raw = "|".join(parts)
+    return "list:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def count_lookup(hit: bool) -> None:
+    _count(STATS_KEYS[0] if hit else STATS_KEYS[1])
+
+
+def _count(key: str) -> None:
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def cache_stats() -> Dict[str, int]:
+    found = get_cache().get_many(list(STATS_KEYS))
+    hits, misses = (found.get(k) or 0 for k in STATS_KEYS)
+    total = hits + misses
+    return {
+        "backend": settings.API_CACHE_BACKEND,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+class ResponseCacheMixin:
+    """Caches ``list`` responses; goes before :class:`ConditionalGetMixin`."""
+
+    def list_cache_tags(self, request) -> List[str]:
+        raise NotImplementedError
+
+    def list_cache_key(self, request) -> str:
+        return list_cache_key(request, self.list_cache_tags(request), self.representation_key(request))
+
+    def list(self, request, *args, **kwargs):
+        if settings.API_CACHE_BACKEND == "off":
+            return super().list(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.list_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            count_lookup(hit=True)
+            etag, data = entry
+            resp = not_modified(request, etag) or set_validators(Response(data), etag)
+            resp["X-Cache"] = "HIT"
+            return resp
+
+        count_lookup(hit=False)
+        resp = super().list(request, *args, **kwargs)
+        if resp.status_code == 200 and resp.has_header("ETag"):
+            cache.set(key, (resp["ETag"], resp.data))
+        resp["X-Cache"] = "MISS"
+        return resp
@@ -0,0 +1,99 @@
+"""Search helpers shared by the list endpoints."""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F, Q
+
+from core.models import SEARCH_CONFIG, SEARCH_PREFIX_CONFIG, MainCode, turkish_fold
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+def search_query(text: str) -> Optional[SearchQuery]:
+    """Prefix-matching tsquery for free text (``rom`` finds ``Roma``).
+
+    Every token must match, either as a stemmed or an unstemmed prefix. Only
+    word characters reach the raw query, so user input can not break the
+    tsquery syntax.
+    """
+    query = None
+    for token in search_tokens(text):
+        part = SearchQuery(f"{token}:*", config=SEARCH_CONFIG, search_type="raw") | SearchQuery(
+            f"{token}:*", config=SEARCH_PREFIX_CONFIG, search_type="raw"
+        )
+        query = part if query is None else query & part
+    return query
+
+
+def search_rank(query: SearchQuery) -> SearchRank:
+    return SearchRank(F("search_vector"), query)
+
+
+def main_code_search_filter(q: str, query: SearchQuery) -> Q:
+    return Q(search_vector=query) | Q(code__startswith=q.strip().upper())
+
+
+def search_main_codes(qs, q: str):
+    """Filter main codes by `q`; adds a `search_rank` annotation."""
+    query = search_query(q)
+    if query is None:
+        return qs.filter(code__startswith=q.strip().upper())
+    return qs.filter(main_code_search_filter(q, query)).annotate(search_rank=search_rank(query))
+
+
+def search_artifacts(qs, q: str):
+    """Filter artifacts by `q`; adds a `search_rank` annotation.
+
+    Main-code matches are resolved first into an id list (the table is small
+    and indexed), so the artifact side stays a BitmapOr of two index scans
+    instead of a filter evaluated across the join.
+    """
+    query = search_query(q)
+    if query is None:
+        return qs.filter(main_code__code__startswith=q.strip().upper())
+
+    main_code_ids = list(
+        MainCode.objects.filter(main_code_search_filter(q, query)).values_list("id", flat=True)
+    )
+    return qs.filter(Q(search_vector=query) | Q(main_code_id__in=main_code_ids)).annotate(
+        search_rank=search_rank(query)
+    )
+
+
+def folded_contains(field: str, value: str) -> Q:
+    """Substring match on the trigram-indexed ``<field>_folded`` shadow column.
+
+    ``field`` may traverse relations (``main_code__finding_place``).
+    """
+    return Q(**{f"{field}_folded__contains": turkish_fold(value.strip())})
+
+
+def code_contains(field: str, value: str) -> Q:
+    """Substring match on an upper-case code column (trigram indexed)."""
+    return Q(**{f"{field}__contains": value.strip().upper()})
+
+
+# Typeahead fields per endpoint; "code" fields are upper-case already and are
+# matched by prefix, the others through their folded shadow column.
+ARTIFACT_SUGGEST_FIELDS = ("production_material", "period")
+MAIN_CODE_SUGGEST_FIELDS = ("code", "finding_place")
+
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+
+def suggest_values(qs, field: str, term: str, limit: int = SUGGEST_DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """Distinct values of ``field`` matching ``term``, most frequent first."""
+    if field == "code":
+        qs = qs.filter(code__startswith=term.strip().upper())
+    else:
+        qs = qs.filter(folded_contains(field, term)).exclude(**{f"{field}__isnull": True})
+    rows = qs.values(field).annotate(count=Count("id")).order_by("-count", field)[:limit]
+    return [{"value": r[field], "count": r["count"]} for r in rows]
@@ -1,25 +1,109 @@
+from typing import List, Optional, Set, Tuple
+
 from rest_framework import serializers
-from core.models import MainCode, Artifact
+from core.media import externalize_entries, get_blob_store, sync_artifact_media
+from core.models import MainCode, Artifact, ExportJob, Media
+from .metrics import observe_serializer
+
+
+def _csv_param(request, name: str) -> Set[str]:
+    raw = request.query_params.get(name) or ""
+    return {f.strip() for f in raw.split(",") if f.strip()}
+
+
+def requested_fields(request) -> Tuple[Optional[Set[str]], Set[str]]:
+    """``(fields, omit)`` from ``?fields=a,b`` / ``?omit=c``; fields is None when not given."""
+    fields = _csv_param(request, "fields")
+    return (fields or None), _csv_param(request, "omit")
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """``many=True`` serializer whose ``.data`` build is timed (api/metrics.py)."""
+
+    @property
+    def data(self):
+        with observe_serializer(type(self.child).__name__, many=True):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Times single-object ``.data`` builds; set ``Meta.list_serializer_class =
+    TimedListSerializer`` for lists."""
+
+    @property
+    def data(self):
+        with observe_serializer(type(self).__name__, many=False):
+            return super().data
+
+
+class SparseFieldsMixin:
+    """Read-side sparse fieldsets: ``?fields=a,b`` keeps, ``?omit=c,d`` drops.
+
+    Write requests always get the full field set.
+    """
+
+    # Serializer fields backed by a model property rather than a column:
+    # {field name: model columns the property reads}.
+    property_columns = {}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return
+        keep, omit = requested_fields(request)
+        for name in list(self.fields):
+            if (keep is not None and name not in keep) or name in omit:
+                self.fields.pop(name)
 
-class MainCodeSerializer(serializers.ModelSerializer):
+    def only_columns(self) -> Optional[List[str]]:
+        """Model columns needed to render the current fields, for ``.only()``.
+
+        None when some field can not be mapped to columns.
+        """
+        model = self.Meta.model
+        columns = ["pk"]
+        for name, field in self.fields.items():
+            if name in self.property_columns:
+                columns.extend(self.property_columns[name])
+                continue
+            if field.source == "*":
+                return None
+            parts = field.source.split(".")
+            try:
+                model._meta.get_field(parts[0])
+            except Exception:
+                return None
+            columns.append("__".join(parts))
+        # A traversed relation must itself be loaded for select_related.
+        for col in list(columns):
+            if "__" in col:
+                columns.append(col.split("__", 1)[0])
+        return list(dict.fromkeys(columns))
+
+
+class MainCodeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = MainCode
+        list_serializer_class = TimedListSerializer
         fields = [
             "id", "code", "finding_place", "plan_square", "description",
-            "layer", "level", "grave_no", "gis",
+            "layer", "level", "grave_no", "gis", "lat", "lon",
             "created_at", "updated_at",
         ]
-        read_only_fields = ["id", "code", "created_at", "updated_at"]
+        read_only_fields = ["id", "code", "lat", "lon", "created_at", "updated_at"]
+
 
+class ArtifactSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    property_columns = {"full_artifact_no": ("artifact_no", "main_code__code")}
 
-class ArtifactSerializer(serializers.ModelSerializer):
     main_code_code = serializers.CharField(source="main_code.code", read_only=True)
     main_code_finding_place = serializers.CharField(source="main_code.finding_place", read_only=True)
     full_artifact_no = serializers.CharField(read_only=True)
 
     class Meta:
         model = Artifact
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "main_code",
@@ -48,15 +132,108 @@ class ArtifactSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "full_artifact_no", "created_at", "updated_at"]
+        # omitted on create: the viewset numbers it from the main code's sequence
+        extra_kwargs = {"artifact_no": {"required": False}}
+        # (main_code, artifact_no) is checked once, in validate()
+        validators = []
 
     def validate(self, attrs):
         # Enforce unique_together with nice message
         main_code = attrs.get("main_code") or getattr(self.instance, "main_code", None)
         artifact_no = attrs.get("artifact_no") or getattr(self.instance, "artifact_no", None)
-        if main_code and artifact_no:
-            qs = Artifact.objects.filter(main_code=main_code, artifact_no=artifact_no)
-            if self.instance:
-                qs = qs.exclude(pk=self.instance.pk)
-            if qs.exists():
-                raise serializers.ValidationError({"artifact_no": "Bu Anakod için bu Buluntu No zaten mevcut."})
+        if not (main_code and artifact_no):
+            return attrs
+        key = (main_code.pk, artifact_no)
+        if self.instance and key == (self.instance.main_code_id, self.instance.artifact_no):
+            return attrs  # number unchanged; the row only collides with itself
+        if Artifact.taken_numbers([key]):
+            raise serializers.ValidationError({"artifact_no": "Bu Anakod için bu Buluntu No zaten mevcut."})
         return attrs
+
+    # Media: data URLs sent by the client are moved into the blob store and
+    # replaced by /api/media/<sha256>/ references before the row is saved.
+
+    def _externalize(self, kind, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Liste olmalıdır.")
+        entries, blobs = externalize_entries(value, get_blob_store())
+        self._media_blobs[kind] = blobs
+        return entries
+
+    def validate_images(self, value):
+        return self._externalize("image", value)
+
+    def validate_drawings(self, value):
+        return self._externalize("drawing", value)
+
+    def run_validation(self, data=serializers.empty):
+        self._media_blobs = {}
+        return super().run_validation(data)
+
+    def _sync_media(self, instance):
+        store = get_blob_store()
+        for kind, blobs in getattr(self, "_media_blobs", {}).items():
+            sync_artifact_media(Media, instance.pk, kind, blobs, store)
+
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        self._sync_media(instance)
+        return instance
+
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        self._sync_media(instance)
+        return instance
+
+
+class ArtifactListSerializer(ArtifactSerializer):
+    """Compact row for list pages: no JSON, media or long text columns."""
+
+    class Meta(ArtifactSerializer.Meta):
+        fields = [
+            "id",
+            "main_code",
+            "main_code_code",
+            "main_code_finding_place",
+            "artifact_no",
+            "full_artifact_no",
+            "artifact_date",
+            "form_type",
+            "production_material",
+            "period",
+            "is_active",
+            "is_inventory",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class MediaSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    url = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Media
+        list_serializer_class = TimedListSerializer
+        fields = ["id", "artifact", "kind", "sha256", "url", "content_type", "size", "name", "position", "created_at"]
+        read_only_fields = fields
+
+
+class ExportJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id", "kind", "format", "params", "status", "progress", "error",
+            "result_name", "content_type", "size", "result_url",
+            "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_result_url(self, obj):
+        if obj.status != ExportJob.DONE:
+            return None
+        url = f"/api/export-jobs/{obj.pk}/result/"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
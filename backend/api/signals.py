@@ -0,0 +1,48 @@
+"""Keeps API-side caches in step with model changes."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import Artifact, MainCode
+from .render_cache import get_render_cache
+from .response_cache import ARTIFACTS_TAG, MAIN_CODES_TAG, artifacts_tag, bump_tags
+
+
+@receiver(post_save, sender=Artifact)
+@receiver(post_delete, sender=Artifact)
+def drop_artifact_renders(sender, instance, **kwargs):
+    get_render_cache().invalidate([instance.pk])
+
+
+@receiver(post_save, sender=MainCode)
+@receiver(post_delete, sender=MainCode)
+def drop_main_code_renders(sender, instance, **kwargs):
+    # Artifact exports show the main code's finding place.
+    artifact_ids = Artifact.objects.filter(main_code_id=instance.pk).values_list("id", flat=True)
+    get_render_cache().invalidate(artifact_ids.iterator())
+
+
+@receiver(pre_save, sender=Artifact)
+def remember_main_code(sender, instance, raw=False, update_fields=None, **kwargs):
+    # A moved artifact leaves its old main code's lists too.
+    instance._old_main_code_id = None
+    if instance.pk and not raw and (update_fields is None or "main_code" in update_fields):
+        instance._old_main_code_id = (
+            Artifact.objects.filter(pk=instance.pk).values_list("main_code_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Artifact)
+@receiver(post_delete, sender=Artifact)
+def drop_artifact_lists(sender, instance, **kwargs):
+    old = getattr(instance, "_old_main_code_id", None)
+    tags = [ARTIFACTS_TAG, artifacts_tag(instance.main_code_id)]
+    if old and old != instance.main_code_id:
+        tags.append(artifacts_tag(old))
+    bump_tags(*tags)
+
+
+@receiver(post_save, sender=MainCode)
+@receiver(post_delete, sender=MainCode)
+def drop_main_code_lists(sender, instance, **kwargs):
+    # Artifact rows show their main code's code and finding place.
+    bump_tags(MAIN_CODES_TAG, ARTIFACTS_TAG, artifacts_tag(instance.pk))
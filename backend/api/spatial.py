@@ -0,0 +1,138 @@
+"""Site-map queries over main-code coordinates (``MainCode.lat`` / ``lon``).
+
+Coordinates are parsed from the free-text ``gis`` field on save
+(:mod:`core.geo`) and indexed with a plain B-tree on ``(lat, lon)``, so a
+bounding box is an index range scan and no PostGIS is needed.
+
+Grid aggregation snaps main codes to square cells whose size follows the
+web-map zoom level (``GRID_CELLS_PER_TILE`` cells per 256 px tile side) and
+sums their artifact counts in one grouped query; each main code's count is a
+correlated index-only count, so joined rows never multiply the groups.
+Cells are in degrees of latitude/longitude, which is accurate enough at
+excavation scale.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Floor, Trim, Upper
+
+from core.models import Artifact
+
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+MAP_MAX_POINTS = 5000
+GRID_MAX_ZOOM = 22
+GRID_CELLS_PER_TILE = 4
+
+
+class InvalidBBox(ValueError):
+    pass
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """``min_lon,min_lat,max_lon,max_lat`` (Leaflet ``toBBoxString`` order)."""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(p) for p in value.split(","))
+    except ValueError:
+        raise InvalidBBox("bbox 'min_lon,min_lat,max_lon,max_lat' biçiminde olmalıdır.")
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise InvalidBBox("bbox sınırları geçersiz (min <= max, boylam ±180, enlem ±90).")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def in_bbox(qs, bbox: Optional[BBox]):
+    """Main codes with coordinates, inside ``bbox`` when given."""
+    qs = qs.filter(lat__isnull=False)
+    if bbox is None:
+        return qs
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return qs.filter(lat__gte=min_lat, lat__lte=max_lat, lon__gte=min_lon, lon__lte=max_lon)
+
+
+def cell_size(zoom: int) -> float:
+    """Cell edge in degrees at web-map ``zoom``."""
+    return 360.0 / (2 ** zoom) / GRID_CELLS_PER_TILE
+
+
+def _with_artifact_counts(main_codes, artifacts=None):
+    if artifacts is None:
+        artifacts = Artifact.objects.all()
+    counts = (
+        artifacts.filter(main_code=OuterRef("pk"))
+        .order_by()
+        .values("main_code")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    return main_codes.order_by().annotate(
+        n_artifacts=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+def _groups(qs, filtered: bool) -> List[Dict[str, Any]]:
+    rows = qs.annotate(
+        main_codes=Count("pk", filter=Q(n_artifacts__gt=0)) if filtered else Count("pk"),
+        artifacts=Sum("n_artifacts"),
+        lat_avg=Avg("lat"),
+        lon_avg=Avg("lon"),
+    )
+    if filtered:
+        # Only cells holding matching artifacts.
+        rows = rows.filter(artifacts__gt=0)
+    return list(rows)
+
+
+def _center(row: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    if row["lat_avg"] is None:
+        return None
+    return {"lat": round(row["lat_avg"], 7), "lon": round(row["lon_avg"], 7)}
+
+
+def grid_cells(main_codes, zoom: int, bbox: Optional[BBox], artifacts=None) -> List[Dict[str, Any]]:
+    """Artifact / main-code counts per grid cell at ``zoom``.
+
+    ``artifacts`` is a filtered artifact queryset; cells without any of its
+    artifacts are left out.
+    """
+    size = cell_size(zoom)
+    qs = _with_artifact_counts(in_bbox(main_codes, bbox), artifacts)
+    qs = qs.values(cx=Floor(F("lon") / size), cy=Floor(F("lat") / size))
+    cells = []
+    for row in _groups(qs, artifacts is not None):
+        x, y = int(row["cx"]), int(row["cy"])
+        cells.append({
+            "cell": f"{zoom}/{x}/{y}",
+            "bbox": [x * size, y * size, (x + 1) * size, (y + 1) * size],
+            "center": _center(row),
+            "main_codes": row["main_codes"],
+            "artifacts": row["artifacts"] or 0,
+        })
+    cells.sort(key=lambda c: c["cell"])
+    return cells
+
+
+def plan_square_counts(main_codes, bbox: Optional[BBox], artifacts=None) -> List[Dict[str, Any]]:
+    """Artifact / main-code counts per plan square (trimmed, upper-cased).
+
+    Without ``bbox`` main codes lacking coordinates are counted too; their
+    square then has no ``center``.
+    """
+    if bbox is not None:
+        main_codes = in_bbox(main_codes, bbox)
+    qs = _with_artifact_counts(main_codes.filter(~Q(plan_square__isnull=True) & ~Q(plan_square="")), artifacts)
+    qs = qs.values(square=Upper(Trim("plan_square")))
+    squares = [
+        {
+            "plan_square": row["square"],
+            "center": _center(row),
+            "main_codes": row["main_codes"],
+            "artifacts": row["artifacts"] or 0,
+        }
+        for row in _groups(qs, artifacts is not None)
+    ]
+    squares.sort(key=lambda s: s["plan_square"])
+    return squares
@@ -0,0 +1,164 @@
+"""Delta-sync feed (``/api/artifacts/changes/``, ``/api/main-codes/changes/``).
+
+Triggers stamp each inserted/updated row with the id of the writing
+transaction (``change_xid``) and record deletes in :class:`core.models.Tombstone`
+(migration 0011). The feed walks both in ``(change_xid, id)`` order over
+their indexes and returns upserted rows and deleted ids after the client's
+token.
+
+Transaction ids are handed out when a transaction starts writing, not when
+it commits, so a row can become visible behind rows the client has already
+seen. The token therefore carries a *floor*: the lowest transaction id that
+was still running (``pg_snapshot_xmin``) during the round. Once a round is
+exhausted, the next one restarts from that floor and takes a new one. Rows
+written since then may be sent twice (clients upsert by id), but none are
+skipped.
+
+Tokens are opaque base64 JSON. Tombstones are kept for
+``SYNC_TOMBSTONE_DAYS``; an older token gets 410 and the client must run a
+full sync (no ``since``).
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.models import Tombstone
+
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 2000
+
+
+class InvalidToken(Exception):
+    pass
+
+
+@dataclass
+class SyncToken:
+    floor: int = 0
+    xid: int = 0
+    pk: int = 0
+    issued: float = 0.0
+
+    def encode(self) -> str:
+        raw = json.dumps([self.floor, self.xid, self.pk, int(self.issued)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "SyncToken":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            floor, xid, pk, issued = json.loads(raw.decode("ascii"))
+            return cls(int(floor), int(xid), int(pk), float(issued))
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+            raise InvalidToken()
+
+
+def snapshot_xmin() -> int:
+    """Lowest transaction id still running; everything below it is final."""
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cur.fetchone()[0]
+
+
+def _after(xid_field: str, pk_field: str, xid: int, pk: int) -> Q:
+    # Row-value "> (xid, pk)", with an inclusive bound on the leading column
+    # so the (change_xid, id) index is range scanned.
+    return Q(**{f"{xid_field}__gte": xid}) & (
+        Q(**{f"{xid_field}__gt": xid}) | Q(**{xid_field: xid, f"{pk_field}__gt": pk})
+    )
+
+
+def changes_page(queryset, token: Optional[SyncToken], limit: int) -> Tuple[List[Any], List[int], SyncToken, bool]:
+    """``(rows, deleted_ids, next_token, has_more)`` after ``token``."""
+    floor = snapshot_xmin()
+    if token is None:
+        token = SyncToken(issued=time.time())
+    elif token.pk:
+        # Continuing a round: keep its lowest floor.
+        floor = min(floor, token.floor)
+
+    model_name = queryset.model._meta.model_name
+    rows = list(
+        queryset.filter(_after("change_xid", "pk", token.xid, token.pk)).order_by("change_xid", "pk")[: limit + 1]
+    )
+    tombstones = list(
+        Tombstone.objects.filter(model=model_name)
+        .filter(_after("change_xid", "object_id", token.xid, token.pk))
+        .order_by("change_xid", "object_id")
+        .values_list("change_xid", "object_id")[: limit + 1]
+    )
+
+    merged = sorted(
+        [(row.change_xid, row.pk, row) for row in rows] + [(xid, pk, None) for xid, pk in tombstones],
+        key=lambda item: (item[0], item[1]),
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    if has_more:
+        last_xid, last_pk, _ = merged[-1]
+        next_token = SyncToken(floor, last_xid, last_pk, token.issued)
+    else:
+        next_token = SyncToken(floor, floor, 0, time.time())
+
+    upserted = [row for _, _, row in merged if row is not None]
+    deleted = [pk for _, pk, row in merged if row is None]
+    return upserted, deleted, next_token, has_more
+
+
+def purge_tombstones() -> int:
+    """Deletes tombstones no valid token can still need; returns the count."""
+    # One extra day covers transactions that ran across the token's issue time.
+    cutoff = timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+class ChangesFeedMixin:
+    """Adds ``GET <list>/changes/?since=<token>&limit=``."""
+
+    def changes_queryset(self):
+        return self.queryset.model.objects.all()
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        since = request.query_params.get("since") or ""
+        token = None
+        if since:
+            try:
+                token = SyncToken.decode(since)
+            except InvalidToken:
+                return Response({"detail": "Geçersiz since belirteci."}, status=status.HTTP_400_BAD_REQUEST)
+            if time.time() - token.issued > settings.SYNC_TOMBSTONE_DAYS * 86400:
+                return Response(
+                    {"detail": "Belirteç çok eski; tam senkronizasyon gerekli (since olmadan)."},
+                    status=status.HTTP_410_GONE,
+                )
+
+        try:
+            limit = int(request.query_params.get("limit") or SYNC_DEFAULT_LIMIT)
+        except ValueError:
+            limit = SYNC_DEFAULT_LIMIT
+        limit = max(1, min(limit, SYNC_MAX_LIMIT))
+
+        rows, deleted, next_token, has_more = changes_page(self.changes_queryset(), token, limit)
+        return Response({
+            "upserted": self.get_serializer(rows, many=True).data,
+            "deleted": deleted,
+            "next": next_token.encode(),
+            "has_more": has_more,
+        })
@@ -0,0 +1,189 @@
+"""Synthetic excavation data for benchmarks (``manage.py seed_synthetic``).
+
+Rows are generated from a seeded ``random.Random`` so the same arguments
+always give the same dataset, and are written with ``bulk_create`` in
+batches. Values follow the shapes the UI writes (``artifactSchemas.js``):
+form-specific ``details`` keys, measurements with unit keys, Turkish free
+text for search, GIS coordinates around one site.
+
+Bulk inserts bypass model signals, so the facet summary, artifact-number
+sequences and list-cache tags are updated explicitly, as in
+:mod:`api.imports`.
+"""
+from __future__ import annotations
+
+import datetime
+import random
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.db import transaction
+
+from core.facets import record_created
+from core.models import Artifact, ArtifactNumberSequence, MainCode
+from .response_cache import ARTIFACTS_TAG, MAIN_CODES_TAG, artifacts_tag, bump_tags
+
+SEED_BATCH_SIZE = 5000
+
+# Share of each form type; every type of Artifact.FORM_TYPES is present.
+FORM_WEIGHTS = {"GENEL": 40, "SERAMIK": 35, "SIKKE": 20, "MEZAR": 5}
+
+PLACES = (
+    "Akropol", "Agora", "Tiyatro", "Nekropol", "Hamam", "Liman", "Bazilika",
+    "Stadyum", "Sur Kapısı", "Kilise", "Sarnıç", "Höyük Eteği",
+)
+MATERIALS = ("Pişmiş Toprak", "Bronz", "Gümüş", "Altın", "Cam", "Kemik", "Mermer", "Demir", "Kurşun", "Taş")
+PERIODS = ("Hellenistik", "Roma", "Geç Roma", "Bizans", "Beylikler", "Osmanlı", "Demir Çağı", "Tunç Çağı")
+SHAPES = ("Tam", "Parça", "Kırık", "Ağız Parçası", "Kaide", "Kulp", "Gövde Parçası")
+COLORS = ("Kırmızı", "Kahverengi", "Devetüyü", "Gri", "Siyah", "Krem", "Turuncu", "Pembe")
+EMPERORS = ("Augustus", "Hadrianus", "Traianus", "Constantinus I", "Iustinianus I", "Theodosius II")
+MINTS = ("Roma", "Antiokheia", "Nikomedia", "Kyzikos", "Konstantinopolis", "Thessalonike")
+GRAVE_TYPES = ("Kiremit Mezar", "Taş Sanduka", "Basit Toprak", "Küp Mezar", "Lahit")
+WORDS = (
+    "buluntu", "kazı", "açma", "tabaka", "dolgu", "duvar", "taban", "seviye", "bezeme", "kazıma",
+    "boya", "astar", "sır", "kulp", "ağız", "kaide", "çark", "yapım", "iz", "yanık", "onarım", "kırık",
+)
+
+SITE_LAT, SITE_LON = 39.9208, 32.8541
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _measure(rng: random.Random, low: float, high: float) -> str:
+    # The UI stores user input, so some values use a decimal comma.
+    value = f"{rng.uniform(low, high):.1f}"
+    return value.replace(".", ",") if rng.random() < 0.2 else value
+
+
+def main_code_row(rng: random.Random) -> Dict[str, Any]:
+    place = rng.choice(PLACES)
+    row: Dict[str, Any] = {
+        "finding_place": f"{place} {rng.randint(1, 40)}",
+        "plan_square": f"{rng.choice('ABCDEFGHJK')}{rng.randint(1, 20)}",
+        "description": _text(rng, rng.randint(6, 20)),
+        "layer": f"Tabaka {rng.randint(1, 9)}",
+        "level": f"-{rng.uniform(0.2, 6):.2f} m",
+    }
+    if place == "Nekropol":
+        row["grave_no"] = f"M{rng.randint(1, 400)}"
+    if rng.random() < 0.8:
+        row["gis"] = f"{SITE_LAT + rng.uniform(-0.02, 0.02):.6f}, {SITE_LON + rng.uniform(-0.02, 0.02):.6f}"
+    return row
+
+
+def _details(rng: random.Random, form_type: str) -> Dict[str, Any]:
+    if form_type == "SIKKE":
+        return {
+            "condition": rng.choice(("İyi", "Orta", "Aşınmış")),
+            "unit": rng.choice(("Follis", "Denarius", "Solidus", "Nummus")),
+            "diameter": _measure(rng, 8, 32),
+            "diameter_unit": "mm",
+            "mold_direction": f"{rng.randint(1, 12)} h",
+            "emperor": rng.choice(EMPERORS),
+            "minting_year": f"MS {rng.randint(1, 600)}",
+            "front_face_definition": _text(rng, 8),
+            "back_face_definition": _text(rng, 8),
+            "mint": rng.choice(MINTS),
+            "weight": _measure(rng, 1, 20),
+            "weight_unit": "gr",
+        }
+    if form_type == "SERAMIK":
+        return {
+            "clay_color": rng.choice(COLORS),
+            "surface_color": rng.choice(COLORS),
+            "undercoat_color": rng.choice(COLORS),
+            "clay_definition": _text(rng, 10),
+            "form_definition": _text(rng, 10),
+            "surface_quality": rng.randint(0, 2),
+            "baking": rng.randint(0, 2),
+            "texture": rng.randint(0, 2),
+            "pore": rng.randint(0, 2),
+        }
+    if form_type == "MEZAR":
+        return {
+            "grave_type": rng.choice(GRAVE_TYPES),
+            "burial_form": rng.choice(("Hocker", "Sırtüstü", "Yan")),
+            "burial_type": rng.choice(("Tekil", "Çoklu")),
+            "depth": f"{rng.uniform(0.5, 3):.2f} m",
+            "direction": rng.choice(("D-B", "K-G", "KD-GB")),
+            "grave_artifacts": _text(rng, 12),
+        }
+    return {}
+
+
+def _measurements(rng: random.Random) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key in ("height", "length", "width", "wall_thickness", "nozzle_diameter", "base_diameter"):
+        if rng.random() < 0.5:
+            out[key] = _measure(rng, 0.3, 45)
+            out[f"{key}_unit"] = rng.choice(("mm", "cm", "cm", "cm"))
+    return out
+
+
+def artifact_row(rng: random.Random, day0: datetime.date) -> Dict[str, Any]:
+    form_type = rng.choices(tuple(FORM_WEIGHTS), weights=tuple(FORM_WEIGHTS.values()))[0]
+    row: Dict[str, Any] = {
+        "artifact_date": day0 + datetime.timedelta(days=rng.randint(0, 3650)),
+        "form_type": form_type,
+        "production_material": rng.choice(MATERIALS),
+        "period": rng.choice(PERIODS),
+        "finding_shape": rng.choice(SHAPES),
+        "level": f"-{rng.uniform(0.2, 6):.2f} m",
+        "piece_date": rng.choice(("MÖ 2. yy", "MS 1. yy", "MS 4. yy", "MS 6. yy", "")),
+        "notes": _text(rng, rng.randint(5, 40)),
+        "is_active": rng.random() < 0.95,
+        "is_inventory": rng.random() < 0.15,
+        "details": _details(rng, form_type),
+        "measurements": _measurements(rng),
+    }
+    if row["is_inventory"]:
+        row["museum_inv_no"] = f"{rng.randint(1, 9)}.{rng.randint(1, 9999)}.{rng.randint(1990, 2025)}"
+    return row
+
+
+def _batched(total: int, size: int) -> Iterator[int]:
+    while total > 0:
+        yield min(size, total)
+        total -= size
+
+
+def seed(
+    main_codes: int,
+    artifacts: int,
+    seed_value: int = 42,
+    batch_size: int = SEED_BATCH_SIZE,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, int]:
+    """Creates ``main_codes`` main codes and ``artifacts`` artifacts spread over them."""
+    rng = random.Random(seed_value)
+    say = progress or (lambda msg: None)
+
+    created_codes: List[int] = []
+    for n in _batched(main_codes, batch_size):
+        rows = [main_code_row(rng) for _ in range(n)]
+        created_codes += [mc.pk for mc in MainCode.bulk_create_with_codes(rows)]
+        say(f"{len(created_codes)}/{main_codes} main codes")
+    if not created_codes:
+        return {"main_codes": 0, "artifacts": 0}
+
+    # Skewed spread: a few trenches hold most of the finds.
+    weights = [rng.paretovariate(1.2) for _ in created_codes]
+    day0 = datetime.date(2015, 5, 1)
+    done = 0
+    for n in _batched(artifacts, batch_size):
+        owners = rng.choices(created_codes, weights=weights, k=n)
+        counts: Dict[int, int] = {}
+        for mc in owners:
+            counts[mc] = counts.get(mc, 0) + 1
+        with transaction.atomic():
+            numbers = ArtifactNumberSequence.allocate(counts)
+            objs = [Artifact(main_code_id=mc, artifact_no=numbers[mc].pop(0), **artifact_row(rng, day0)) for mc in owners]
+            Artifact.objects.bulk_create(objs, batch_size=1000)
+            record_created(objs)
+        done += n
+        say(f"{done}/{artifacts} artifacts")
+
+    # bulk_create sends no post_save signals
+    bump_tags(MAIN_CODES_TAG, ARTIFACTS_TAG, *(artifacts_tag(mc) for mc in created_codes))
+    return {"main_codes": len(created_codes), "artifacts": done}
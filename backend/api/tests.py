@@ -0,0 +1,47 @@
+import datetime
+
+from django.test import TestCase
+
+from core.models import Artifact, MainCode
+from .artifact_rows import artifact_data, artifact_rows, instance_row
+from .serializers import ArtifactSerializer
+
+FORM_DETAILS = {
+    "GENEL": ({}, {}),
+    "SIKKE": ({"diameter": "21", "obverse": "Büst, sağa", "mint": "Nikaia"}, {"weight": "3.2"}),
+    "SERAMIK": ({"technique": "Çark", "slip": "Kırmızı astar"}, {"height": "12", "rim_diameter": "8.5"}),
+    "MEZAR": ({"grave_type": "Kiremit", "skeleton": {"position": "Sırtüstü", "orientation": "D-B"}}, {}),
+}
+
+
+class ArtifactDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mc = MainCode.objects.create(code="AAA", finding_place="Tepe Nekropol, Açma 3")
+        for no, (form_type, (details, measurements)) in enumerate(FORM_DETAILS.items(), start=1):
+            Artifact.objects.create(
+                main_code=mc,
+                artifact_no=no,
+                artifact_date=datetime.date(2024, 5, no),
+                form_type=form_type,
+                period="Roma",
+                notes="Kırık parça" if no % 2 else "",
+                details=details,
+                measurements=measurements,
+                images=[{"id": "a1", "url": "/media/a1.jpg"}] if no == 2 else [],
+            )
+
+    def assertSameData(self, data, expected):
+        self.assertEqual(data, expected)
+        self.assertEqual(list(data), list(expected))
+
+    def test_instance_row_matches_serializer(self):
+        for artifact in Artifact.objects.select_related("main_code"):
+            with self.subTest(form_type=artifact.form_type):
+                self.assertSameData(artifact_data(instance_row(artifact)), ArtifactSerializer(artifact).data)
+
+    def test_values_row_matches_serializer(self):
+        qs = Artifact.objects.select_related("main_code").order_by("artifact_no")
+        for row, artifact in zip(artifact_rows(qs), qs):
+            with self.subTest(form_type=artifact.form_type):
+                self.assertSameData(artifact_data(row), ArtifactSerializer(artifact).data)
@@ -1,14 +1,25 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import health, routes
-from .viewsets import MainCodeViewSet, ArtifactViewSet
+from .views import cache_stats, health, media_blob, metrics, routes
+from .viewsets import MainCodeViewSet, ArtifactViewSet, ExportJobViewSet
 
 router = DefaultRouter()
 router.register(r"main-codes", MainCodeViewSet, basename="maincode")
 router.register(r"artifacts", ArtifactViewSet, basename="artifact")
+router.register(r"export-jobs", ExportJobViewSet, basename="exportjob")
+
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    from .async_views import wrap_routes
+
+    router_urls = wrap_routes(router_urls)
 
 urlpatterns = [
     path("health/", health, name="health"),
+    path("metrics/", metrics, name="metrics"),
     path("routes/", routes, name="routes"),
-    path("", include(router.urls)),
+    path("cache-stats/", cache_stats, name="cache-stats"),
+    re_path(r"^media/(?P<sha256>[0-9a-f]{64})/$", media_blob, name="media-blob"),
+    path("", include(router_urls)),
 ]
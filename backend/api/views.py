@@ -1,6 +1,13 @@
+from django.http import FileResponse, Http404, HttpResponse
+from django.views.decorators.http import condition, require_GET
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core.media import DEFAULT_CONTENT_TYPE, get_blob_store
+from core.models import Media
+from . import metrics as api_metrics
+from .response_cache import cache_stats as list_cache_stats
+
 @api_view(["GET"])
 def health(request):
     return Response({"status": "ok"})
@@ -13,3 +20,36 @@ def routes(request):
     return Response({
         "artifact_extra_actions": [a.url_path for a in ArtifactViewSet.get_extra_actions()],
     })
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint, summed over all gunicorn workers."""
+    if api_metrics.prometheus_client is None:
+        return HttpResponse("prometheus-client yüklü değil.\n", status=503, content_type="text/plain; charset=utf-8")
+    if not api_metrics.enabled():
+        raise Http404
+    return HttpResponse(api_metrics.render_latest(), content_type=api_metrics.CONTENT_TYPE)
+
+
+@api_view(["GET"])
+def cache_stats(request):
+    """Hit/miss counters of the shared list-response cache."""
+    return Response(list_cache_stats())
+
+
+@require_GET
+@condition(etag_func=lambda request, sha256: sha256)
+def media_blob(request, sha256):
+    """Serves a blob from the content-addressed store; content never changes."""
+    store = get_blob_store()
+    if not store.exists(sha256):
+        raise Http404
+    media = Media.objects.filter(sha256=sha256).only("content_type", "name").first()
+    resp = FileResponse(
+        store.open(sha256),
+        content_type=media.content_type if media else DEFAULT_CONTENT_TYPE,
+        filename=media.name if media and media.name else "",
+    )
+    resp["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
@@ -2,85 +2,59 @@ from __future__ import annotations
 
 import csv
 import io
-import json
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List
 
-from django.db.models import Q
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.http import FileResponse
+from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from core.models import Artifact, MainCode
-from .serializers import ArtifactSerializer, MainCodeSerializer
-
-
-def _flatten(prefix: str, obj: Any, out: Dict[str, str]) -> None:
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            _flatten(f"{prefix}{k}.", v, out)
-        return
-
-    if isinstance(obj, list):
-        # keep as JSON to preserve structure
-        out[prefix[:-1]] = json.dumps(obj, ensure_ascii=False)
-        return
-
-    out[prefix[:-1]] = "" if obj is None else str(obj)
-
-
-def _artifact_kv(artifact: Artifact) -> List[Tuple[str, str]]:
-    s = ArtifactSerializer(artifact).data
-
-    # Add some convenient denormalized fields explicitly on top
-    base: Dict[str, Any] = {
-        "full_artifact_no": s.get("full_artifact_no"),
-        "main_code": s.get("main_code_code"),
-        "main_code_finding_place": s.get("main_code_finding_place"),
-        "artifact_no": s.get("artifact_no"),
-        "artifact_date": s.get("artifact_date"),
-        "form_type": s.get("form_type"),
-        "production_material": s.get("production_material"),
-        "period": s.get("period"),
-        "piece_date": s.get("piece_date"),
-        "notes": s.get("notes"),
-        "source_and_reference": s.get("source_and_reference"),
-        "is_active": s.get("is_active"),
-        "is_inventory": s.get("is_inventory"),
-    }
-
-    # Include the rest (details / measurements / media etc.)
-    remainder = {
-        "details": s.get("details") or {},
-        "measurements": s.get("measurements") or {},
-        "images": s.get("images") or [],
-        "drawings": s.get("drawings") or [],
-        "created_at": s.get("created_at"),
-        "updated_at": s.get("updated_at"),
-    }
-
-    flat: Dict[str, str] = {}
-    for k, v in base.items():
-        flat[k] = "" if v is None else str(v)
-
-    for k, v in remainder.items():
-        _flatten(f"{k}.", v, flat)
-
-    # stable ordering: base first, then the rest alphabetically
-    ordered: List[Tuple[str, str]] = []
-    for k in base.keys():
-        ordered.append((k, flat.get(k, "")))
-
-    rest_keys = [k for k in flat.keys() if k not in base.keys()]
-    for k in sorted(rest_keys):
-        ordered.append((k, flat[k]))
-
-    return ordered
-
-
-def _artifact_sections(artifact: Artifact) -> Dict[str, Any]:
-    """Return serializer data split into UI-like sections."""
-    s = ArtifactSerializer(artifact).data
+from core.facets import deferred_facets, live_facets, summary_facets
+from core.media import DEFAULT_CONTENT_TYPE, KIND_FIELDS, get_blob_store, media_url
+from core.models import Artifact, ArtifactFacetCount, ArtifactNumberSequence, ExportJob, MainCode, Media
+from . import pdf_render, render_pool
+from .artifact_rows import artifact_data, flatten_artifact, instance_row
+from .conditional import ConditionalGetMixin, latest, make_etag, not_modified, normalized_query, set_validators
+from .exports import BULK_EXPORT_FORMATS, bulk_export_response
+from .filters import filter_artifacts, filter_main_codes, has_artifact_filters
+from .imports import ImportFileError, import_artifacts, iter_upload_rows
+from .jobs import enqueue
+from .metrics import observe_export
+from .render_cache import get_render_cache, render_key
+from .response_cache import ARTIFACTS_TAG, MAIN_CODES_TAG, ResponseCacheMixin, artifacts_tag, bump_tags
+from .search import (
+    ARTIFACT_SUGGEST_FIELDS,
+    MAIN_CODE_SUGGEST_FIELDS,
+    SUGGEST_DEFAULT_LIMIT,
+    SUGGEST_MAX_LIMIT,
+    suggest_values,
+)
+from .serializers import (
+    ArtifactListSerializer,
+    ArtifactSerializer,
+    ExportJobSerializer,
+    MainCodeSerializer,
+    MediaSerializer,
+)
+from .spatial import (
+    GRID_MAX_ZOOM,
+    MAP_MAX_POINTS,
+    InvalidBBox,
+    cell_size,
+    grid_cells,
+    in_bbox,
+    parse_bbox,
+    plan_square_counts,
+)
+from .sync import ChangesFeedMixin
+
+
+def _artifact_sections(s: Dict[str, Any]) -> Dict[str, Any]:
+    """Return serialized artifact data (``artifact_data``) split into UI-like sections."""
     return {
         "general": {
             "Tam Buluntu No": s.get("full_artifact_no") or "",
@@ -104,8 +78,8 @@ def _artifact_sections(artifact: Artifact) -> Dict[str, Any]:
     }
 
 
-def _artifact_html(artifact: Artifact) -> str:
-    sec = _artifact_sections(artifact)
+def _artifact_html(s: Dict[str, Any]) -> str:
+    sec = _artifact_sections(s)
 
     def esc(x: Any) -> str:
         return (
@@ -229,128 +203,339 @@ td.v{color:#0f172a}
 
 
 
-class MainCodeViewSet(viewsets.ModelViewSet):
+# Upper bound for one bulk main-code allocation request.
+MAX_BULK_MAIN_CODES = 2000
+# Upper bounds for check-unique-batch pairs and next-free numbers.
+CHECK_UNIQUE_MAX_PAIRS = 1000
+NEXT_FREE_MAX_COUNT = 1000
+# Upper bound for one bulk artifact create request.
+MAX_BULK_ARTIFACTS = 500
+
+DUPLICATE_ARTIFACT_NO = "Bu Anakod için bu Buluntu No zaten mevcut."
+
+# -- single-artifact export renders ------------------------------------------
+
+# format: (content type, file extension)
+ARTIFACT_EXPORT_FORMATS = {
+    "html": ("text/html; charset=utf-8", "html"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "pdf": ("application/pdf", "pdf"),
+    "pdf_reportlab": ("application/pdf", "pdf"),
+}
+
+
+class ExportUnavailable(Exception):
+    """A library needed for the requested format is missing."""
+
+
+def _artifact_csv(s: Dict[str, Any]) -> bytes:
+    sio = io.StringIO()
+    w = csv.writer(sio)
+    w.writerow(["field", "value"])
+    for k, v in flatten_artifact(s):
+        w.writerow([k, v])
+    return sio.getvalue().encode("utf-8-sig")  # excel-friendly BOM
+
+
+def _artifact_xlsx(s: Dict[str, Any]) -> bytes:
+    try:
+        from openpyxl import Workbook
+    except Exception:
+        raise ExportUnavailable("openpyxl yüklü değil.")
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Artifact"
+    ws.append(["field", "value"])
+    for k, v in flatten_artifact(s):
+        ws.append([k, v])
+
+    bio = io.BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def render_artifact_export(artifact: Artifact, fmt: str, base_url: str, use_pool: bool = False) -> bytes:
+    """Renders one artifact in ``fmt`` (a key of ARTIFACT_EXPORT_FORMATS).
+
+    With ``use_pool`` PDFs are rendered by the warm render pool (may raise
+    ``RenderTimeout``); otherwise in this process.
+    """
+    with observe_export("artifact", fmt):
+        return _render_artifact_export(artifact, fmt, base_url, use_pool)
+
+
+def _render_artifact_export(artifact: Artifact, fmt: str, base_url: str, use_pool: bool) -> bytes:
+    filename_base = artifact.full_artifact_no or f"artifact-{artifact.pk}"
+    # Plain dict, built once per render, so it can be sent to a render pool process.
+    data = artifact_data(instance_row(artifact))
+    if fmt == "html":
+        return _artifact_html(data).encode("utf-8")
+    if fmt == "csv":
+        return _artifact_csv(data)
+    if fmt == "xlsx":
+        return _artifact_xlsx(data)
+
+    run = render_pool.render if use_pool else _render_inline
+    try:
+        if fmt == "pdf_reportlab":
+            # HTML→PDF (WeasyPrint); falls back to ReportLab if WeasyPrint or
+            # its system libraries are not available.
+            return run("render_pdf", _artifact_html(data), base_url, data, filename_base)
+        return run("render_reportlab", data, filename_base)
+    except pdf_render.RenderUnavailable as exc:
+        raise ExportUnavailable(str(exc))
+
+
+def _render_inline(func_name: str, *args: Any) -> bytes:
+    return getattr(pdf_render, func_name)(*args)
+
+
+def _export_format(request) -> str:
+    # Client should prefer `?export=`. We also accept `?format=` if URL_FORMAT_OVERRIDE is disabled.
+    fmt = (request.query_params.get("export") or request.query_params.get("format") or "csv").lower().strip()
+    return "xlsx" if fmt == "excel" else fmt
+
+
+def _job_response(request, job: ExportJob) -> Response:
+    return Response(
+        ExportJobSerializer(job, context={"request": request}).data,
+        status=status.HTTP_200_OK if job.status == ExportJob.DONE else status.HTTP_202_ACCEPTED,
+    )
+
+
+def _queue_catalog(request, params: Dict[str, Any]) -> Response:
+    job = ExportJob.objects.create(kind=ExportJob.KIND_CATALOG, format="pdf", params=params)
+    return _job_response(request, enqueue(job))
+
+
+def _suggest_response(request, qs, fields) -> Response:
+    field = request.query_params.get("field") or ""
+    term = (request.query_params.get("q") or "").strip()
+    if field not in fields:
+        return Response(
+            {"detail": f"field desteklenmiyor. {' | '.join(fields)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        limit = int(request.query_params.get("limit") or SUGGEST_DEFAULT_LIMIT)
+    except ValueError:
+        limit = SUGGEST_DEFAULT_LIMIT
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+    if not term:
+        return Response({"field": field, "results": []})
+    return Response({"field": field, "results": suggest_values(qs, field, term, limit)})
+
+
+class MainCodeViewSet(ChangesFeedMixin, ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = MainCode.objects.all().order_by("-created_at")
     serializer_class = MainCodeSerializer
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        qp = self.request.query_params
-
-        code = qp.get("code")
-        if code:
-            qs = qs.filter(code__icontains=code)
-
-        finding_place = qp.get("finding_place")
-        if finding_place:
-            qs = qs.filter(finding_place__icontains=finding_place)
-
-        q = qp.get("q")
-        if q:
-            qs = qs.filter(
-                Q(code__icontains=q)
-                | Q(finding_place__icontains=q)
-                | Q(plan_square__icontains=q)
-                | Q(description__icontains=q)
-                | Q(layer__icontains=q)
-                | Q(level__icontains=q)
-                | Q(grave_no__icontains=q)
-                | Q(gis__icontains=q)
-            )
-
-        ordering = qp.get("ordering")
-        allowed = {"created_at", "-created_at", "code", "-code"}
-        if ordering in allowed:
-            qs = qs.order_by(ordering)
+    def list_cache_tags(self, request):
+        return [MAIN_CODES_TAG]
 
-        return qs
+    def get_queryset(self):
+        return filter_main_codes(super().get_queryset(), self.request.query_params)
 
     def perform_create(self, serializer):
         # code is assigned automatically
         code = MainCode.allocate_next_code()
         serializer.save(code=code)
 
+    @action(detail=True, methods=["post"], url_path="catalog")
+    def catalog(self, request, pk=None):
+        """Queue a catalog PDF of every artifact of this main code."""
+        mc = self.get_object()
+        return _queue_catalog(request, {
+            "main_code": str(mc.pk),
+            "title": f"{mc.code} Buluntu Kataloğu",
+            "subtitle": mc.finding_place or "",
+        })
+
+    @action(detail=False, methods=["post"], url_path="bulk-allocate")
+    def bulk_allocate(self, request):
+        """Create many main codes at once.
+
+        Body: ``{"items": [{...}, ...]}`` or ``{"count": N, "defaults": {...}}``.
+        Codes are the next free ones in code order, taken in one transaction;
+        they skip codes already in use, so they may have gaps.
+        """
+        items = request.data.get("items")
+        if items is None:
+            try:
+                count = int(request.data.get("count") or 0)
+            except (TypeError, ValueError):
+                count = 0
+            if count < 1:
+                return Response({"detail": "items veya count gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+            if count > MAX_BULK_MAIN_CODES:
+                return Response(
+                    {"detail": f"Tek seferde en fazla {MAX_BULK_MAIN_CODES} anakod oluşturulabilir."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            defaults = self.get_serializer(data=request.data.get("defaults") or {})
+            defaults.is_valid(raise_exception=True)
+            rows = [dict(defaults.validated_data) for _ in range(count)]
+        else:
+            if not isinstance(items, list) or not items:
+                return Response({"detail": "items boş olmayan bir liste olmalıdır."}, status=status.HTTP_400_BAD_REQUEST)
+            if len(items) > MAX_BULK_MAIN_CODES:
+                return Response(
+                    {"detail": f"Tek seferde en fazla {MAX_BULK_MAIN_CODES} anakod oluşturulabilir."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            serializer = self.get_serializer(data=items, many=True)
+            serializer.is_valid(raise_exception=True)
+            rows = [dict(row) for row in serializer.validated_data]
 
-class ArtifactViewSet(viewsets.ModelViewSet):
-    queryset = Artifact.objects.select_related("main_code").all().order_by("-created_at")
-    serializer_class = ArtifactSerializer
+        try:
+            created = MainCode.bulk_create_with_codes(rows)
+        except DjangoValidationError as exc:
+            return Response({"detail": " ".join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
+        bump_tags(MAIN_CODES_TAG)
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        qp = self.request.query_params
+        return Response(self.get_serializer(created, many=True).data, status=status.HTTP_201_CREATED)
 
-        # Exact filters
-        main_code = qp.get("main_code")
-        if main_code:
-            qs = qs.filter(main_code_id=main_code)
+    @action(detail=False, methods=["get"], url_path="suggest")
+    def suggest(self, request):
+        """Typeahead: ?field=code|finding_place&q=<text>&limit=10"""
+        return _suggest_response(request, MainCode.objects.all(), MAIN_CODE_SUGGEST_FIELDS)
 
-        form_type = qp.get("form_type")
-        if form_type:
-            qs = qs.filter(form_type=form_type)
+    @action(detail=False, methods=["get"], url_path="bbox")
+    def bbox(self, request):
+        """Map points: ?bbox=min_lon,min_lat,max_lon,max_lat plus the list filters.
+
+        Only main codes whose ``gis`` parsed into coordinates are returned.
+        """
+        try:
+            bbox = parse_bbox(request.query_params.get("bbox"))
+        except InvalidBBox as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        qs = in_bbox(filter_main_codes(MainCode.objects.all(), request.query_params), bbox)
+        rows = list(
+            qs.order_by("code").values("id", "code", "finding_place", "plan_square", "lat", "lon")[: MAP_MAX_POINTS + 1]
+        )
+        truncated = len(rows) > MAP_MAX_POINTS
+        rows = rows[:MAP_MAX_POINTS]
+        return Response({"count": len(rows), "truncated": truncated, "results": rows})
 
-        # Text-ish filters
-        main_code_code = qp.get("main_code_code")
-        if main_code_code:
-            qs = qs.filter(main_code__code__icontains=main_code_code)
 
-        finding_place = qp.get("finding_place")
-        if finding_place:
-            qs = qs.filter(main_code__finding_place__icontains=finding_place)
+class ArtifactViewSet(ChangesFeedMixin, ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Artifact.objects.select_related("main_code").all().order_by("-created_at")
+    serializer_class = ArtifactSerializer
+    # rows show the main code's code / finding place
+    validator_fields = ("updated_at", "main_code__updated_at")
 
-        artifact_no = qp.get("artifact_no")
-        if artifact_no:
-            try:
-                qs = qs.filter(artifact_no=int(artifact_no))
-            except ValueError:
-                pass
-
-        production_material = qp.get("production_material")
-        if production_material:
-            qs = qs.filter(production_material__icontains=production_material)
-
-        period = qp.get("period")
-        if period:
-            qs = qs.filter(period__icontains=period)
-
-        # Date range
-        date_from = qp.get("date_from")
-        if date_from:
-            qs = qs.filter(artifact_date__gte=date_from)
-
-        date_to = qp.get("date_to")
-        if date_to:
-            qs = qs.filter(artifact_date__lte=date_to)
-
-        # General q
-        q = qp.get("q")
-        if q:
-            qs = qs.filter(
-                Q(main_code__code__icontains=q)
-                | Q(main_code__finding_place__icontains=q)
-                | Q(production_material__icontains=q)
-                | Q(period__icontains=q)
-                | Q(notes__icontains=q)
-                | Q(piece_date__icontains=q)
-                | Q(source_and_reference__icontains=q)
+    def list_cache_tags(self, request):
+        # Signals bump the tag of the integer id; "01" or " 1" filter the same rows.
+        try:
+            return [artifacts_tag(int(request.query_params.get("main_code")))]
+        except (TypeError, ValueError):
+            return [ARTIFACTS_TAG]
+
+    def changes_queryset(self):
+        return Artifact.objects.select_related("main_code")
+
+    def save_numbered(self, pending: List[Any]) -> List[Artifact]:
+        """Saves validated artifact serializers in one transaction.
+
+        Omitted ``artifact_no`` values are taken from the main code's
+        ``ArtifactNumberSequence``; explicit ones move it forward. The only
+        rows locked are the sequences of the main codes involved: facet
+        counts are applied once for the whole batch, after commit.
+        """
+        missing: Dict[int, int] = {}
+        explicit: Dict[int, int] = {}
+        for s in pending:
+            mc = s.validated_data["main_code"].pk
+            no = s.validated_data.get("artifact_no")
+            if no is None:
+                missing[mc] = missing.get(mc, 0) + 1
+            else:
+                explicit[mc] = max(no, explicit.get(mc, 0))
+        try:
+            with deferred_facets(), transaction.atomic():
+                allocated = ArtifactNumberSequence.allocate(missing, observed=explicit)
+                for s in pending:
+                    if s.validated_data.get("artifact_no") is None:
+                        s.save(artifact_no=allocated[s.validated_data["main_code"].pk].pop(0))
+                    else:
+                        s.save()
+        except IntegrityError:
+            # Same explicit number sent twice, or raced by a concurrent write.
+            raise ValidationError({"artifact_no": [DUPLICATE_ARTIFACT_NO]})
+        return [s.instance for s in pending]
+
+    def perform_create(self, serializer):
+        self.save_numbered([serializer])
+
+    def perform_update(self, serializer):
+        main_code = serializer.validated_data.get("main_code") or serializer.instance.main_code
+        no = serializer.validated_data.get("artifact_no")
+        try:
+            with transaction.atomic():
+                if no is not None:
+                    ArtifactNumberSequence.observe({main_code.pk: no})
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({"artifact_no": [DUPLICATE_ARTIFACT_NO]})
+
+    @action(detail=False, methods=["post"], url_path="bulk-create")
+    def bulk_create(self, request):
+        """Create many artifacts at once: ``{"items": [{...}, ...]}``.
+
+        Items without ``artifact_no`` are numbered from their main code's
+        sequence; all items are saved together or not at all.
+        """
+        items = request.data.get("items") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "items boş olmayan bir liste olmalıdır."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BULK_ARTIFACTS:
+            return Response(
+                {"detail": f"Tek seferde en fazla {MAX_BULK_ARTIFACTS} buluntu oluşturulabilir."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Ordering (whitelist)
-        ordering = qp.get("ordering")
-        allowed = {
-            "created_at",
-            "-created_at",
-            "artifact_date",
-            "-artifact_date",
-            "artifact_no",
-            "-artifact_no",
-            "main_code__code",
-            "-main_code__code",
-        }
-        if ordering in allowed:
-            qs = qs.order_by(ordering)
+        # One serializer per item: media validation keeps per-instance state.
+        pending = [self.get_serializer(data=item) for item in items]
+        errors = [{} if s.is_valid() else s.errors for s in pending]
+        if any(errors):
+            return Response({"items": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = self.save_numbered(pending)
+        return Response(self.get_serializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    def get_queryset(self):
+        qs = filter_artifacts(super().get_queryset(), self.request.query_params)
 
+        if self.action in ("list", "retrieve"):
+            qs = self.narrow_queryset(qs)
         return qs
 
+    def get_serializer_class(self):
+        # Compact rows by default on list pages; an explicit ?fields= may ask
+        # for any field of the full serializer.
+        if self.action == "list" and not self.request.query_params.get("fields"):
+            return ArtifactListSerializer
+        return super().get_serializer_class()
+
+    def narrow_queryset(self, qs):
+        """Loads only the columns the response (and the ordering) needs."""
+        columns = self.get_serializer().only_columns()
+        if columns is None:
+            return qs
+        for item in qs.query.order_by:
+            name = item.lstrip("-") if isinstance(item, str) else None
+            if name and name not in qs.query.annotations:
+                columns.append(name)
+                if "__" in name:
+                    columns.append(name.split("__", 1)[0])
+        if not any(c.startswith("main_code__") for c in columns):
+            qs = qs.select_related(None)
+        return qs.only(*dict.fromkeys(columns))
+
     @action(detail=False, methods=["get"], url_path="check-unique")
     def check_unique(self, request):
         main_code = request.query_params.get("main_code")
@@ -371,234 +556,312 @@ class ArtifactViewSet(viewsets.ModelViewSet):
 
         return Response({"exists": qs.exists()})
 
-    @action(detail=True, methods=["get"], url_path="export")
-    def export(self, request, pk=None):
+    @action(detail=False, methods=["post"], url_path="check-unique-batch")
+    def check_unique_batch(self, request):
+        """Many check-unique pairs in one query.
+
+        Body: ``{"pairs": [{"main_code": 1, "artifact_no": 12, "exclude_id": 5}, ...]}``.
+        ``duplicate`` marks a pair repeated earlier in the same batch.
+        """
+        pairs = request.data.get("pairs") if isinstance(request.data, dict) else request.data
+        if not isinstance(pairs, list) or not pairs:
+            return Response({"detail": "pairs listesi gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(pairs) > CHECK_UNIQUE_MAX_PAIRS:
+            return Response(
+                {"detail": f"En fazla {CHECK_UNIQUE_MAX_PAIRS} çift gönderilebilir."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        parsed = []
+        for i, pair in enumerate(pairs):
+            try:
+                exclude_id = pair.get("exclude_id")
+                parsed.append((
+                    int(pair["main_code"]),
+                    int(pair["artifact_no"]),
+                    int(exclude_id) if exclude_id not in (None, "") else None,
+                ))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return Response(
+                    {"detail": f"{i}. çift geçersiz: main_code ve artifact_no sayı olmalıdır."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        taken = Artifact.taken_numbers((mc, no) for mc, no, _ in parsed)
+        seen = set()
+        results = []
+        for mc, no, exclude_id in parsed:
+            owner = taken.get((mc, no))
+            results.append({
+                "main_code": mc,
+                "artifact_no": no,
+                "exists": owner is not None and owner != exclude_id,
+                "duplicate": (mc, no) in seen,
+            })
+            seen.add((mc, no))
+        conflicts = sum(1 for r in results if r["exists"] or r["duplicate"])
+        return Response({"results": results, "conflicts": conflicts})
+
+    @action(detail=False, methods=["get"], url_path="next-free")
+    def next_free(self, request):
+        """Next unused artifact numbers: ?main_code=<id>&count=10&start=1"""
+        try:
+            main_code = int(request.query_params.get("main_code") or "")
+            count = int(request.query_params.get("count") or 1)
+            start = int(request.query_params.get("start") or 1)
+        except ValueError:
+            return Response(
+                {"detail": "main_code, count ve start sayı olmalıdır."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        count = max(1, min(count, NEXT_FREE_MAX_COUNT))
+        start = max(1, start)
+        return Response({"main_code": main_code, "numbers": Artifact.free_numbers(main_code, count, start)})
+
+    @action(detail=False, methods=["get"], url_path="suggest")
+    def suggest(self, request):
+        """Typeahead: ?field=production_material|period&q=<text>&limit=10"""
+        return _suggest_response(request, Artifact.objects.all(), ARTIFACT_SUGGEST_FIELDS)
+
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """Dashboard counts by form, period, material, flags and month.
+
+        Unfiltered requests read the summary table; filtered ones group the
+        filtered list.
+        """
+        if has_artifact_filters(request.query_params):
+            data = live_facets(filter_artifacts(Artifact.objects.all(), request.query_params))
+            data["source"] = "live"
+        else:
+            data = summary_facets(ArtifactFacetCount)
+            data["source"] = "summary"
+        return Response(data)
+
+    @action(detail=False, methods=["get"], url_path="grid")
+    def grid(self, request):
+        """Map counts per grid cell (?zoom=0..22) or per plan square (?by=plan_square).
+
+        ``?bbox=`` limits the area; list filters limit the counted artifacts.
+        """
+        qp = request.query_params
+        try:
+            bbox = parse_bbox(qp.get("bbox"))
+        except InvalidBBox as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        artifacts = filter_artifacts(Artifact.objects.all(), qp) if has_artifact_filters(qp) else None
+
+        if qp.get("by") == "plan_square":
+            return Response({"by": "plan_square", "squares": plan_square_counts(MainCode.objects.all(), bbox, artifacts)})
+        if qp.get("by"):
+            return Response({"detail": "by yalnızca plan_square olabilir."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            zoom = int(qp.get("zoom") or "")
+        except ValueError:
+            zoom = -1
+        if not 0 <= zoom <= GRID_MAX_ZOOM:
+            return Response(
+                {"detail": f"zoom 0-{GRID_MAX_ZOOM} arası bir tam sayı olmalıdır."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            "zoom": zoom,
+            "cell_size": cell_size(zoom),
+            "cells": grid_cells(MainCode.objects.all(), zoom, bbox, artifacts),
+        })
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_file(self, request):
+        """Batch import from a CSV/XLSX upload (multipart field ``file``).
+
+        ``?dry_run=1`` only validates. Any row error rejects the whole file.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = (request.query_params.get("dry_run") or "").lower() in ("1", "true", "yes")
+        try:
+            result = import_artifacts(iter_upload_rows(upload), dry_run=dry_run)
+        except ImportFileError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if result["error_count"]:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"], url_path="media")
+    def upload_media(self, request, pk=None):
+        """Adds an image/drawing (multipart ``file``, ``kind=image|drawing``)."""
         artifact = self.get_object()
-        fmt = (request.query_params.get("export") or request.query_params.get("format") or "csv").lower().strip()
+        upload = request.FILES.get("file")
+        kind = request.data.get("kind") or "image"
+        if upload is None:
+            return Response({"detail": "file gerekli."}, status=status.HTTP_400_BAD_REQUEST)
+        if kind not in KIND_FIELDS:
+            return Response({"detail": "kind desteklenmiyor. image | drawing"}, status=status.HTTP_400_BAD_REQUEST)
+
+        sha256, size = get_blob_store().put_stream(upload)
+        field = KIND_FIELDS[kind]
+        with transaction.atomic():
+            artifact = Artifact.objects.select_for_update().get(pk=artifact.pk)
+            entries = list(getattr(artifact, field) or [])
+            url = media_url(sha256)
+            media, created = Media.objects.get_or_create(
+                artifact=artifact,
+                kind=kind,
+                sha256=sha256,
+                defaults={
+                    "content_type": upload.content_type or DEFAULT_CONTENT_TYPE,
+                    "size": size,
+                    "name": upload.name,
+                    "position": len(entries),
+                },
+            )
+            if url not in entries:
+                entries.append(url)
+                setattr(artifact, field, entries)
+                artifact.save(update_fields=[field, "updated_at"])
 
-        kv = _artifact_kv(artifact)
-        filename_base = artifact.full_artifact_no or f"artifact-{artifact.pk}"
-        # HTML preview (UI-like) and HTML→PDF (WeasyPrint).
-        # Client should prefer `?export=`. We also accept `?format=` if URL_FORMAT_OVERRIDE is disabled.
-        if fmt == "html":
-            html = _artifact_html(artifact)
-            return HttpResponse(html, content_type="text/html; charset=utf-8")
+        return Response(
+            MediaSerializer(media).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
-        if fmt == "pdf_reportlab":
-            html = _artifact_html(artifact)
-            try:
-                from weasyprint import HTML  # lazy import to avoid startup crash
-                pdf_bytes = HTML(string=html, base_url=request.build_absolute_uri("/")).write_pdf()
-                resp = HttpResponse(pdf_bytes, content_type="application/pdf")
-                resp["Content-Disposition"] = f'attachment; filename="{filename_base}.pdf"'
-                return resp
-            except Exception:
-                # Fallback to ReportLab PDF if WeasyPrint is not available or system libs are missing
-                fmt = "pdf_reportlab"
-
-
-        if fmt == "csv":
-            sio = io.StringIO()
-            w = csv.writer(sio)
-            w.writerow(["field", "value"])
-            for k, v in kv:
-                w.writerow([k, v])
-            data = sio.getvalue().encode("utf-8-sig")  # excel-friendly BOM
-            resp = HttpResponse(data, content_type="text/csv; charset=utf-8")
-            resp["Content-Disposition"] = f'attachment; filename="{filename_base}.csv"'
-            return resp
+    @action(detail=False, methods=["get"], url_path="bulk-export")
+    def bulk_export(self, request):
+        """Stream every artifact matching the list filters (no pagination)."""
+        fmt = _export_format(request)
+        if fmt not in BULK_EXPORT_FORMATS:
+            return Response(
+                {"detail": "format desteklenmiyor. csv | ndjson | xlsx"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        if fmt in ("xlsx", "excel"):
+        if fmt == "xlsx":
             try:
-                from openpyxl import Workbook
+                import openpyxl  # noqa: F401
             except Exception:
                 return Response({"detail": "openpyxl yüklü değil."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Artifact"
-            ws.append(["field", "value"])
-            for k, v in kv:
-                ws.append([k, v])
-
-            bio = io.BytesIO()
-            wb.save(bio)
-            bio.seek(0)
-            resp = HttpResponse(
-                bio.read(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            resp["Content-Disposition"] = f'attachment; filename="{filename_base}.xlsx"'
+        qs = self.filter_queryset(self.get_queryset())
+        count, last_modified = self.list_validators(qs)
+        stamp = last_modified.isoformat() if last_modified else ""
+        etag = make_etag("bulk-export", normalized_query(request.query_params), count, stamp)
+        resp = not_modified(request, etag)
+        if resp is not None:
             return resp
 
-        if fmt == "pdf":
-            try:
-                from reportlab.lib import colors
-                from reportlab.lib.pagesizes import A4
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.units import mm
-                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            except Exception:
-                return Response({"detail": "reportlab yüklü değil."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            s = ArtifactSerializer(artifact).data
-            details = s.get("details") or {}
-            measurements = s.get("measurements") or {}
-            images = s.get("images") or []
-            drawings = s.get("drawings") or []
-
-            def yesno(v):
-                return "Evet" if v else "Hayır"
-
-            general_rows = [
-                ("Buluntu No (Tam)", s.get("full_artifact_no") or ""),
-                ("Anakod", s.get("main_code_code") or ""),
-                ("Buluntu Yeri", s.get("main_code_finding_place") or ""),
-                ("Buluntu No", str(s.get("artifact_no") or "")),
-                ("Buluntu Tarihi", s.get("artifact_date") or ""),
-                ("Form", s.get("form_type") or ""),
-                ("Yapım Malzemesi", s.get("production_material") or ""),
-                ("Dönem", s.get("period") or ""),
-                ("Eser Tarihi", s.get("piece_date") or ""),
-                ("Envanterlik", yesno(s.get("is_inventory"))),
-                ("Aktif", yesno(s.get("is_active"))),
-            ]
-
-            notes = s.get("notes") or ""
-            ref = s.get("source_and_reference") or ""
-
-            def humanize_key(k: str) -> str:
-                return str(k).replace(".", " / ").replace("_", " ").strip().title()
-
-            def table_for_rows(rows):
-                styles = getSampleStyleSheet()
-                normal = styles["BodyText"]
-                normal.fontName = "Helvetica"
-                normal.fontSize = 9
-                normal.leading = 12
-
-                key_style = ParagraphStyle(
-                    "key",
-                    parent=normal,
-                    fontName="Helvetica-Bold",
-                    textColor=colors.HexColor("#0f172a"),
-                )
-
-                data = []
-                for k, v in rows:
-                    v = "" if v is None else str(v)
-                    v = v.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "<br/>")
-                    data.append([Paragraph(str(k), key_style), Paragraph(v, normal)])
-
-                t = Table(data, colWidths=[55 * mm, 130 * mm])
-                t.setStyle(
-                    TableStyle(
-                        [
-                            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e2e8f0")),
-                            ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#e2e8f0")),
-                            ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#fbfdff")]),
-                            ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                            ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                            ("TOPPADDING", (0, 0), (-1, -1), 4),
-                            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                        ]
-                    )
-                )
-                return t
-
-            def section_title(txt_: str):
-                styles = getSampleStyleSheet()
-                h = ParagraphStyle(
-                    "h",
-                    parent=styles["Heading3"],
-                    fontName="Helvetica-Bold",
-                    fontSize=12,
-                    textColor=colors.HexColor("#0f172a"),
-                    spaceAfter=8,
-                    spaceBefore=10,
-                )
-                return Paragraph(txt_, h)
-
-            story = []
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                "title",
-                parent=styles["Title"],
-                fontName="Helvetica-Bold",
-                fontSize=16,
-                textColor=colors.HexColor("#0f172a"),
-                spaceAfter=10,
-            )
-            subtitle_style = ParagraphStyle(
-                "sub",
-                parent=styles["BodyText"],
-                fontName="Helvetica",
-                fontSize=9,
-                textColor=colors.HexColor("#475569"),
-                spaceAfter=12,
+        filename_base = f"buluntular-{timezone.localtime():%Y%m%d-%H%M}"
+        return set_validators(bulk_export_response(qs, fmt, filename_base), etag)
+
+    @action(detail=False, methods=["post"], url_path="bulk-export-job")
+    def bulk_export_job(self, request):
+        """Queue a bulk export (same filters as the list) for the export worker."""
+        fmt = _export_format(request)
+        if fmt not in BULK_EXPORT_FORMATS:
+            return Response(
+                {"detail": "format desteklenmiyor. csv | ndjson | xlsx"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        job = ExportJob.objects.create(kind=ExportJob.KIND_BULK, format=fmt, params=request.query_params.dict())
+        return _job_response(request, enqueue(job))
+
+    @action(detail=False, methods=["post"], url_path="catalog")
+    def catalog(self, request):
+        """Queue a catalog PDF of every artifact matching the list filters (?title= optional)."""
+        return _queue_catalog(request, request.query_params.dict())
 
-            story.append(Paragraph("Buluntu Detay Export", title_style))
-            story.append(Paragraph(f"Buluntu: <b>{s.get('full_artifact_no') or ''}</b>", subtitle_style))
-
-            story.append(section_title("Genel Bilgiler"))
-            story.append(table_for_rows(general_rows))
-
-            if ref.strip():
-                story.append(Spacer(1, 8))
-                story.append(section_title("Kaynak / Referans"))
-                story.append(table_for_rows([("Metin", ref)]))
-
-            if notes.strip():
-                story.append(Spacer(1, 8))
-                story.append(section_title("Notlar / Açıklama"))
-                story.append(table_for_rows([("Metin", notes)]))
-
-            if isinstance(details, dict) and details:
-                story.append(Spacer(1, 10))
-                story.append(section_title("Form Detayları"))
-                rows = [(humanize_key(k), v) for k, v in sorted(details.items(), key=lambda x: str(x[0]))]
-                story.append(table_for_rows(rows))
-
-            if isinstance(measurements, dict) and measurements:
-                story.append(Spacer(1, 10))
-                story.append(section_title("Ölçü ve Renk Bilgileri"))
-                rows = [(humanize_key(k), v) for k, v in sorted(measurements.items(), key=lambda x: str(x[0]))]
-                story.append(table_for_rows(rows))
-
-            if images or drawings:
-                story.append(Spacer(1, 10))
-                story.append(section_title("Medya"))
-                media_rows = [
-                    ("Fotoğraf Sayısı", str(len(images))),
-                    ("Çizim Sayısı", str(len(drawings))),
-                ]
-                if images:
-                    media_rows.append(("Fotoğraflar", "\n".join(map(str, images[:20])) + ("" if len(images) <= 20 else f"\n(+{len(images)-20} adet)")))
-                if drawings:
-                    media_rows.append(("Çizimler", "\n".join(map(str, drawings[:20])) + ("" if len(drawings) <= 20 else f"\n(+{len(drawings)-20} adet)")))
-                story.append(table_for_rows(media_rows))
-
-            bio = io.BytesIO()
-            doc = SimpleDocTemplate(
-                bio,
-                pagesize=A4,
-                leftMargin=18 * mm,
-                rightMargin=18 * mm,
-                topMargin=16 * mm,
-                bottomMargin=16 * mm,
-                title=f"Buluntu {filename_base}",
+    @action(detail=True, methods=["post"], url_path="export-job")
+    def export_job(self, request, pk=None):
+        """Queue this artifact's export for the export worker; poll /api/export-jobs/<id>/."""
+        artifact = self.get_object()
+        fmt = _export_format(request)
+        if fmt not in ARTIFACT_EXPORT_FORMATS:
+            return Response(
+                {"detail": "format desteklenmiyor. csv | xlsx | pdf"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            doc.build(story)
+        return self._queue_artifact_export(request, artifact, fmt)
+
+    def _queue_artifact_export(self, request, artifact, fmt):
+        job = ExportJob.objects.create(
+            kind=ExportJob.KIND_ARTIFACT,
+            format=fmt,
+            params={"artifact_id": artifact.pk, "base_url": request.build_absolute_uri("/")},
+        )
+        return _job_response(request, enqueue(job))
 
-            bio.seek(0)
-            resp = HttpResponse(bio.read(), content_type="application/pdf")
-            resp["Content-Disposition"] = f'attachment; filename="{filename_base}.pdf"'
+    @action(detail=True, methods=["get"], url_path="export")
+    def export(self, request, pk=None):
+        artifact = self.get_object()
+        fmt = _export_format(request)
+        if fmt not in ARTIFACT_EXPORT_FORMATS:
+            return Response(
+                {"detail": "format desteklenmiyor. csv | xlsx | pdf"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, ext = ARTIFACT_EXPORT_FORMATS[fmt]
+
+        # The key only depends on row metadata, so a revalidation is answered
+        # without rendering anything.
+        key = render_key(artifact, fmt)
+        etag = f'"{key}"'
+        last_modified = latest([artifact.updated_at, artifact.main_code.updated_at])
+        resp = not_modified(request, etag, last_modified)
+        if resp is not None:
             return resp
 
-        return Response(
-            {"detail": "format desteklenmiyor. csv | xlsx | pdf"},
-            status=status.HTTP_400_BAD_REQUEST,
+        cache = get_render_cache()
+        fh = cache.get(artifact.pk, key, ext)
+        if fh is None:
+            try:
+                data = render_artifact_export(artifact, fmt, request.build_absolute_uri("/"), use_pool=True)
+            except ExportUnavailable as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            except render_pool.RenderTimeout:
+                # Too slow for a request; let the export worker finish it.
+                return self._queue_artifact_export(request, artifact, fmt)
+            cache.put(artifact.pk, key, ext, data)
+            fh = io.BytesIO(data)
+
+        filename_base = artifact.full_artifact_no or f"artifact-{artifact.pk}"
+        resp = FileResponse(
+            fh,
+            content_type=content_type,
+            as_attachment=fmt != "html",
+            filename=f"{filename_base}.{ext}",
         )
+        return set_validators(resp, etag, last_modified)
+
 
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        job_status = self.request.query_params.get("status")
+        if job_status:
+            qs = qs.filter(status=job_status)
+        return qs
+
+    @action(detail=True, methods=["get"], url_path="result")
+    def result(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ExportJob.DONE:
+            return Response(
+                {"detail": "Çıktı henüz hazır değil.", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        # A finished job's file never changes.
+        etag = make_etag("job", job.pk, job.finished_at.isoformat() if job.finished_at else "")
+        resp = not_modified(request, etag, job.finished_at)
+        if resp is not None:
+            return resp
+        try:
+            fh = open(job.result_path, "rb")
+        except OSError:
+            return Response({"detail": "Çıktı dosyası bulunamadı."}, status=status.HTTP_410_GONE)
+        resp = FileResponse(fh, content_type=job.content_type, as_attachment=True, filename=job.result_name)
+        return set_validators(resp, etag, job.finished_at)
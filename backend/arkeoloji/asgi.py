@@ -2,4 +2,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "arkeoloji.settings")
+# Serve the read-heavy endpoints with the async views (api/async_views.py).
+os.environ.setdefault("SERVER_MODE", "asgi")
 application = get_asgi_application()
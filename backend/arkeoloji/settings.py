@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 from dotenv import load_dotenv
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "core",
@@ -26,9 +28,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover the rest of the stack
+    "api.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise with an async entry point, so ASGI requests stay on the event loop
+    "api.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -80,11 +85,69 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Uploaded media; artifact images/drawings are kept in a content-addressed blob store
+MEDIA_ROOT = Path(os.getenv("DJANGO_MEDIA_ROOT", BASE_DIR / "media"))
+MEDIA_BLOB_ROOT = MEDIA_ROOT / "blobs"
+
+# On-disk LRU cache for single-artifact HTML/PDF/XLSX/CSV export renders
+EXPORT_CACHE_ROOT = Path(os.getenv("EXPORT_CACHE_ROOT", MEDIA_ROOT / "render-cache"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Warm PDF render processes per gunicorn worker (api/render_pool.py); 0 renders inline.
+# A render slower than PDF_RENDER_TIMEOUT seconds is moved to the export job queue.
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "20"))
+
+# Background export jobs (api/jobs.py): "redis" | "db" | "inline";
+# empty means redis when REDIS_URL is set, otherwise db polling.
+REDIS_URL = os.getenv("REDIS_URL", "")
+EXPORT_QUEUE_BACKEND = os.getenv("EXPORT_QUEUE_BACKEND", "")
+EXPORT_JOB_ROOT = Path(os.getenv("EXPORT_JOB_ROOT", MEDIA_ROOT / "export-jobs"))
+EXPORT_JOB_TTL_HOURS = int(os.getenv("EXPORT_JOB_TTL_HOURS", "24"))
+EXPORT_JOB_TIMEOUT = int(os.getenv("EXPORT_JOB_TIMEOUT", "1800"))
+
+# Delta-sync feed (api/sync.py): tombstones are kept this long; older tokens need a full sync.
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Shared list-response cache (api/response_cache.py): "redis" | "file" | "locmem" | "off";
+# empty means redis when REDIS_URL is set, otherwise locmem (per process, single worker only).
+API_CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "") or ("redis" if REDIS_URL else "locmem")
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", "300"))
+_API_CACHE_BACKENDS = {
+    "redis": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL},
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(os.getenv("API_CACHE_ROOT", MEDIA_ROOT / "api-cache")),
+    },
+    "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "api", "OPTIONS": {"MAX_ENTRIES": 2000}},
+    "off": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "api": {**_API_CACHE_BACKENDS[API_CACHE_BACKEND], "KEY_PREFIX": "arkeoloji-api", "TIMEOUT": API_CACHE_TIMEOUT},
+}
+
+# Prometheus metrics at /api/metrics/ (api/metrics.py). Under gunicorn,
+# gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR so all workers are summed.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# The export worker serves its own metrics here (0 disables).
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9101"))
+
+# "wsgi" (sync gunicorn workers) or "asgi" (uvicorn workers; arkeoloji/asgi.py sets it).
+# In asgi mode the read-heavy artifact endpoints are served by api/async_views.py,
+# and blocking export renders run on ASYNC_RENDER_THREADS threads per process.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+ASYNC_VIEWS = SERVER_MODE == "asgi"
+ASYNC_RENDER_THREADS = int(os.getenv("ASYNC_RENDER_THREADS", "4"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # CORS (frontend nginx aynı origin üzerinden proxy ettiği için prod'da gerekmeyebilir)
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+_HAS_ORJSON = find_spec("orjson") is not None
+_HAS_MSGPACK = find_spec("msgpack") is not None
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
     "DEFAULT_AUTHENTICATION_CLASSES": [],
@@ -92,10 +155,18 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 50,
     "URL_FORMAT_OVERRIDE": None,  # avoid conflicts with client-side ?format=pdf etc.
 
+    # orjson / msgpack are optional (api/renderers.py); JSON stays the default
+    # format, MessagePack is chosen with Accept / Content-Type: application/msgpack.
     "DEFAULT_RENDERER_CLASSES": (
-        ["rest_framework.renderers.JSONRenderer"]
+        ["api.renderers.ORJSONRenderer" if _HAS_ORJSON else "rest_framework.renderers.JSONRenderer"]
+        + (["api.renderers.MessagePackRenderer", "api.renderers.LegacyMessagePackRenderer"] if _HAS_MSGPACK else [])
         + (["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else [])
     ),
+    "DEFAULT_PARSER_CLASSES": (
+        ["api.renderers.ORJSONParser" if _HAS_ORJSON else "rest_framework.parsers.JSONParser"]
+        + (["api.renderers.MessagePackParser", "api.renderers.LegacyMessagePackParser"] if _HAS_MSGPACK else [])
+        + ["rest_framework.parsers.FormParser", "rest_framework.parsers.MultiPartParser"]
+    ),
 }
 
 
@@ -1,19 +1,34 @@
 from django.contrib import admin
-from .models import MainCode, Artifact, MainCodeSequence
+from .models import MainCode, Artifact, MainCodeSequence, Media, turkish_fold
+
+
+class FoldedSearchMixin:
+    """Folds the search term like the *_folded shadow columns (İ/ı/I/i)."""
+
+    def get_search_results(self, request, queryset, search_term):
+        return super().get_search_results(request, queryset, turkish_fold(search_term))
+
 
 @admin.register(MainCode)
-class MainCodeAdmin(admin.ModelAdmin):
+class MainCodeAdmin(FoldedSearchMixin, admin.ModelAdmin):
     list_display = ("code", "finding_place", "plan_square", "layer", "level", "grave_no", "created_at")
-    search_fields = ("code", "finding_place", "plan_square", "gis")
+    search_fields = ("code", "finding_place_folded__contains", "plan_square", "gis")
     list_filter = ("layer", "level")
     ordering = ("-created_at",)
 
 @admin.register(Artifact)
-class ArtifactAdmin(admin.ModelAdmin):
+class ArtifactAdmin(FoldedSearchMixin, admin.ModelAdmin):
     list_display = ("full_artifact_no", "main_code", "artifact_no", "artifact_date", "form_type", "production_material", "period", "is_inventory", "is_active")
-    search_fields = ("main_code__code", "artifact_no", "production_material", "period", "finding_shape")
+    search_fields = ("main_code__code", "artifact_no", "production_material_folded__contains", "period_folded__contains", "finding_shape")
     list_filter = ("form_type", "production_material", "period", "is_inventory", "is_active")
     autocomplete_fields = ("main_code",)
     ordering = ("-created_at",)
 
+@admin.register(Media)
+class MediaAdmin(admin.ModelAdmin):
+    list_display = ("artifact", "kind", "name", "content_type", "size", "sha256", "created_at")
+    search_fields = ("sha256", "name")
+    list_filter = ("kind", "content_type")
+    raw_id_fields = ("artifact",)
+
 admin.site.register(MainCodeSequence)
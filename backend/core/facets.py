@@ -0,0 +1,195 @@
+"""Whole-dataset artifact facet counts kept in ``ArtifactFacetCount``.
+
+Every artifact contributes 1 to one row per facet (its form type, period,
+material, inventory/active flags, ``artifact_date`` month) and to the
+``total`` row. Saves and deletes apply +1/-1 deltas through an upsert, so the
+dashboard reads a few hundred rows instead of grouping the artifact table.
+
+The upsert runs after the writing transaction commits
+(:func:`defer_facet_deltas`). Inside the transaction it would hold the
+``total`` row lock, and with it every concurrent artifact write, until
+commit. :func:`deferred_facets` merges the deltas of a batch of saves into
+one upsert.
+``rebuild_facet_counts`` recomputes everything (``manage.py rebuild_facets``)
+after writes that bypass model signals, such as ``QuerySet.update()``.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+# facet name -> Artifact field
+FACET_FIELDS = {
+    "form_type": "form_type",
+    "period": "period",
+    "production_material": "production_material",
+    "is_inventory": "is_inventory",
+    "is_active": "is_active",
+}
+MONTH_FACET = "artifact_month"
+TOTAL_FACET = "total"
+
+FACET_NAMES = tuple(FACET_FIELDS) + (MONTH_FACET,)
+
+# Artifact fields a facet delta depends on.
+SOURCE_FIELDS = tuple(FACET_FIELDS.values()) + ("artifact_date",)
+
+
+def facet_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def month_value(date) -> str:
+    # str() also covers dates assigned as ISO strings, which stay strings after save().
+    return str(date)[:7] if date else ""
+
+
+def facet_keys(values: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """``(facet, value)`` rows one artifact counts towards."""
+    keys = [(TOTAL_FACET, "")]
+    for facet, field in FACET_FIELDS.items():
+        keys.append((facet, facet_value(values.get(field))))
+    keys.append((MONTH_FACET, month_value(values.get("artifact_date"))))
+    return keys
+
+
+def artifact_values(artifact) -> Dict[str, Any]:
+    return {f: getattr(artifact, f) for f in SOURCE_FIELDS}
+
+
+def facet_deltas(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> Counter:
+    deltas: Counter = Counter()
+    if old is not None:
+        deltas.subtract(facet_keys(old))
+    if new is not None:
+        deltas.update(facet_keys(new))
+    return deltas
+
+
+def apply_facet_deltas(deltas: Counter, table: str = "core_artifactfacetcount") -> None:
+    """Adds ``deltas`` to the summary rows in one upsert statement."""
+    rows = [(facet, value, n) for (facet, value), n in deltas.items() if n]
+    if not rows:
+        return
+    # Fixed lock order keeps concurrent upserts from deadlocking.
+    rows.sort()
+    placeholders = ", ".join(["(%s, %s, %s)"] * len(rows))
+    params: List[Any] = [p for row in rows for p in row]
+    with connection.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {table} (facet, value, count) VALUES {placeholders} "
+            f"ON CONFLICT (facet, value) DO UPDATE SET count = {table}.count + EXCLUDED.count",
+            params,
+        )
+
+
+_batch: contextvars.ContextVar[Optional[Counter]] = contextvars.ContextVar("facet_batch", default=None)
+
+
+def defer_facet_deltas(deltas: Counter) -> None:
+    """Applies ``deltas`` once the current transaction commits.
+
+    In autocommit mode that is right away; on rollback they are dropped with
+    the writes. Inside :func:`deferred_facets` they are collected instead.
+    """
+    batch = _batch.get()
+    if batch is not None:
+        batch.update(deltas)
+        return
+    if any(deltas.values()):
+        transaction.on_commit(lambda: apply_facet_deltas(deltas))
+
+
+@contextlib.contextmanager
+def deferred_facets():
+    """Collects the facet deltas of the saves in the block into one upsert.
+
+    Nothing is counted if the block raises.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    batch: Counter = Counter()
+    token = _batch.set(batch)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    defer_facet_deltas(batch)
+
+
+def record_created(artifacts: Iterable) -> None:
+    """Counts artifacts inserted without model signals (``bulk_create``)."""
+    deltas: Counter = Counter()
+    for artifact in artifacts:
+        deltas.update(facet_keys(artifact_values(artifact)))
+    defer_facet_deltas(deltas)
+
+
+def rebuild_facet_counts(artifact_model, facet_model) -> int:
+    """Recomputes every summary row; returns the number of rows written.
+
+    The models are passed in so data migrations can use historical models.
+    Deltas of writes committed just before the table lock may still be
+    applied after it; run it while the API is not taking writes.
+    """
+    with transaction.atomic():
+        # Block artifact writes (and their deltas) while the counts are replaced.
+        with connection.cursor() as cur:
+            cur.execute(f"LOCK TABLE {artifact_model._meta.db_table} IN SHARE MODE")
+
+        rows = [facet_model(facet=TOTAL_FACET, value="", count=artifact_model.objects.count())]
+        for facet, field in FACET_FIELDS.items():
+            for r in artifact_model.objects.order_by().values(field).annotate(n=Count("id")):
+                rows.append(facet_model(facet=facet, value=facet_value(r[field]), count=r["n"]))
+        months = artifact_model.objects.order_by().values(month=TruncMonth("artifact_date")).annotate(n=Count("id"))
+        for r in months:
+            rows.append(facet_model(facet=MONTH_FACET, value=month_value(r["month"]), count=r["n"]))
+
+        facet_model.objects.all().delete()
+        facet_model.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _facet_lists(rows: Iterable[Tuple[str, str, int]]) -> Dict[str, Any]:
+    total = 0
+    facets: Dict[str, List[Dict[str, Any]]] = {name: [] for name in FACET_NAMES}
+    for facet, value, n in rows:
+        if facet == TOTAL_FACET:
+            total = n
+        elif facet in facets and n > 0:
+            facets[facet].append({"value": value, "count": n})
+    for name, items in facets.items():
+        if name == MONTH_FACET:
+            items.sort(key=lambda i: i["value"])
+        else:
+            items.sort(key=lambda i: (-i["count"], i["value"]))
+    return {"total": total, "facets": facets}
+
+
+def summary_facets(facet_model) -> Dict[str, Any]:
+    """Whole-dataset facets from the summary table."""
+    rows = facet_model.objects.filter(count__gt=0).values_list("facet", "value", "count")
+    return _facet_lists(rows)
+
+
+def live_facets(qs) -> Dict[str, Any]:
+    """Facets of a filtered artifact queryset, grouped on the fly."""
+    qs = qs.order_by()
+    rows: List[Tuple[str, str, int]] = [(TOTAL_FACET, "", qs.count())]
+    for facet, field in FACET_FIELDS.items():
+        for r in qs.values(field).annotate(n=Count("id")):
+            rows.append((facet, facet_value(r[field]), r["n"]))
+    for r in qs.values(month=TruncMonth("artifact_date")).annotate(n=Count("id")):
+        rows.append((MONTH_FACET, month_value(r["month"]), r["n"]))
+    return _facet_lists(rows)
@@ -0,0 +1,114 @@
+"""Coordinates parsed from the free-text ``MainCode.gis`` field.
+
+Field teams type coordinates in whatever form their device shows, so the
+parser accepts the common ones and gives up on anything else:
+
+- decimal pairs, latitude first: ``39.9255, 32.8512``, ``39,9255 32,8512``,
+  ``geo:39.9255,32.8512``;
+- degrees/minutes/seconds with hemisphere letters, English or Turkish
+  (K/G/D/B): ``39°55'31.8"N 32°51'04.3"E``, ``39°55,5' K 32°51' D``;
+- hemisphere letters before the numbers, as many GPS displays show them:
+  ``N 39.9255 E 32.8512``, ``K39°55'31.8" D32°51'04.3"``;
+- WKT points, longitude first: ``POINT(32.8512 39.9255)``.
+
+The result is stored in ``MainCode.lat`` / ``lon`` (WGS84 degrees) so map
+queries can use an ordinary B-tree index; PostGIS is not required.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+COORD_DECIMALS = 7
+
+_HEMISPHERES = {"N": 1, "K": 1, "S": -1, "G": -1, "E": 1, "D": 1, "W": -1, "B": -1}
+_LATITUDE_LETTERS = set("NKSG")
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_WKT_RE = re.compile(r"POINT\s*Z?\s*\(\s*(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)", re.I)
+_DMS_RE = re.compile(
+    rf"({_NUMBER})\s*[°º]\s*"
+    rf"(?:({_NUMBER})\s*['′’]\s*)?"
+    rf"(?:({_NUMBER})\s*(?:\"|″|”|'')\s*)?"
+    r"([NSEWKGDB](?![A-Z]))?",
+    re.I,
+)
+_DECIMAL_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*([NSEWKGDB](?![A-Z]))?", re.I)
+_DECIMAL_COMMA_RE = re.compile(r"(-?\d+(?:,\d+)?)\s*([NSEWKGDB](?![A-Z]))?", re.I)
+_LETTER_RE = re.compile(r"(?<![A-Z])([NSEWKGDB])(?![A-Z])")
+_PREFIXED_RE = re.compile(r"^[NSEWKGDB]\s*-?\d")
+
+
+def _float(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _checked(lat: float, lon: float) -> Optional[Tuple[float, float]]:
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return round(lat, COORD_DECIMALS), round(lon, COORD_DECIMALS)
+
+
+def _ordered(parts: List[Tuple[float, str]]) -> Optional[Tuple[float, float]]:
+    """``(lat, lon)`` from two signed values; hemisphere letters may swap them."""
+    (a, a_hem), (b, b_hem) = parts
+    if (a_hem and a_hem not in _LATITUDE_LETTERS) or (b_hem and b_hem in _LATITUDE_LETTERS):
+        a, b = b, a
+    return _checked(a, b)
+
+
+def _signed(value: float, hemisphere: str) -> float:
+    return -abs(value) if _HEMISPHERES.get(hemisphere, 1) < 0 else value
+
+
+def _letters_after(s: str) -> Optional[str]:
+    """``N 39.9 E 32.8`` rewritten as ``39.9 N 32.8 E``.
+
+    Every letter must lead a coordinate; anything else (``N 39.9 32.8 E``)
+    is ambiguous and gives None.
+    """
+    pieces = _LETTER_RE.split(s)
+    if pieces[0].strip() or len(pieces) != 5:
+        return None
+    coords = []
+    for letter, value in zip(pieces[1::2], pieces[2::2]):
+        value = value.strip().strip(",;").strip()
+        if not value:
+            return None
+        coords.append(f"{value} {letter}")
+    return " ".join(coords)
+
+
+def parse_gis(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """``(lat, lon)`` in degrees, or ``None`` when ``text`` is not a coordinate."""
+    if not text:
+        return None
+    s = str(text).strip().upper()
+    if s.startswith("GEO:"):
+        s = s[4:].split(";", 1)[0]
+
+    m = _WKT_RE.search(s)
+    if m:
+        return _checked(float(m.group(2)), float(m.group(1)))
+
+    if _PREFIXED_RE.match(s):
+        s = _letters_after(s)
+        if s is None:
+            return None
+
+    dms = _DMS_RE.findall(s)
+    if len(dms) == 2:
+        parts = []
+        for deg, minutes, seconds, hem in dms:
+            value = _float(deg) + _float(minutes or "0") / 60 + _float(seconds or "0") / 3600
+            parts.append((_signed(value, hem), hem))
+        return _ordered(parts)
+
+    # With a decimal point anywhere, commas only separate; otherwise
+    # "39,92 32,85" is read with decimal commas when that yields two numbers.
+    found = _DECIMAL_RE.findall(s) if "." in s else _DECIMAL_COMMA_RE.findall(s)
+    if len(found) != 2 and "." not in s:
+        found = _DECIMAL_RE.findall(s)
+    if len(found) != 2:
+        return None
+    return _ordered([(_signed(_float(n), hem), hem) for n, hem in found])
@@ -0,0 +1,226 @@
+"""Content-addressed blob store for artifact images and drawings.
+
+Blobs live on local disk under ``settings.MEDIA_BLOB_ROOT`` and are named by
+the SHA-256 of their content, so identical uploads are stored once. The
+``Artifact.images`` / ``Artifact.drawings`` JSON columns only keep lightweight
+references (``/api/media/<sha256>/``); the ``Media`` table links blobs to
+artifacts with their content type, size and original name.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+from django.conf import settings
+
+MEDIA_URL_PREFIX = "/api/media/"
+
+MEDIA_KINDS = (
+    ("image", "Fotoğraf"),
+    ("drawing", "Çizim"),
+)
+
+# Artifact JSON column holding the references of each media kind.
+KIND_FIELDS = {"image": "images", "drawing": "drawings"}
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+_CHUNK_SIZE = 64 * 1024
+_REFERENCE_RE = re.compile(r"^" + re.escape(MEDIA_URL_PREFIX) + r"(?P<sha>[0-9a-f]{64})/?$")
+
+# Keys under which the prototype UI may have stored a data URL inside an object entry.
+_DATA_KEYS = ("data", "dataUrl", "data_url", "url", "src")
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        return self.path(sha256).exists()
+
+    def size(self, sha256: str) -> int:
+        return self.path(sha256).stat().st_size
+
+    def open(self, sha256: str) -> IO[bytes]:
+        return open(self.path(sha256), "rb")
+
+    def _commit(self, tmp_path: str, sha256: str) -> None:
+        target = self.path(sha256)
+        if target.exists():
+            os.remove(tmp_path)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+
+    def _tempfile(self) -> Tuple[int, str]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return tempfile.mkstemp(dir=self.root, prefix=".upload-")
+
+    def put(self, data: bytes) -> str:
+        """Stores ``data`` (once) and returns its SHA-256 hex digest."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        if self.exists(sha256):
+            return sha256
+        fd, tmp_path = self._tempfile()
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        self._commit(tmp_path, sha256)
+        return sha256
+
+    def put_stream(self, stream: IO[bytes]) -> Tuple[str, int]:
+        """Stores a file-like object chunk by chunk; returns ``(sha256, size)``."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = self._tempfile()
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fh.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        sha256 = digest.hexdigest()
+        self._commit(tmp_path, sha256)
+        return sha256, size
+
+
+def get_blob_store() -> BlobStore:
+    return BlobStore(settings.MEDIA_BLOB_ROOT)
+
+
+def media_url(sha256: str) -> str:
+    return f"{MEDIA_URL_PREFIX}{sha256}/"
+
+
+def reference_sha(entry: Any) -> Optional[str]:
+    """SHA-256 of a ``/api/media/<sha256>/`` reference, else None."""
+    if not isinstance(entry, str):
+        return None
+    m = _REFERENCE_RE.match(entry.strip())
+    return m.group("sha") if m else None
+
+
+def parse_data_url(value: Any) -> Optional[Tuple[str, bytes]]:
+    """``(content_type, payload)`` for a ``data:`` URL, else None."""
+    if not isinstance(value, str) or value[:5].lower() != "data:":
+        return None
+    header, sep, body = value[5:].partition(",")
+    if not sep:
+        return None
+    params = header.split(";")
+    content_type = (params[0] or "text/plain").strip().lower()
+    try:
+        if "base64" in (p.strip().lower() for p in params[1:]):
+            payload = base64.b64decode(body)
+        else:
+            payload = unquote_to_bytes(body)
+    except (binascii.Error, ValueError):
+        return None
+    return content_type, payload
+
+
+def _entry_data_url(entry: Any) -> Tuple[Optional[str], Optional[str]]:
+    """``(data_url, name)`` found in a JSON media entry."""
+    if isinstance(entry, str):
+        return (entry, None) if entry[:5].lower() == "data:" else (None, None)
+    if isinstance(entry, dict):
+        for key in _DATA_KEYS:
+            value = entry.get(key)
+            if isinstance(value, str) and value[:5].lower() == "data:":
+                name = entry.get("name") or entry.get("filename")
+                return value, (str(name) if name else None)
+    return None, None
+
+
+def externalize_entries(entries: Any, store: BlobStore) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """Moves data URLs out of a media JSON list into the blob store.
+
+    Returns the rewritten list (data URLs replaced by references, anything
+    else kept as is) and one ``{sha256, content_type, size, name, position}``
+    dict per blob reference in the list, new or pre-existing.
+    """
+    if not isinstance(entries, list):
+        return entries, []
+
+    out: List[Any] = []
+    blobs: List[Dict[str, Any]] = []
+    for entry in entries:
+        sha = reference_sha(entry)
+        if sha:
+            out.append(media_url(sha))
+            blobs.append({"sha256": sha, "content_type": None, "size": None, "name": None, "position": len(out) - 1})
+            continue
+
+        data_url, name = _entry_data_url(entry)
+        parsed = parse_data_url(data_url) if data_url else None
+        if parsed is None:
+            out.append(entry)
+            continue
+
+        content_type, payload = parsed
+        sha = store.put(payload)
+        out.append(media_url(sha))
+        blobs.append({
+            "sha256": sha,
+            "content_type": content_type,
+            "size": len(payload),
+            "name": name,
+            "position": len(out) - 1,
+        })
+    return out, blobs
+
+
+def sync_artifact_media(media_model, artifact_id: int, kind: str, blobs: List[Dict[str, Any]], store: BlobStore) -> None:
+    """Makes the artifact's ``kind`` media rows match ``blobs``.
+
+    ``media_model`` is passed in so data migrations can use the historical
+    model.
+    """
+    existing = {m.sha256: m for m in media_model.objects.filter(artifact_id=artifact_id, kind=kind)}
+    wanted = {}
+    for blob in blobs:
+        wanted.setdefault(blob["sha256"], blob)
+
+    stale = [m.pk for sha, m in existing.items() if sha not in wanted]
+    if stale:
+        media_model.objects.filter(pk__in=stale).delete()
+
+    missing = [sha for sha in wanted if sha not in existing]
+    known_types = dict(
+        media_model.objects.filter(sha256__in=missing).values_list("sha256", "content_type")
+    ) if missing else {}
+
+    new_rows = []
+    for sha, blob in wanted.items():
+        row = existing.get(sha)
+        if row is not None:
+            if row.position != blob["position"]:
+                row.position = blob["position"]
+                row.save(update_fields=["position"])
+            continue
+        if not store.exists(sha):
+            continue
+        new_rows.append(media_model(
+            artifact_id=artifact_id,
+            kind=kind,
+            sha256=sha,
+            content_type=blob["content_type"] or known_types.get(sha) or DEFAULT_CONTENT_TYPE,
+            size=blob["size"] if blob["size"] is not None else store.size(sha),
+            name=blob["name"],
+            position=blob["position"],
+        ))
+    if new_rows:
+        media_model.objects.bulk_create(new_rows)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifact',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('production_material', 'period', config='turkish', weight='A'), '||', django.contrib.postgres.search.SearchVector('production_material', 'period', config='simple', weight='A'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('finding_shape', 'piece_date', 'excavation_inv_no', 'museum_inv_no', config='turkish', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('finding_shape', 'piece_date', 'excavation_inv_no', 'museum_inv_no', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('notes', 'source_and_reference', config='turkish', weight='C'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('notes', 'source_and_reference', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('turkish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='maincode',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('code', 'finding_place', config='turkish', weight='A'), '||', django.contrib.postgres.search.SearchVector('code', 'finding_place', config='simple', weight='A'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('plan_square', 'layer', 'level', 'grave_no', config='turkish', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('plan_square', 'layer', 'level', 'grave_no', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('description', 'gis', config='turkish', weight='C'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('description', 'gis', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('turkish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_artifact_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_maincode_search_gin'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='artifact',
+            name='period_folded',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(models.Func(models.F('period'), models.Value('İIı'), models.Value('iii'), function='TRANSLATE', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='production_material_folded',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(models.Func(models.F('production_material'), models.Value('İIı'), models.Value('iii'), function='TRANSLATE', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddField(
+            model_name='maincode',
+            name='finding_place_folded',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(models.Func(models.F('finding_place'), models.Value('İIı'), models.Value('iii'), function='TRANSLATE', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['production_material_folded'], name='core_artifact_material_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['period_folded'], name='core_artifact_period_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['code'], name='core_maincode_code_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['finding_place_folded'], name='core_maincode_place_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(fields=['created_at', 'id'], name='core_artifact_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(fields=['artifact_date', 'id'], name='core_artifact_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(fields=['artifact_no', 'id'], name='core_artifact_no_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=models.Index(fields=['created_at', 'id'], name='core_maincode_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Media',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('image', 'Fotoğraf'), ('drawing', 'Çizim')], max_length=10, verbose_name='Tür')),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('content_type', models.CharField(default='application/octet-stream', max_length=100)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('name', models.CharField(blank=True, max_length=255, null=True, verbose_name='Dosya Adı')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('artifact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media', to='core.artifact', verbose_name='Buluntu')),
+            ],
+            options={
+                'ordering': ('artifact', 'kind', 'position'),
+                'unique_together': {('artifact', 'kind', 'sha256')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from core.media import KIND_FIELDS, externalize_entries, get_blob_store, sync_artifact_media
+
+
+def extract_data_urls(apps, schema_editor):
+    """Moves data URLs from Artifact.images/drawings into the blob store."""
+    Artifact = apps.get_model("core", "Artifact")
+    Media = apps.get_model("core", "Media")
+    store = get_blob_store()
+
+    qs = Artifact.objects.only("id", "images", "drawings").order_by("pk")
+    for artifact in qs.iterator(chunk_size=100):
+        changed = []
+        for kind, field in KIND_FIELDS.items():
+            entries = getattr(artifact, field)
+            new_entries, blobs = externalize_entries(entries, store)
+            if not blobs:
+                continue
+            if new_entries != entries:
+                setattr(artifact, field, new_entries)
+                changed.append(field)
+            sync_artifact_media(Media, artifact.pk, kind, blobs, store)
+        if changed:
+            artifact.save(update_fields=changed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_media"),
+    ]
+
+    operations = [
+        migrations.RunPython(extract_data_urls, migrations.RunPython.noop),
+    ]
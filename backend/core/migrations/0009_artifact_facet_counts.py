@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+from core.facets import rebuild_facet_counts
+
+
+def fill_facet_counts(apps, schema_editor):
+    rebuild_facet_counts(apps.get_model("core", "Artifact"), apps.get_model("core", "ArtifactFacetCount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_exportjob_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtifactFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=30)),
+                ('value', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
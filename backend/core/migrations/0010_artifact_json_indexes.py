@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+import core.models
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+from django.db import migrations, models
+
+JSON_NUMBER_SQL = r"""
+CREATE OR REPLACE FUNCTION core_json_number(value text) RETURNS numeric
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE WHEN value ~ '^\s*[-+]?[0-9]+([.,][0-9]+)?\s*$'
+                THEN replace(value, ',', '.')::numeric END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_artifact_facet_counts'),
+    ]
+
+    operations = [
+        migrations.RunSQL(JSON_NUMBER_SQL, "DROP FUNCTION IF EXISTS core_json_number(text);"),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['details'], name='core_artifact_details_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['measurements'], name='core_artifact_measure_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(core.models.JSONNumber(django.db.models.fields.json.KeyTextTransform('diameter', 'details')), name='core_artifact_diameter_num'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(core.models.JSONNumber(django.db.models.fields.json.KeyTextTransform('weight', 'details')), name='core_artifact_weight_num'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(core.models.JSONNumber(django.db.models.fields.json.KeyTextTransform('height', 'measurements')), name='core_artifact_height_num'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(core.models.JSONNumber(django.db.models.fields.json.KeyTextTransform('length', 'measurements')), name='core_artifact_length_num'),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(core.models.JSONNumber(django.db.models.fields.json.KeyTextTransform('width', 'measurements')), name='core_artifact_width_num'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Every insert/update stamps the writing transaction id on the row; every
+# delete leaves a tombstone. Done in the database so QuerySet.update(),
+# bulk_create and cascades are covered too.
+CHANGE_FEED_SQL = """
+CREATE OR REPLACE FUNCTION core_stamp_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION core_record_tombstone() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO core_tombstone (model, object_id, change_xid, deleted_at)
+    VALUES (TG_ARGV[0], OLD.id, pg_current_xact_id()::text::bigint, clock_timestamp());
+    RETURN OLD;
+END
+$$;
+
+CREATE TRIGGER core_artifact_stamp_change BEFORE INSERT OR UPDATE ON core_artifact
+    FOR EACH ROW EXECUTE FUNCTION core_stamp_change();
+CREATE TRIGGER core_maincode_stamp_change BEFORE INSERT OR UPDATE ON core_maincode
+    FOR EACH ROW EXECUTE FUNCTION core_stamp_change();
+CREATE TRIGGER core_artifact_tombstone AFTER DELETE ON core_artifact
+    FOR EACH ROW EXECUTE FUNCTION core_record_tombstone('artifact');
+CREATE TRIGGER core_maincode_tombstone AFTER DELETE ON core_maincode
+    FOR EACH ROW EXECUTE FUNCTION core_record_tombstone('maincode');
+"""
+
+DROP_CHANGE_FEED_SQL = """
+DROP TRIGGER IF EXISTS core_artifact_stamp_change ON core_artifact;
+DROP TRIGGER IF EXISTS core_maincode_stamp_change ON core_maincode;
+DROP TRIGGER IF EXISTS core_artifact_tombstone ON core_artifact;
+DROP TRIGGER IF EXISTS core_maincode_tombstone ON core_maincode;
+DROP FUNCTION IF EXISTS core_stamp_change();
+DROP FUNCTION IF EXISTS core_record_tombstone();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_artifact_json_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('change_xid', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='maincode',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(fields=['change_xid', 'id'], name='core_artifact_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=models.Index(fields=['change_xid', 'id'], name='core_maincode_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'change_xid', 'object_id'], name='core_tombstone_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='core_tombstone_deleted_idx'),
+        ),
+        migrations.RunSQL(CHANGE_FEED_SQL, DROP_CHANGE_FEED_SQL),
+    ]
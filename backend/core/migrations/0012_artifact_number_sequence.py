@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Start every counter at the highest number already used under its main code.
+FILL_SEQUENCES_SQL = """
+INSERT INTO core_artifactnumbersequence (main_code_id, last_no, updated_at)
+SELECT main_code_id, MAX(artifact_no), now()
+FROM core_artifact
+GROUP BY main_code_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtifactNumberSequence',
+            fields=[
+                ('main_code', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='artifact_sequence', serialize=False, to='core.maincode')),
+                ('last_no', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunSQL(FILL_SEQUENCES_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+from core.geo import parse_gis
+
+
+def fill_coordinates(apps, schema_editor):
+    MainCode = apps.get_model("core", "MainCode")
+    rows = []
+    for mc in MainCode.objects.exclude(gis__isnull=True).exclude(gis="").only("id", "gis").iterator(chunk_size=1000):
+        coords = parse_gis(mc.gis)
+        if coords:
+            mc.lat, mc.lon = coords
+            rows.append(mc)
+    MainCode.objects.bulk_update(rows, ["lat", "lon"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_artifact_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maincode',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='maincode',
+            name='lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='maincode',
+            index=models.Index(condition=models.Q(('lat__isnull', False)), fields=['lat', 'lon'], name='core_maincode_latlon_idx'),
+        ),
+        migrations.RunPython(fill_coordinates, migrations.RunPython.noop),
+    ]
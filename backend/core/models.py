@@ -1,14 +1,98 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
-from django.db import models, transaction
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models import F, Func, Q, Value
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from .geo import parse_gis
+from .media import DEFAULT_CONTENT_TYPE, MEDIA_KINDS, media_url
+
 ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 BASE = 26
 MAX_CODE_INT = BASE**3 - 1  # ZZZ
 
+ARTIFACT_NO_MAX = 2147483647  # artifact_no is a Postgres integer
+
+# Text search configurations used for the generated search documents and for
+# parsing user queries; both sides must agree for the GIN index to be used.
+SEARCH_CONFIG = "turkish"
+# Unstemmed lexemes for prefix matching: the Turkish stemmer turns "Roma" into
+# "ro", which a "rom:*" query would otherwise never find.
+SEARCH_PREFIX_CONFIG = "simple"
+
+
+def search_document(*groups):
+    """tsvector over ``(fields, weight)`` groups, stemmed and unstemmed."""
+    vector = None
+    for fields, weight in groups:
+        for config in (SEARCH_CONFIG, SEARCH_PREFIX_CONFIG):
+            part = SearchVector(*fields, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+# Turkish-aware case folding for the *_folded shadow columns. Dotted and
+# dotless i (İ/i/I/ı) all fold to "i", so "istanbul", "İSTANBUL" and
+# "Istanbul" find each other; everything else is plain lower-casing.
+TURKISH_FOLD_FROM = "İIı"
+TURKISH_FOLD_TO = "iii"
+_TURKISH_FOLD_TABLE = str.maketrans(TURKISH_FOLD_FROM, TURKISH_FOLD_TO)
+
+
+def turkish_fold(value: str) -> str:
+    """Python twin of :func:`folded`, applied to search terms."""
+    return (value or "").translate(_TURKISH_FOLD_TABLE).lower()
+
+
+def folded(field: str):
+    """SQL expression folding ``field`` the same way as :func:`turkish_fold`."""
+    return Lower(
+        Func(
+            F(field),
+            Value(TURKISH_FOLD_FROM),
+            Value(TURKISH_FOLD_TO),
+            function="TRANSLATE",
+            output_field=models.TextField(),
+        )
+    )
+
+
+# Numeric value of a JSON text ("20", "12,5", " 3.0 "), NULL for anything else.
+# Declared IMMUTABLE so it can back expression indexes (migration 0010).
+JSON_NUMBER_FUNCTION = "core_json_number"
+
+
+class JSONNumber(Func):
+    function = JSON_NUMBER_FUNCTION
+    output_field = models.DecimalField()
+
+
+def json_number(field: str, *path: str):
+    """``details``/``measurements`` key as a number, matching the indexes below."""
+    source: Any = field
+    for key in path[:-1]:
+        source = KeyTransform(key, source)
+    return JSONNumber(KeyTextTransform(path[-1], source))
+
+
+# Form keys compared with ranges often enough to get an expression index
+# (``?details.diameter__gte=20``); other keys are still filterable, unindexed.
+INDEXED_JSON_NUMBERS = (
+    ("details", "diameter"),
+    ("details", "weight"),
+    ("measurements", "height"),
+    ("measurements", "length"),
+    ("measurements", "width"),
+)
+
 
 def code_to_int(code: str) -> int:
     code = (code or "").strip().upper()
@@ -50,44 +134,120 @@ class MainCode(models.Model):
     level = models.CharField(max_length=60, blank=True, null=True, verbose_name="Seviye")
     grave_no = models.CharField(max_length=60, blank=True, null=True, verbose_name="Mezar No")
     gis = models.CharField(max_length=255, blank=True, null=True, verbose_name="GIS")
+    # Parsed from `gis` on save (core/geo.py); NULL when it is not a coordinate
+    lat = models.FloatField(null=True, blank=True, editable=False)
+    lon = models.FloatField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
+    # Writing transaction id, stamped by a trigger (changes feed, api/sync.py)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    # Full-text document for `q`, kept up to date by PostgreSQL itself
+    search_vector = models.GeneratedField(
+        expression=search_document(
+            (("code", "finding_place"), "A"),
+            (("plan_square", "layer", "level", "grave_no"), "B"),
+            (("description", "gis"), "C"),
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    # Folded shadow column for substring filters / typeahead (trigram indexed)
+    finding_place_folded = models.GeneratedField(
+        expression=folded("finding_place"), output_field=models.TextField(), db_persist=True
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="core_maincode_search_gin"),
+            # keyset pagination: ordering column + pk tie-breaker
+            models.Index(fields=["created_at", "id"], name="core_maincode_created_id_idx"),
+            GinIndex(fields=["code"], opclasses=["gin_trgm_ops"], name="core_maincode_code_trgm"),
+            GinIndex(fields=["finding_place_folded"], opclasses=["gin_trgm_ops"], name="core_maincode_place_trgm"),
+            models.Index(fields=["change_xid", "id"], name="core_maincode_change_idx"),
+            # map bounding-box queries (api/spatial.py)
+            models.Index(fields=["lat", "lon"], name="core_maincode_latlon_idx", condition=Q(lat__isnull=False)),
+        ]
 
     def __str__(self) -> str:
         return self.code
 
+    def set_coordinates(self) -> None:
+        self.lat, self.lon = parse_gis(self.gis) or (None, None)
+
     def save(self, *args, **kwargs):
         self.updated_at = timezone.now()
         self.code = (self.code or "").strip().upper()
         if len(self.code) != 3:
             raise ValidationError("Anakod 3 harf olmalıdır (AAA ... ZZZ).")
+        self.set_coordinates()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "gis" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "lat", "lon"}
         super().save(*args, **kwargs)
 
     @classmethod
     def allocate_next_code(cls) -> str:
         """Allocates next available code in a transaction-safe way."""
+        return cls.allocate_codes(1)[0]
+
+    @classmethod
+    def free_codes_from(cls, start: int, count: int) -> List[str]:
+        """First ``count`` unused codes at or after ``start`` (code_to_int space).
+
+        One anti-join between ``generate_series`` and the unique code index
+        replaces probing candidate codes one query at a time, so manually
+        created codes are skipped server-side in a single round trip.
+        """
+        if start > MAX_CODE_INT:
+            return []
+        sql = f"""
+            SELECT n FROM generate_series(%s, %s) AS n
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {cls._meta.db_table} m
+                WHERE m.code = chr(65 + n / %s) || chr(65 + (n / %s) %% %s) || chr(65 + n %% %s)
+            )
+            ORDER BY n
+            LIMIT %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [start, MAX_CODE_INT, BASE * BASE, BASE, BASE, BASE, count])
+            return [int_to_code(row[0]) for row in cursor.fetchall()]
+
+    @classmethod
+    def allocate_codes(cls, count: int) -> List[str]:
+        """Allocates the next ``count`` free codes under a single sequence lock.
+
+        Codes in use are skipped, so there may be gaps.
+        """
+        if count < 1:
+            raise ValueError("count must be positive.")
         with transaction.atomic():
             seq, _ = MainCodeSequence.objects.select_for_update().get_or_create(pk=1)
-            if not seq.last_code:
-                next_code = "AAA"
-            else:
-                cur = code_to_int(seq.last_code)
-                if cur >= MAX_CODE_INT:
-                    raise ValidationError("Anakod havuzu doldu (ZZZ).")
-                next_code = int_to_code(cur + 1)
+            start = 0 if not seq.last_code else code_to_int(seq.last_code) + 1
 
             # Ensure uniqueness even if manual codes exist
-            while cls.objects.filter(code=next_code).exists():
-                cur = code_to_int(next_code)
-                if cur >= MAX_CODE_INT:
-                    raise ValidationError("Anakod havuzu doldu (ZZZ).")
-                next_code = int_to_code(cur + 1)
+            codes = cls.free_codes_from(start, count)
+            if len(codes) < count:
+                raise ValidationError("Anakod havuzu doldu (ZZZ).")
 
-            seq.last_code = next_code
+            seq.last_code = codes[-1]
             seq.updated_at = timezone.now()
             seq.save(update_fields=["last_code", "updated_at"])
-            return next_code
+            return codes
+
+    @classmethod
+    def bulk_create_with_codes(cls, rows: List[Dict[str, Any]]) -> List["MainCode"]:
+        """Allocates one code per row and inserts all rows in one transaction."""
+        with transaction.atomic():
+            codes = cls.allocate_codes(len(rows))
+            now = timezone.now()
+            objs = [cls(code=code, created_at=now, updated_at=now, **row) for code, row in zip(codes, rows)]
+            for obj in objs:
+                obj.set_coordinates()
+            return cls.objects.bulk_create(objs)
 
 
 class Artifact(models.Model):
@@ -122,19 +282,54 @@ class Artifact(models.Model):
     details = models.JSONField(default=dict, blank=True)
     measurements = models.JSONField(default=dict, blank=True)
 
-    # Media (prototype: store meta + data urls)
+    # Media references (/api/media/<sha256>/); blobs are linked through `Media`
     images = models.JSONField(default=list, blank=True)
     drawings = models.JSONField(default=list, blank=True)
 
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
+    # Writing transaction id, stamped by a trigger (changes feed, api/sync.py)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    # Full-text document for `q`; main code text is matched through MainCode.search_vector
+    search_vector = models.GeneratedField(
+        expression=search_document(
+            (("production_material", "period"), "A"),
+            (("finding_shape", "piece_date", "excavation_inv_no", "museum_inv_no"), "B"),
+            (("notes", "source_and_reference"), "C"),
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    # Folded shadow columns for substring filters / typeahead (trigram indexed)
+    production_material_folded = models.GeneratedField(
+        expression=folded("production_material"), output_field=models.TextField(), db_persist=True
+    )
+    period_folded = models.GeneratedField(expression=folded("period"), output_field=models.TextField(), db_persist=True)
 
     class Meta:
         unique_together = ("main_code", "artifact_no")
         indexes = [
-            models.Index(fields=["main_code", "artifact_no"]),
-            models.Index(fields=["artifact_date"]),
-            models.Index(fields=["form_type"]),
+            models.Index(fields=["main_code", "artifact_no"], name="core_artifa_main_co_4d1a6a_idx"),
+            models.Index(fields=["artifact_date"], name="core_artifa_artifac_2d5d4f_idx"),
+            models.Index(fields=["form_type"], name="core_artifa_form_ty_2b25fb_idx"),
+            GinIndex(fields=["search_vector"], name="core_artifact_search_gin"),
+            # keyset pagination: ordering column + pk tie-breaker
+            models.Index(fields=["created_at", "id"], name="core_artifact_created_id_idx"),
+            models.Index(fields=["artifact_date", "id"], name="core_artifact_date_id_idx"),
+            models.Index(fields=["artifact_no", "id"], name="core_artifact_no_id_idx"),
+            GinIndex(
+                fields=["production_material_folded"], opclasses=["gin_trgm_ops"], name="core_artifact_material_trgm"
+            ),
+            GinIndex(fields=["period_folded"], opclasses=["gin_trgm_ops"], name="core_artifact_period_trgm"),
+            # ?details.<key>=<value> containment filters
+            GinIndex(fields=["details"], opclasses=["jsonb_path_ops"], name="core_artifact_details_gin"),
+            GinIndex(fields=["measurements"], opclasses=["jsonb_path_ops"], name="core_artifact_measure_gin"),
+            models.Index(fields=["change_xid", "id"], name="core_artifact_change_idx"),
+        ] + [
+            models.Index(json_number(field, key), name=f"core_artifact_{key}_num")
+            for field, key in INDEXED_JSON_NUMBERS
         ]
 
     def __str__(self) -> str:
@@ -147,3 +342,223 @@ class Artifact(models.Model):
     def save(self, *args, **kwargs):
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
+
+    @classmethod
+    def taken_numbers(cls, pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+        """Ids of the rows using any of the ``(main_code_id, artifact_no)`` pairs, in one query."""
+        by_code: Dict[int, set] = {}
+        for main_code_id, artifact_no in pairs:
+            by_code.setdefault(main_code_id, set()).add(artifact_no)
+        if not by_code:
+            return {}
+        cond = Q()
+        for main_code_id, numbers in by_code.items():
+            cond |= Q(main_code_id=main_code_id, artifact_no__in=sorted(numbers))
+        rows = cls.objects.filter(cond).values_list("main_code_id", "artifact_no", "id")
+        return {(mc, no): pk for mc, no, pk in rows}
+
+    @classmethod
+    def free_numbers(cls, main_code_id: int, count: int, start: int = 1) -> List[int]:
+        """First ``count`` unused artifact numbers of a main code at or after ``start``.
+
+        Reads the gaps between the numbers in use (one range scan of the
+        ``(main_code, artifact_no)`` unique index from ``start`` on) and
+        expands only as many of them as ``count`` needs, so a stray very high
+        number does not make the query walk the whole range below it. Numbers
+        never pass :data:`ARTIFACT_NO_MAX`.
+        """
+        start = min(max(1, start), ARTIFACT_NO_MAX)
+        table = cls._meta.db_table
+        sql = f"""
+            WITH used AS (
+                SELECT artifact_no::bigint AS no, LEAD(artifact_no::bigint) OVER (ORDER BY artifact_no) AS next_no
+                FROM {table}
+                WHERE main_code_id = %(main_code)s AND artifact_no >= %(start)s
+            ),
+            gaps AS (
+                SELECT %(start)s::bigint AS gap_start, COALESCE((SELECT MIN(no) FROM used), %(end)s) - 1 AS gap_end
+                UNION ALL
+                SELECT no + 1, COALESCE(next_no, %(end)s) - 1 FROM used
+            ),
+            counted AS (
+                SELECT gap_start, gap_end, COALESCE(SUM(gap_end - gap_start + 1) OVER (
+                    ORDER BY gap_start ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ), 0)::bigint AS before
+                FROM gaps
+                WHERE gap_start <= gap_end
+            )
+            SELECT n FROM counted, generate_series(gap_start, LEAST(gap_end, gap_start + %(count)s - before - 1)) AS n
+            WHERE before < %(count)s
+            ORDER BY n
+        """
+        params = {"main_code": main_code_id, "start": start, "end": ARTIFACT_NO_MAX + 1, "count": count}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class ArtifactNumberSequence(models.Model):
+    """Last artifact number handed out per main code (auto numbering).
+
+    One counter row per main code: an allocation locks only that row, until
+    the surrounding transaction ends, so different main codes never wait on
+    each other. Client-chosen numbers push the counter forward through
+    :meth:`observe`; migration 0012 seeded it from existing artifacts.
+    """
+    main_code = models.OneToOneField(
+        MainCode, on_delete=models.CASCADE, primary_key=True, related_name="artifact_sequence"
+    )
+    last_no = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.main_code_id}: {self.last_no}"
+
+    @classmethod
+    def _upsert(cls, rows: List[Tuple[int, int]], on_conflict: str) -> List[Tuple[int, int]]:
+        table = cls._meta.db_table
+        # Fixed lock order keeps concurrent multi-main-code writers from deadlocking.
+        rows = sorted(rows)
+        placeholders = ", ".join(["(%s, %s, now())"] * len(rows))
+        sql = (
+            f"INSERT INTO {table} (main_code_id, last_no, updated_at) VALUES {placeholders} "
+            f"ON CONFLICT (main_code_id) DO UPDATE SET last_no = {on_conflict}, updated_at = now() "
+            f"RETURNING main_code_id, last_no"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [p for row in rows for p in row])
+            return cursor.fetchall()
+
+    @classmethod
+    def allocate(cls, counts: Dict[int, int], observed: Optional[Dict[int, int]] = None) -> Dict[int, List[int]]:
+        """Reserves ``counts[main_code_id]`` unused numbers per main code.
+
+        ``observed`` holds the highest client-chosen number per main code
+        written in the same transaction. Every counter involved is locked
+        first, in one ordered statement, so a concurrent allocation waits for
+        this transaction and then skips its numbers. Numbers inserted without
+        going through the counter are skipped too.
+        """
+        touched = {mc: (observed or {}).get(mc, 0) for mc in {*counts, *(observed or {})}}
+        if touched:
+            cls.observe(touched)
+        result: Dict[int, List[int]] = {mc: [] for mc in counts}
+        need = {mc: n for mc, n in counts.items() if n > 0}
+        while need:
+            table = cls._meta.db_table
+            returned = dict(cls._upsert(list(need.items()), f"{table}.last_no + EXCLUDED.last_no"))
+            blocks = {mc: range(returned[mc] - n + 1, returned[mc] + 1) for mc, n in need.items()}
+            taken = Artifact.taken_numbers((mc, no) for mc, block in blocks.items() for no in block)
+            for mc, block in blocks.items():
+                result[mc].extend(no for no in block if (mc, no) not in taken)
+            need = {mc: counts[mc] - len(result[mc]) for mc in need if len(result[mc]) < counts[mc]}
+        return result
+
+    @classmethod
+    def observe(cls, numbers: Dict[int, int]) -> None:
+        """Moves counters past client-chosen numbers (``{main_code_id: artifact_no}``)."""
+        if numbers:
+            table = cls._meta.db_table
+            cls._upsert(list(numbers.items()), f"GREATEST({table}.last_no, EXCLUDED.last_no)")
+
+
+class Media(models.Model):
+    """An artifact image/drawing stored in the content-addressed blob store."""
+    artifact = models.ForeignKey(Artifact, on_delete=models.CASCADE, related_name="media", verbose_name="Buluntu")
+    kind = models.CharField(max_length=10, choices=MEDIA_KINDS, verbose_name="Tür")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    content_type = models.CharField(max_length=100, default=DEFAULT_CONTENT_TYPE)
+    size = models.PositiveBigIntegerField(default=0)
+    name = models.CharField(max_length=255, blank=True, null=True, verbose_name="Dosya Adı")
+    position = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("artifact", "kind", "position")
+        unique_together = ("artifact", "kind", "sha256")
+
+    def __str__(self) -> str:
+        return self.name or self.sha256[:12]
+
+    @property
+    def url(self) -> str:
+        return media_url(self.sha256)
+
+
+class ExportJob(models.Model):
+    """A queued export rendered by the `run_export_worker` process."""
+    KIND_ARTIFACT = "artifact"
+    KIND_BULK = "bulk"
+    KIND_CATALOG = "catalog"
+    KINDS = (
+        (KIND_ARTIFACT, "Buluntu Çıktısı"),
+        (KIND_BULK, "Toplu Çıktı"),
+        (KIND_CATALOG, "Katalog"),
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "Sırada"),
+        (RUNNING, "Çalışıyor"),
+        (DONE, "Tamamlandı"),
+        (FAILED, "Hata"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    format = models.CharField(max_length=20)
+    # artifact id for single exports, list filter params for bulk exports
+    params = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    error = models.TextField(blank=True, default="")
+    result_path = models.CharField(max_length=500, blank=True, default="")
+    result_name = models.CharField(max_length=255, blank=True, default="")
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.PositiveBigIntegerField(default=0)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.format} ({self.status})"
+
+
+class ArtifactFacetCount(models.Model):
+    """Whole-dataset artifact counts per facet value (see core/facets.py)."""
+    facet = models.CharField(max_length=30)
+    value = models.CharField(max_length=255, blank=True, default="")
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("facet", "value")
+
+    def __str__(self) -> str:
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class Tombstone(models.Model):
+    """A deleted artifact or main code, recorded by a trigger for the changes feed."""
+    model = models.CharField(max_length=30)  # Artifact / MainCode model_name
+    object_id = models.BigIntegerField()
+    change_xid = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "change_xid", "object_id"], name="core_tombstone_change_idx"),
+            models.Index(fields=["deleted_at"], name="core_tombstone_deleted_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} #{self.object_id}"
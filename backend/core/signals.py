@@ -0,0 +1,27 @@
+"""Keeps the facet summary table in step with artifact saves and deletes (after commit)."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .facets import SOURCE_FIELDS, artifact_values, defer_facet_deltas, facet_deltas
+from .models import Artifact
+
+
+@receiver(pre_save, sender=Artifact)
+def remember_facet_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._facet_old = None
+    instance._facet_skip = bool(update_fields) and not set(update_fields) & set(SOURCE_FIELDS)
+    if instance.pk and not raw and not instance._facet_skip:
+        instance._facet_old = Artifact.objects.filter(pk=instance.pk).values(*SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=Artifact)
+def count_saved_artifact(sender, instance, created, raw=False, **kwargs):
+    if raw or getattr(instance, "_facet_skip", False):
+        return
+    old = None if created else getattr(instance, "_facet_old", None)
+    defer_facet_deltas(facet_deltas(old, artifact_values(instance)))
+
+
+@receiver(post_delete, sender=Artifact)
+def count_deleted_artifact(sender, instance, **kwargs):
+    defer_facet_deltas(facet_deltas(artifact_values(instance), None))
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from .geo import parse_gis
+
+
+class ParseGisTests(SimpleTestCase):
+    def test_decimal_pairs(self):
+        self.assertEqual(parse_gis("39.9255, 32.8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("39,9255 32,8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("geo:39.9255,32.8512;u=10"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("-33.8688, 151.2093"), (-33.8688, 151.2093))
+
+    def test_wkt_is_longitude_first(self):
+        self.assertEqual(parse_gis("POINT(32.8512 39.9255)"), (39.9255, 32.8512))
+
+    def test_hemisphere_letters_after(self):
+        self.assertEqual(parse_gis("39.9255 N 32.8512 E"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("32.8512E 39.9255N"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("33.8688 S 151.2093 E"), (-33.8688, 151.2093))
+
+    def test_hemisphere_letters_before(self):
+        self.assertEqual(parse_gis("N 39.9255 E 32.8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("N39.9255, E32.8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("K39.9255 D32.8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("K39,9255 D32,8512"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("E 32.8512 N 39.9255"), (39.9255, 32.8512))
+        self.assertEqual(parse_gis("S 33.8688 W 70.6693"), (-33.8688, -70.6693))
+
+    def test_dms(self):
+        lat, lon = parse_gis("39°55'31.8\"N 32°51'04.3\"E")
+        self.assertAlmostEqual(lat, 39.9255, places=4)
+        self.assertAlmostEqual(lon, 32.851194, places=4)
+        lat, lon = parse_gis("K39°55'31.8\" D32°51'04.3\"")
+        self.assertAlmostEqual(lat, 39.9255, places=4)
+        self.assertAlmostEqual(lon, 32.851194, places=4)
+        lat, lon = parse_gis("39°55,5' K 32°51' D")
+        self.assertAlmostEqual(lat, 39.925, places=4)
+        self.assertAlmostEqual(lon, 32.85, places=4)
+
+    def test_rejected(self):
+        self.assertIsNone(parse_gis(""))
+        self.assertIsNone(parse_gis(None))
+        self.assertIsNone(parse_gis("Akropol yanı"))
+        self.assertIsNone(parse_gis("39.9255"))
+        self.assertIsNone(parse_gis("95.0, 32.8"))
+        # ambiguous: one letter before, one after
+        self.assertIsNone(parse_gis("N 39.9255 32.8512 E"))
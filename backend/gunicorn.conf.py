@@ -0,0 +1,49 @@
+"""gunicorn settings: ``gunicorn -c gunicorn.conf.py``.
+
+``SERVER_MODE=wsgi`` (default) runs sync workers on ``arkeoloji.wsgi``.
+``SERVER_MODE=asgi`` runs uvicorn workers on ``arkeoloji.asgi``: the
+read-heavy artifact endpoints are then async (api/async_views.py) and one
+worker holds hundreds of slow connections, so fewer workers are needed.
+
+Metrics (api/metrics.py) run in prometheus-client's multiprocess mode: each
+worker writes its values to files in ``PROMETHEUS_MULTIPROC_DIR`` and
+``/api/metrics/`` sums them. The directory is emptied when the master starts,
+so values from a previous run are not added in, and a dead worker's live
+gauges are dropped when it exits.
+"""
+import os
+import shutil
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "arkeoloji.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "arkeoloji.wsgi:application"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+if METRICS_ENABLED:
+    # Must be in the environment before the workers import prometheus_client.
+    metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/arkeoloji-metrics")
+
+
+def on_starting(server):
+    if METRICS_ENABLED:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if not METRICS_ENABLED:
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
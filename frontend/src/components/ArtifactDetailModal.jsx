@@ -1,5 +1,6 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import Modal from "./Modal.jsx";
+import { apiGet } from "../api.js";
 import Row from "./KeyValueRow.jsx";
 import { DETAILS_SCHEMA, MEASUREMENT_SCHEMA, ENUMS } from "../schemas/artifactSchemas.js";
 
@@ -106,7 +107,24 @@ function MeasurementsPretty({ row }) {
 }
 
 export default function ArtifactDetailModal({ open, onClose, artifact }) {
-  const row = artifact || null;
+  // List pages only carry compact rows; load the full record for the modal.
+  const [full, setFull] = useState(null);
+
+  useEffect(() => {
+    setFull(null);
+    if (!open || !artifact?.id) return;
+    let cancelled = false;
+    apiGet(`/api/artifacts/${artifact.id}/`)
+      .then((data) => {
+        if (!cancelled) setFull(data);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [open, artifact?.id]);
+
+  const row = full || artifact || null;
   const title = row ? `Buluntu Detay — ${row.full_artifact_no || row.id}` : "Buluntu Detay";
 
   return (
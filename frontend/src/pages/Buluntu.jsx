@@ -242,9 +242,17 @@ export default function Buluntu() {
     }
   }
 
-  function startEdit(row) {
+  async function startEdit(listRow) {
     setMsg("");
     setErr("");
+    let row;
+    try {
+      // List rows are compact; the form needs the full record.
+      row = await apiGet(`/api/artifacts/${listRow.id}/`);
+    } catch (e) {
+      setErr(e.message || "Kayıt yüklenemedi.");
+      return;
+    }
     setEditingId(row.id);
     setForm({
       main_code: row.main_code ?? "",
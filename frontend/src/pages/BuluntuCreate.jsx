@@ -31,6 +31,9 @@ export default function BuluntuCreate() {
 
   const [editingId, setEditingId] = useState(null);
 
+  // First unused number of the selected main code; only a hint, the server numbers new entries.
+  const [nextFree, setNextFree] = useState(null);
+
   const [form, setForm] = useState({
     main_code: "",
     artifact_no: "",
@@ -52,9 +55,9 @@ export default function BuluntuCreate() {
   const fullNoPreview = useMemo(() => {
     const mc = anakod.find((a) => String(a.id) === String(form.main_code));
     const code = mc?.code || "";
-    const no = pad4(form.artifact_no);
+    const no = pad4(form.artifact_no || (editingId ? "" : nextFree));
     return code && no ? `${code}${no}` : "";
-  }, [anakod, form.main_code, form.artifact_no]);
+  }, [anakod, form.main_code, form.artifact_no, nextFree, editingId]);
 
   async function loadMainCodes() {
     const data = await apiGet("/api/main-codes/?page_size=500");
@@ -123,6 +126,26 @@ export default function BuluntuCreate() {
     }
   }
 
+  async function loadNextFree(mainCode) {
+    const res = await apiGet(`/api/artifacts/next-free/?main_code=${encodeURIComponent(mainCode)}&count=1`);
+    return res.numbers?.[0] ?? null;
+  }
+
+  // New entries: show the first unused number of the selected main code as a hint.
+  useEffect(() => {
+    setNextFree(null);
+    if (editingId || !form.main_code) return;
+    let cancelled = false;
+    loadNextFree(form.main_code)
+      .then((next) => {
+        if (!cancelled) setNextFree(next);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [form.main_code, editingId]);
+
   useEffect(() => {
     checkUnique(form.main_code, form.artifact_no);
     // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -159,8 +182,8 @@ export default function BuluntuCreate() {
     setErr("");
 
     const no = pad4(form.artifact_no);
-    if (!form.main_code || !no || !form.artifact_date) {
-      setErr("Anakod, Buluntu No ve Buluntu Tarihi zorunludur.");
+    if (!form.main_code || !form.artifact_date || (editingId && !no)) {
+      setErr(editingId ? "Anakod, Buluntu No ve Buluntu Tarihi zorunludur." : "Anakod ve Buluntu Tarihi zorunludur.");
       return;
     }
     if (uniqueError) {
@@ -168,7 +191,10 @@ export default function BuluntuCreate() {
       return;
     }
 
-    const payload = { ...form, artifact_no: parseInt(no, 10) };
+    // Without a typed number the server assigns the next free one.
+    const payload = { ...form };
+    if (no) payload.artifact_no = parseInt(no, 10);
+    else delete payload.artifact_no;
 
     try {
       let saved = null;
@@ -201,6 +227,7 @@ export default function BuluntuCreate() {
 
       setUniqueHint("");
       setUniqueError(false);
+      if (!editingId) loadNextFree(saved.main_code).then(setNextFree).catch(() => {});
 
       if (editingId) {
         setEditingId(null);
@@ -255,12 +282,15 @@ export default function BuluntuCreate() {
                 <label className="text-sm font-semibold text-slate-700">Buluntu Numarası</label>
                 <div className="mt-1.5">
                   <Input
-                    required
+                    required={!!editingId}
                     value={pad4(form.artifact_no)}
                     onChange={(e) => setForm((p) => ({ ...p, artifact_no: e.target.value }))}
-                    placeholder="0001"
+                    placeholder={nextFree ? pad4(nextFree) : "0001"}
                   />
                 </div>
+                {!editingId && !form.artifact_no ? (
+                  <div className="mt-1 text-xs text-slate-500">Boş bırakılırsa numara kayıtta otomatik verilir.</div>
+                ) : null}
                 {fullNoPreview ? (
                   <div className="mt-1 text-xs text-slate-500">
                     Önizleme: <span className="font-semibold text-slate-800">{fullNoPreview}</span>
@@ -2,14 +2,63 @@ import React, { useEffect, useState } from "react";
 import { apiGet } from "../api.js";
 import { Card, CardHeader, CardBody, CardTitle } from "../ui/Card.jsx";
 
+const FACET_TITLES = {
+  form_type: "Form",
+  period: "Dönem",
+  production_material: "Yapım Malzemesi",
+  is_inventory: "Envanterlik",
+  is_active: "Aktif",
+  artifact_month: "Buluntu Tarihi (Ay)",
+};
+
+function facetLabel(value) {
+  if (value === "true") return "Evet";
+  if (value === "false") return "Hayır";
+  return value || "—";
+}
+
+function FacetCard({ title, items, total }) {
+  return (
+    <Card>
+      <CardHeader>
+        <CardTitle>{title}</CardTitle>
+      </CardHeader>
+      <CardBody>
+        {items.length === 0 ? (
+          <div className="text-sm text-slate-600">Kayıt yok.</div>
+        ) : (
+          <ul className="max-h-64 space-y-1 overflow-auto text-sm">
+            {items.map((item) => (
+              <li key={item.value} className="flex items-center gap-2">
+                <span className="w-40 shrink-0 truncate">{facetLabel(item.value)}</span>
+                <span className="h-2 flex-1 rounded bg-slate-100">
+                  <span
+                    className="block h-2 rounded bg-slate-500"
+                    style={{ width: `${total ? (item.count * 100) / total : 0}%` }}
+                  />
+                </span>
+                <span className="w-12 text-right tabular-nums">{item.count}</span>
+              </li>
+            ))}
+          </ul>
+        )}
+      </CardBody>
+    </Card>
+  );
+}
+
 export default function Dashboard() {
   const [health, setHealth] = useState(null);
   const [error, setError] = useState("");
+  const [facets, setFacets] = useState(null);
 
   useEffect(() => {
     apiGet("/api/health/")
       .then(setHealth)
       .catch((e) => setError(e.message));
+    apiGet("/api/artifacts/facets/")
+      .then(setFacets)
+      .catch((e) => setError(e.message));
   }, []);
 
   return (
@@ -39,6 +88,19 @@ export default function Dashboard() {
           )}
         </CardBody>
       </Card>
+
+      {facets && (
+        <>
+          <div className="text-sm text-slate-600">
+            Toplam buluntu: <b>{facets.total}</b>
+          </div>
+          <div className="grid gap-4 md:grid-cols-2">
+            {Object.entries(FACET_TITLES).map(([name, title]) => (
+              <FacetCard key={name} title={title} items={facets.facets[name] || []} total={facets.total} />
+            ))}
+          </div>
+        </>
+      )}
     </div>
   );
 }